@@ -0,0 +1,240 @@
+import json
+import math
+import hashlib
+import datetime
+import logging
+from typing import Dict, Any, Callable, Optional, Tuple
+from aiohttp import web
+from raid_calendar import obtener_calendario, primera_ocurrencia
+from utils import obtener_tiempo_kst
+
+logger = logging.getLogger(__name__)
+
+# Recurso renderizado: (cuerpo JSON, ETag, instante en que deja de ser válido)
+Recurso = Tuple[bytes, str, datetime.datetime]
+
+def serializar(datos: Any) -> bytes:
+    """JSON compacto y estable (mismo contenido -> mismos bytes -> mismo ETag)"""
+    return json.dumps(datos, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+def calcular_etag(cuerpo: bytes) -> str:
+    """ETag fuerte a partir del contenido"""
+    return '"' + hashlib.sha1(cuerpo).hexdigest()[:20] + '"'
+
+def etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """Comprueba una cabecera If-None-Match (lista separada por comas, '*' o ETags débiles)"""
+    if not if_none_match:
+        return False
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato == "*" or candidato.removeprefix("W/") == etag:
+            return True
+    return False
+
+def spawn_json(digimon: Dict[str, Any], horario: Dict[str, int], spawn_time: datetime.datetime) -> Dict[str, Any]:
+    """Representación JSON de un spawn (momentos absolutos: no caducan cada segundo)"""
+    return {
+        "digimon": digimon["nombre"],
+        "tipo": digimon["tipo"],
+        "mapa": digimon["mapa"],
+        "recompensa": digimon["recompensa"],
+        "horario": f"{horario['hora']:02d}:{horario['minuto']:02d}",
+        "spawn_time": spawn_time.isoformat(),
+        "timestamp": int(spawn_time.timestamp())
+    }
+
+class InstantaneaHorario:
+    """
+    Instantánea compartida de solo lectura del horario para la API HTTP
+
+    Cada recurso se renderiza una vez a bytes JSON junto con su ETag y el
+    próximo instante en que su contenido cambia (el spawn más cercano que
+    incluye, o la medianoche KST para el calendario). Hasta ese instante, o
+    hasta que cambie la versión del roster, todas las peticiones reciben los
+    mismos bytes sin volver a calcular nada; los datos salen del calendario
+    compartido (raid_calendar), nunca directamente del DigimonManager.
+    """
+
+    def __init__(self, digimon_manager, dias_calendario: int = 7, dias_maximos: int = 28,
+                 reloj: Callable[[], datetime.datetime] = obtener_tiempo_kst):
+        self.digimon_manager = digimon_manager
+        self.dias_calendario = dias_calendario
+        self.dias_maximos = dias_maximos
+        self.reloj = reloj
+        self._recursos: Dict[Any, Optional[Recurso]] = {}
+        self._version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    def obtener(self, clave: Any) -> Optional[Recurso]:
+        """
+        Recurso renderizado para una clave ("spawns", ("digimon", nombre), ("calendar", dias))
+
+        Returns:
+            (cuerpo, etag, expira) o None si el recurso no existe
+        """
+        ahora = self.reloj()
+        calendario = obtener_calendario(self.digimon_manager)
+        if calendario.version != self._version:
+            # El roster cambió: todo lo renderizado queda obsoleto
+            self._recursos = {}
+            self._version = calendario.version
+
+        recurso = self._recursos.get(clave)
+        if recurso is not None and ahora <= recurso[2]:
+            self.hits += 1
+            return recurso
+
+        self.misses += 1
+        if clave == "spawns":
+            datos = self._spawns(calendario, ahora)
+        elif clave[0] == "digimon":
+            datos = self._digimon(calendario, clave[1], ahora)
+        else:
+            datos = self._calendario(calendario, clave[1], ahora)
+
+        if datos is None:
+            # Los 404 no se guardan: nombres arbitrarios no deben llenar el cache
+            return None
+
+        contenido, expira = datos
+        cuerpo = serializar(contenido)
+        recurso = (cuerpo, calcular_etag(cuerpo), expira)
+        self._recursos[clave] = recurso
+        return recurso
+
+    def _spawns(self, calendario, ahora: datetime.datetime):
+        spawns = sorted(
+            ((primera_ocurrencia(digimon, horario, ahora), digimon, horario) for digimon, horario in calendario.timers),
+            key=lambda spawn: spawn[0]
+        )
+        contenido = {
+            "generated_at": ahora.isoformat(),
+            "spawns": [spawn_json(digimon, horario, momento) for momento, digimon, horario in spawns]
+        }
+        # La lista cambia en cuanto pasa el spawn más cercano
+        expira = spawns[0][0] if spawns else ahora + datetime.timedelta(days=1)
+        return contenido, expira
+
+    def _digimon(self, calendario, nombre: str, ahora: datetime.datetime):
+        timers = [(digimon, horario) for digimon, horario in calendario.timers if digimon["nombre"].lower() == nombre]
+        if not timers:
+            return None
+
+        digimon = timers[0][0]
+        proximos = sorted(primera_ocurrencia(digimon, horario, ahora) for _, horario in timers)
+        contenido = {
+            "nombre": digimon["nombre"],
+            "tipo": digimon["tipo"],
+            "mapa": digimon["mapa"],
+            "recompensa": digimon["recompensa"],
+            "imagen": digimon.get("imagen"),
+            "recurrencia_dias": digimon["recurrencia_dias"],
+            "fecha_inicio": digimon["fecha_inicio"].isoformat(),
+            "horarios": [f"{h['hora']:02d}:{h['minuto']:02d}" for _, h in timers],
+            "avisos_minutos": digimon.get("avisos_minutos", []),
+            "proximos_spawns": [momento.isoformat() for momento in proximos]
+        }
+        return contenido, proximos[0]
+
+    def _calendario(self, calendario, dias: int, ahora: datetime.datetime):
+        desde = ahora.replace(hour=0, minute=0, second=0, microsecond=0)
+        hasta = desde + datetime.timedelta(days=dias)
+        contenido = {
+            "desde": desde.isoformat(),
+            "hasta": hasta.isoformat(),
+            "spawns": [spawn_json(s["digimon"], s["horario"], s["spawn_time"]) for s in calendario.spawns(desde, hasta)]
+        }
+        # La ventana empieza en la medianoche KST: cambia al día siguiente
+        return contenido, desde + datetime.timedelta(days=1)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Recursos en cache y aciertos"""
+        total = self.hits + self.misses
+        return {
+            'resources': len(self._recursos),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0
+        }
+
+class ServidorAPI:
+    """
+    Servidor HTTP de solo lectura embebido en el proceso del bot (aiohttp)
+
+    Rutas: /spawns, /digimon/{nombre} y /calendar?dias=N. Las respuestas
+    llevan ETag y Cache-Control con max-age hasta el próximo cambio, y un
+    If-None-Match coincidente se responde con 304 sin cuerpo.
+    """
+
+    def __init__(self, instantanea: InstantaneaHorario, host: str, port: int, cors_origin: Optional[str] = None):
+        self.instantanea = instantanea
+        self.host = host
+        self.port = port
+        self.cors_origin = cors_origin
+        self._runner: Optional[web.AppRunner] = None
+        self.respuestas = {"200": 0, "304": 0, "404": 0, "400": 0}
+
+        self.app = web.Application()
+        self.app.router.add_get("/spawns", self._handle_spawns)
+        self.app.router.add_get("/digimon/{nombre}", self._handle_digimon)
+        self.app.router.add_get("/calendar", self._handle_calendar)
+
+    async def start(self):
+        """Arranca el servidor (requiere un event loop en marcha)"""
+        if self._runner is not None:
+            return
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"🌐 API de solo lectura escuchando en http://{self.host}:{self.port}")
+
+    async def stop(self):
+        """Detiene el servidor"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _cabeceras_cors(self) -> Dict[str, str]:
+        return {"Access-Control-Allow-Origin": self.cors_origin} if self.cors_origin else {}
+
+    def _responder(self, request: web.Request, recurso: Optional[Recurso]) -> web.Response:
+        headers = self._cabeceras_cors()
+
+        if recurso is None:
+            self.respuestas["404"] += 1
+            return web.json_response({"error": "not found"}, status=404, headers=headers)
+
+        cuerpo, etag, expira = recurso
+        segundos = max(1, math.ceil((expira - self.instantanea.reloj()).total_seconds()))
+        headers["ETag"] = etag
+        headers["Cache-Control"] = f"public, max-age={segundos}"
+
+        if etag_coincide(request.headers.get("If-None-Match"), etag):
+            self.respuestas["304"] += 1
+            return web.Response(status=304, headers=headers)
+
+        self.respuestas["200"] += 1
+        return web.Response(body=cuerpo, content_type="application/json", charset="utf-8", headers=headers)
+
+    async def _handle_spawns(self, request: web.Request) -> web.Response:
+        return self._responder(request, self.instantanea.obtener("spawns"))
+
+    async def _handle_digimon(self, request: web.Request) -> web.Response:
+        nombre = request.match_info["nombre"].lower()
+        return self._responder(request, self.instantanea.obtener(("digimon", nombre)))
+
+    async def _handle_calendar(self, request: web.Request) -> web.Response:
+        try:
+            dias = int(request.query.get("dias", self.instantanea.dias_calendario))
+        except ValueError:
+            dias = 0
+        if not 1 <= dias <= self.instantanea.dias_maximos:
+            self.respuestas["400"] += 1
+            return web.json_response({"error": f"dias must be between 1 and {self.instantanea.dias_maximos}"},
+                                     status=400, headers=self._cabeceras_cors())
+        return self._responder(request, self.instantanea.obtener(("calendar", dias)))
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Respuestas por código y aciertos de la instantánea"""
+        return {**self.respuestas, **self.instantanea.get_statistics()}
@@ -0,0 +1,106 @@
+"""
+Benchmark del motor de calendario
+
+Genera todas las ocurrencias de un roster sintético en un horizonte de días
+con cada estrategia de raid_calendar.CalendarioRaids (NumPy, Python puro y
+mezcla por heap en streaming) y las compara con encadenar llamadas a
+obtener_proximo_spawn, que se mide sobre una muestra de horarios y se
+extrapola al roster completo.
+
+Uso:
+    python benchmarks/bench_calendar.py [--horarios 10000] [--dias 90] [--muestra 200]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.default_data import KST
+from raid_calendar import CalendarioRaids, np
+from utils import obtener_proximo_spawn
+
+def crear_roster(horarios: int, inicio: datetime.datetime):
+    """Roster sintético con un horario por Digimon y recurrencias de 1 a 13 días"""
+    rng = random.Random(horarios)
+    return [
+        {
+            "nombre": f"Digimon{i}",
+            "tipo": "Vacuna",
+            "mapa": "Mapa",
+            "recompensa": "Recompensa",
+            "horarios": [{"hora": rng.randrange(24), "minuto": rng.randrange(60)}],
+            "recurrencia_dias": rng.choice((1, 1, 1, 2, 5, 6, 12, 13)),
+            "fecha_inicio": inicio - datetime.timedelta(days=rng.randrange(0, 30))
+        }
+        for i in range(horarios)
+    ]
+
+def cronometrar(funcion):
+    """Devuelve (segundos, resultado)"""
+    t0 = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - t0, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de calendario")
+    parser.add_argument("--horarios", type=int, default=10000)
+    parser.add_argument("--dias", type=int, default=90)
+    parser.add_argument("--muestra", type=int, default=200, help="Horarios medidos con obtener_proximo_spawn")
+    args = parser.parse_args()
+
+    inicio = KST.localize(datetime.datetime(2025, 9, 1))
+    fin = inicio + datetime.timedelta(days=args.dias)
+    roster = crear_roster(args.horarios, inicio)
+
+    print(f"Roster: {args.horarios} horarios • horizonte: {args.dias} días • NumPy: {'sí' if np is not None else 'no'}")
+
+    resultados = []
+
+    if np is not None:
+        calendario = CalendarioRaids(roster, usar_numpy=True)
+        segundos, (indices, _) = cronometrar(lambda: calendario.generar(inicio, fin))
+        resultados.append(("generar (NumPy)", segundos, len(indices)))
+        segundos, spawns = cronometrar(lambda: calendario.spawns(inicio, fin))
+        resultados.append(("spawns (NumPy + dicts)", segundos, len(spawns)))
+
+    calendario = CalendarioRaids(roster, usar_numpy=False)
+    segundos, (indices, _) = cronometrar(lambda: calendario.generar(inicio, fin))
+    resultados.append(("generar (Python)", segundos, len(indices)))
+    segundos, spawns = cronometrar(lambda: calendario.spawns(inicio, fin))
+    resultados.append(("spawns (Python + dicts)", segundos, len(spawns)))
+    total = len(spawns)
+
+    segundos, primeros = cronometrar(lambda: list(itertools.islice(calendario.iterar(inicio), 100)))
+    resultados.append(("iterar: primeros 100", segundos, len(primeros)))
+    segundos, todos = cronometrar(lambda: sum(1 for _ in calendario.iterar(inicio, fin)))
+    resultados.append(("iterar: horizonte completo", segundos, todos))
+
+    # Encadenar obtener_proximo_spawn (avanza día a día desde fecha_inicio en cada llamada)
+    def encadenar(muestra):
+        cuenta = 0
+        for digimon in muestra:
+            momento = inicio - datetime.timedelta(seconds=1)
+            while True:
+                momento = obtener_proximo_spawn(digimon, momento)
+                if momento is None or momento >= fin:
+                    break
+                cuenta += 1
+        return cuenta
+
+    muestra = roster[:args.muestra]
+    segundos, _ = cronometrar(lambda: encadenar(muestra))
+    resultados.append((f"obtener_proximo_spawn (extrapolado de {len(muestra)})",
+                       segundos * args.horarios / len(muestra), total))
+
+    referencia = resultados[0][1]
+    print(f"{'estrategia':<42} {'ms':>10} {'ocurrencias':>12} {'relativo':>9}")
+    for nombre, segundos, cuenta in resultados:
+        print(f"{nombre:<42} {segundos * 1000:>10.1f} {cuenta:>12} {segundos / referencia:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
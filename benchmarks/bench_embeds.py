@@ -0,0 +1,63 @@
+"""
+Benchmark del renderizado de embeds de alerta
+
+Compara el coste de crear_embed_dsrworld sin plantilla (cache vaciado en cada
+llamada) frente al uso de plantillas cacheadas, por alerta y por servidor
+(serialización a dict que discord.py hace en cada envío).
+
+Uso:
+    python benchmarks/bench_embeds.py [--iteraciones N] [--servidores N]
+"""
+import os
+import sys
+import time
+import argparse
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.default_data import DEFAULT_DIGIMONS
+from utils import crear_embed_dsrworld, invalidar_plantillas_embed, obtener_tiempo_kst
+
+def medir(funcion, iteraciones: int) -> float:
+    """Devuelve el tiempo medio por llamada en microsegundos"""
+    inicio = time.perf_counter()
+    for i in range(iteraciones):
+        funcion(i)
+    return (time.perf_counter() - inicio) / iteraciones * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de renderizado de embeds")
+    parser.add_argument("--iteraciones", type=int, default=20000)
+    parser.add_argument("--servidores", type=int, default=1000)
+    args = parser.parse_args()
+
+    digimons = DEFAULT_DIGIMONS
+    spawn_time = obtener_tiempo_kst() + datetime.timedelta(minutes=20)
+    tiempo_restante = datetime.timedelta(minutes=20)
+
+    def sin_plantilla(i):
+        invalidar_plantillas_embed()
+        crear_embed_dsrworld(digimons[i % len(digimons)], tiempo_restante, "warning", spawn_time)
+
+    def con_plantilla(i):
+        crear_embed_dsrworld(digimons[i % len(digimons)], tiempo_restante, "warning", spawn_time)
+
+    frio = medir(sin_plantilla, args.iteraciones)
+    invalidar_plantillas_embed()
+    caliente = medir(con_plantilla, args.iteraciones)
+
+    # Coste por servidor: el embed se construye una vez por alerta y se serializa en cada envío
+    embed = crear_embed_dsrworld(digimons[0], tiempo_restante, "warning", spawn_time)
+    inicio = time.perf_counter()
+    for _ in range(args.servidores):
+        embed.to_dict()
+    por_servidor = (time.perf_counter() - inicio) / args.servidores * 1e6
+
+    print(f"Render por alerta sin plantilla: {frio:8.2f} µs")
+    print(f"Render por alerta con plantilla: {caliente:8.2f} µs ({frio / caliente:.1f}x)")
+    print(f"Serialización por servidor:      {por_servidor:8.2f} µs")
+    print(f"Fan-out a {args.servidores} servidores: {(caliente + por_servidor * args.servidores) / 1000:.2f} ms por alerta")
+
+if __name__ == "__main__":
+    main()
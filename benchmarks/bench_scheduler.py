@@ -0,0 +1,115 @@
+"""
+Benchmark del camino de disparo de alertas
+
+Compara el coste por tick (un minuto) del planificador con rueda de
+temporización frente al recorrido completo del roster que hacía check_raids
+(un obtener_proximo_spawn por horario y offset en cada minuto), para rosters
+sintéticos de distintos tamaños y número de avisos por horario.
+
+Con la rueda, el coste por tick depende de las alertas que vencen en ese
+minuto, no de horarios × offsets.
+
+Uso:
+    python benchmarks/bench_scheduler.py [--horarios 100,1000,10000] [--offsets 1,3,6] [--dias N]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.default_data import KST
+from data.guild_settings import GuildSettingsManager
+from scheduler import RaidScheduler
+from utils import obtener_proximo_spawn
+
+AVISOS = [1440, 720, 360, 60, 30, 10, 5]
+
+class RosterSintetico:
+    """Sustituto mínimo de DigimonManager con un roster generado"""
+
+    def __init__(self, horarios: int, avisos: int, inicio: datetime.datetime):
+        rng = random.Random(horarios)
+        self.version = 1
+        self.digimons = []
+        # Un horario por Digimon para que el número de temporizadores sea exacto
+        for i in range(horarios):
+            self.digimons.append({
+                "nombre": f"Digimon{i}",
+                "tipo": "Vacuna",
+                "mapa": "Mapa",
+                "recompensa": "Recompensa",
+                "horarios": [{"hora": rng.randrange(24), "minuto": rng.randrange(60)}],
+                "recurrencia_dias": rng.choice((1, 1, 2, 6)),
+                "avisos_minutos": AVISOS[:avisos],
+                "fecha_inicio": inicio - datetime.timedelta(days=1)
+            })
+
+    def get_all_digimon(self):
+        return self.digimons
+
+def medir_rueda(roster, settings, inicio: datetime.datetime, ticks: int):
+    """Devuelve (segundos de construcción, temporizadores, segundos por tick, alertas disparadas)"""
+    t0 = time.perf_counter()
+    scheduler = RaidScheduler(roster, settings, inicio)
+    construccion = time.perf_counter() - t0
+    temporizadores = len(scheduler.wheel)
+
+    disparadas = 0
+    t0 = time.perf_counter()
+    for minuto in range(1, ticks + 1):
+        disparadas += len(scheduler.advance(inicio + datetime.timedelta(minutes=minuto)))
+    por_tick = (time.perf_counter() - t0) / ticks
+    return construccion, temporizadores, por_tick, disparadas
+
+def medir_recorrido(roster, settings, inicio: datetime.datetime, ticks: int) -> float:
+    """Coste por tick de recorrer todos los horarios y offsets (comportamiento anterior)"""
+    offsets = settings.all_offsets()
+    vencidas = 0
+    t0 = time.perf_counter()
+    for minuto in range(1, ticks + 1):
+        ahora = inicio + datetime.timedelta(minutes=minuto)
+        referencia = ahora - datetime.timedelta(seconds=1)
+        for digimon in roster.digimons:
+            for horario in digimon["horarios"]:
+                temp_digimon = digimon.copy()
+                temp_digimon["horarios"] = [horario]
+                for offset in offsets.union(digimon["avisos_minutos"]):
+                    spawn = obtener_proximo_spawn(temp_digimon, referencia + datetime.timedelta(minutes=offset))
+                    vencidas += spawn - datetime.timedelta(minutes=offset) == ahora
+    return (time.perf_counter() - t0) / ticks
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del planificador de alertas")
+    parser.add_argument("--horarios", default="100,1000,10000")
+    parser.add_argument("--offsets", default="1,3,6", help="Avisos propios de cada horario")
+    parser.add_argument("--dias", type=int, default=1, help="Días simulados por la rueda")
+    parser.add_argument("--ticks-recorrido", type=int, default=3, help="Ticks medidos con el recorrido completo")
+    args = parser.parse_args()
+
+    inicio = KST.localize(datetime.datetime(2025, 9, 1, 0, 0))
+    ticks = args.dias * 24 * 60
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Offsets por defecto de los servidores (aviso de 20 min y spawn) más los de cada horario
+        settings = GuildSettingsManager(os.path.join(tmp, "guild_settings.json"))
+
+        print(f"{'horarios':>9} {'offsets':>7} {'temporiz.':>10} {'build ms':>9} "
+              f"{'rueda µs/tick':>14} {'µs/alerta':>10} {'recorrido µs/tick':>18}")
+
+        for horarios in (int(valor) for valor in args.horarios.split(",")):
+            for avisos in (int(valor) for valor in args.offsets.split(",")):
+                roster = RosterSintetico(horarios, avisos, inicio)
+                construccion, temporizadores, por_tick, disparadas = medir_rueda(roster, settings, inicio, ticks)
+                recorrido = medir_recorrido(roster, settings, inicio, args.ticks_recorrido)
+
+                print(f"{horarios:>9} {temporizadores // horarios:>7} {temporizadores:>10} {construccion * 1000:>9.1f} "
+                      f"{por_tick * 1e6:>14.1f} {por_tick * ticks / max(disparadas, 1) * 1e6:>10.2f} "
+                      f"{recorrido * 1e6:>18.0f}")
+
+if __name__ == "__main__":
+    main()
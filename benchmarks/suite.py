@@ -0,0 +1,290 @@
+"""
+Suite de benchmarks de los caminos calientes con seguimiento de regresiones
+
+Mide, para rosters sintéticos de 10 a 100k horarios:
+  - obtener_proximo_spawn (todo el roster)
+  - obtener_todos_los_proximos_spawns
+  - crear_embed_dsrworld (plantillas en frío y en caliente)
+  - crear_dropdown_digimons
+  - DigimonManager.load_data, save_data y find_digimon
+  - send_to_raid_channels con un fan-out simulado (un servidor falso por horario)
+
+Cada caso se repite hasta agotar un presupuesto de tiempo y se guarda el
+mejor tiempo y la mediana en JSON. Con --baseline se compara contra una
+ejecución anterior guardada con --guardar-baseline en la misma máquina; si
+algún caso empeora más que --umbral el proceso sale con código 1.
+
+Uso:
+    python benchmarks/suite.py [--tamanos 10,100,1000,10000,100000] [--casos proximo_spawn,fanout]
+                               [--salida resultados.json] [--baseline benchmarks/baseline.json]
+                               [--guardar-baseline] [--umbral 0.2]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import datetime
+import platform
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+
+from data.default_data import KST
+from data.digimon_manager import DigimonManager
+from data.alert_ledger import AlertLedger
+from utils import (
+    obtener_proximo_spawn,
+    obtener_todos_los_proximos_spawns,
+    crear_embed_dsrworld,
+    crear_dropdown_digimons,
+    invalidar_plantillas_embed
+)
+from tasks import send_to_raid_channels
+
+BASELINE_POR_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TIPOS = ("Vacuna", "Data", "Virus", "Libre")
+CASOS = ("proximo_spawn", "todos_los_proximos_spawns", "dropdown", "embed_frio", "embed_caliente",
+         "manager_load", "manager_save", "find_digimon", "fanout")
+PERMISOS = discord.Permissions(send_messages=True, embed_links=True)
+
+def crear_roster(horarios: int, inicio: datetime.datetime):
+    """Roster sintético: un Digimon cada 1-3 horarios y recurrencias de 1 a 13 días"""
+    rng = random.Random(horarios)
+    roster, creados = [], 0
+    while creados < horarios:
+        cantidad = min(rng.randint(1, 3), horarios - creados)
+        tipo = rng.choice(TIPOS)
+        roster.append({
+            "nombre": f"Digimon{len(roster)}",
+            "tipo": tipo,
+            "mapa": f"Mapa {rng.randrange(20)}",
+            "recompensa": f"Recompensa {rng.randrange(10)}",
+            "horarios": [{"hora": rng.randrange(24), "minuto": rng.randrange(60)} for _ in range(cantidad)],
+            "recurrencia_dias": rng.choice((1, 1, 1, 2, 5, 6, 12, 13)),
+            "fecha_inicio": inicio - datetime.timedelta(days=rng.randrange(0, 30)),
+            "imagen": "https://dsrworldwiki.com/assets-opt/digimons/ejemplo.avif",
+            "color": rng.randrange(0xFFFFFF)
+        })
+        creados += cantidad
+    return roster
+
+def medir(funcion, preparar=None, presupuesto: float = 1.0, minimo: int = 3, maximo: int = 50):
+    """
+    Ejecuta `funcion(preparado)` varias veces (la preparación no se cronometra)
+
+    Returns:
+        {"best": s, "median": s, "runs": n}
+    """
+    tiempos = []
+    limite = time.perf_counter() + presupuesto
+    while len(tiempos) < minimo or (time.perf_counter() < limite and len(tiempos) < maximo):
+        preparado = preparar() if preparar else None
+        inicio = time.perf_counter()
+        funcion(preparado)
+        tiempos.append(time.perf_counter() - inicio)
+    return {"best": min(tiempos), "median": statistics.median(tiempos), "runs": len(tiempos)}
+
+class CanalBench:
+    def __init__(self, canal_id: int):
+        self.id = canal_id
+        self.name = "dsr-raids"
+
+    def permissions_for(self, miembro):
+        return PERMISOS
+
+    async def send(self, content=None, embed=None):
+        # discord.py serializa el embed en cada envío
+        if embed is not None:
+            embed.to_dict()
+        return discord.Object(self.id)
+
+class ServidorBench:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.name = f"Servidor {guild_id}"
+        self.me = None
+        self.canal = CanalBench(guild_id + 1)
+        self.text_channels = [self.canal]
+
+    def get_channel(self, canal_id: int):
+        return self.canal if canal_id == self.canal.id else None
+
+class BotBench:
+    """Bot con servidores y canales falsos para medir el fan-out sin red"""
+
+    def __init__(self, servidores: int, ledger_file: str):
+        self.guilds = [ServidorBench(2 * i + 2) for i in range(servidores)]
+        self._por_id = {guild.id: guild for guild in self.guilds}
+        self.raid_channels = {guild.id: guild.canal.id for guild in self.guilds}
+        self.alert_ledger = AlertLedger(ledger_file)
+
+    def get_guild(self, guild_id: int):
+        return self._por_id.get(guild_id)
+
+def casos_para(tamano: int, directorio: str, loop: asyncio.AbstractEventLoop, presupuesto: float, casos=None):
+    """
+    Genera (nombre, resultado) de los casos pedidos para un tamaño de roster
+
+    Con `casos` solo se prepara y mide lo que está en el conjunto (None = todos).
+    """
+    def quiere(*nombres):
+        return casos is None or any(nombre in casos for nombre in nombres)
+
+    ahora = datetime.datetime.now(KST).replace(second=0, microsecond=0)
+    roster = crear_roster(tamano, ahora)
+    restante = datetime.timedelta(minutes=20)
+
+    if quiere("todos_los_proximos_spawns", "dropdown", "manager_load", "manager_save", "find_digimon"):
+        manager = DigimonManager(os.path.join(directorio, f"digimon_data_{tamano}.json"))
+        manager.digimons = roster
+        manager.save_data()
+
+    if quiere("proximo_spawn"):
+        yield "proximo_spawn", medir(lambda _: [obtener_proximo_spawn(d, ahora) for d in roster], presupuesto=presupuesto)
+
+    if quiere("todos_los_proximos_spawns"):
+        yield "todos_los_proximos_spawns", medir(lambda _: obtener_todos_los_proximos_spawns(manager), presupuesto=presupuesto)
+
+    if quiere("dropdown"):
+        spawns_info = obtener_todos_los_proximos_spawns(manager)
+        yield "dropdown", medir(lambda _: crear_dropdown_digimons(spawns_info), presupuesto=presupuesto)
+
+    # Embeds de hasta 1000 Digimon distintos: sin plantillas y con ellas ya cacheadas
+    muestra = roster[:1000]
+    def renderizar(_):
+        for digimon in muestra:
+            crear_embed_dsrworld(digimon, restante, "warning", ahora + restante)
+    if quiere("embed_frio"):
+        yield "embed_frio", medir(renderizar, preparar=invalidar_plantillas_embed, presupuesto=presupuesto)
+    if quiere("embed_caliente"):
+        renderizar(None)
+        yield "embed_caliente", medir(renderizar, presupuesto=presupuesto)
+
+    if quiere("manager_load"):
+        yield "manager_load", medir(lambda _: manager.load_data(), presupuesto=presupuesto)
+    if quiere("manager_save"):
+        yield "manager_save", medir(lambda _: manager.save_data(), presupuesto=presupuesto)
+
+    # Búsquedas exactas repartidas por el roster más un nombre parcial y uno inexistente
+    if quiere("find_digimon"):
+        rng = random.Random(tamano)
+        nombres = [rng.choice(roster)["nombre"] for _ in range(98)] + [roster[-1]["nombre"][:-1] + "?", "NoExiste"]
+        yield "find_digimon", medir(lambda _: [manager.find_digimon(nombre) for nombre in nombres], presupuesto=presupuesto)
+
+    # Fan-out de una alerta a un servidor por horario; cada repetición es una ocurrencia nueva
+    if quiere("fanout"):
+        bot = BotBench(tamano, os.path.join(directorio, f"alert_ledger_{tamano}.json"))
+        digimon = roster[0]
+        embed = crear_embed_dsrworld(digimon, restante, "warning", ahora + restante)
+        ocurrencias = iter(range(10 ** 6))
+        def preparar_fanout():
+            bot.alert_ledger.entries.clear()
+            ocurrencia = ahora + datetime.timedelta(days=next(ocurrencias))
+            return {"digimon": digimon["nombre"], "horario": digimon["horarios"][0], "occurrence": ocurrencia, "tipo": "spawn"}
+        yield "fanout", medir(
+            lambda alert: loop.run_until_complete(send_to_raid_channels(bot, embed, "@everyone", alert)),
+            preparar=preparar_fanout, presupuesto=presupuesto
+        )
+
+def comparar(resultados, baseline, umbral: float, ruido_s: float = 20e-6):
+    """Devuelve las regresiones [(caso, actual, referencia, ratio)] frente a la baseline"""
+    regresiones = []
+    for caso, medida in resultados.items():
+        referencia = baseline.get(caso)
+        if referencia is None:
+            continue
+        actual, anterior = medida["best"], referencia["best"]
+        # Las diferencias de pocos microsegundos son ruido del sistema, no regresiones
+        if actual > anterior * (1 + umbral) and actual - anterior > ruido_s:
+            regresiones.append((caso, actual, anterior, actual / anterior))
+    return regresiones
+
+def formato_tiempo(segundos: float) -> str:
+    if segundos < 1e-3:
+        return f"{segundos * 1e6:.1f} µs"
+    if segundos < 1:
+        return f"{segundos * 1e3:.2f} ms"
+    return f"{segundos:.2f} s"
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks con detección de regresiones")
+    parser.add_argument("--tamanos", default="10,100,1000,10000,100000", help="Horarios del roster sintético")
+    parser.add_argument("--casos", default=None, help="Solo estos casos (separados por comas)")
+    parser.add_argument("--presupuesto", type=float, default=1.0, help="Segundos por caso y tamaño")
+    parser.add_argument("--salida", default=None, help="Guardar los resultados en este JSON")
+    parser.add_argument("--baseline", default=BASELINE_POR_DEFECTO, help="JSON de referencia para detectar regresiones")
+    parser.add_argument("--guardar-baseline", action="store_true", help="Guardar esta ejecución como referencia")
+    parser.add_argument("--umbral", type=float, default=0.20, help="Empeoramiento tolerado (0.20 = 20%%)")
+    args = parser.parse_args()
+
+    # Los managers registran cada carga y guardado; aquí solo añadirían ruido
+    logging.basicConfig(level=logging.WARNING)
+    casos = set(args.casos.split(",")) if args.casos else None
+    if casos:
+        desconocidos = casos - set(CASOS)
+        if desconocidos:
+            parser.error(f"casos desconocidos: {', '.join(sorted(desconocidos))} (disponibles: {', '.join(CASOS)})")
+    tamanos = [int(valor) for valor in args.tamanos.split(",")]
+    loop = asyncio.new_event_loop()
+
+    resultados = {}
+    print(f"{'caso':<28} {'horarios':>9} {'mejor':>12} {'mediana':>12} {'reps':>5}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for tamano in tamanos:
+            for caso, medida in casos_para(tamano, directorio, loop, args.presupuesto, casos):
+                clave = f"{caso}[{tamano}]"
+                resultados[clave] = medida
+                print(f"{caso:<28} {tamano:>9} {formato_tiempo(medida['best']):>12} "
+                      f"{formato_tiempo(medida['median']):>12} {medida['runs']:>5}")
+    loop.close()
+
+    informe = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds")
+        },
+        "results": resultados
+    }
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2)
+        print(f"\n💾 Resultados guardados en {args.salida}")
+
+    if args.guardar_baseline:
+        anterior = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                anterior = json.load(f).get("results", {})
+        # Se conservan los casos que esta ejecución no ha medido
+        informe["results"] = {**anterior, **resultados}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2)
+        print(f"📌 Baseline actualizada en {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ️ Sin baseline en {args.baseline}; guarda una con --guardar-baseline")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regresiones = comparar(resultados, baseline.get("results", {}), args.umbral)
+    if not regresiones:
+        print(f"\n✅ Sin regresiones frente a la baseline del {baseline['meta']['date']} (umbral {args.umbral:.0%})")
+        return
+
+    print(f"\n❌ {len(regresiones)} regresión(es) por encima del {args.umbral:.0%}:")
+    for caso, actual, anterior, ratio in sorted(regresiones, key=lambda r: -r[3]):
+        print(f"   {caso:<36} {formato_tiempo(anterior):>12} -> {formato_tiempo(actual):>12} (x{ratio:.2f})")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import datetime
+from typing import Dict, Any, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+async def payload_arbol(tree: discord.app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None):
+    """El mismo payload que `tree.sync(guild=...)` enviaría a Discord"""
+    comandos = tree.get_commands(guild=guild)
+    if tree.translator:
+        return [await comando.get_translated_payload(tree, tree.translator) for comando in comandos]
+    return [comando.to_dict(tree) for comando in comandos]
+
+def hash_payload(payload) -> str:
+    """Hash estable del payload: el orden de registro de los comandos no cuenta"""
+    ordenado = sorted(payload, key=lambda comando: (comando.get("type", 1), comando["name"]))
+    texto = json.dumps(ordenado, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+class SincronizadorComandos:
+    """
+    Sincroniza el árbol de slash commands solo cuando cambia
+
+    `tree.sync()` es una llamada lenta y con un rate limit muy estricto; hacerla
+    en cada arranque retrasa el bot y, en un bucle de reinicios, puede acabar
+    en throttling. Se guarda el hash del último payload sincronizado por
+    aplicación y ámbito (global o servidor) y se omite la llamada si no ha
+    cambiado. `forzar` (--force-sync) sincroniza siempre.
+    """
+
+    def __init__(self, state_file: str = "data/command_sync.json", forzar: bool = False):
+        self.state_file = state_file
+        self.forzar = forzar
+        self.ultimo_resultado: Optional[str] = None
+
+    def _leer(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _escribir(self, estado: Dict[str, Any]):
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    async def sincronizar(self, tree: discord.app_commands.CommandTree,
+                          guild: Optional[discord.abc.Snowflake] = None) -> bool:
+        """
+        Sincroniza el árbol si su payload cambió desde la última vez
+
+        Returns:
+            True si se llamó a Discord, False si se omitió
+
+        Raises:
+            Las excepciones de `tree.sync()`; en ese caso no se guarda el hash
+            y el siguiente arranque lo volverá a intentar
+        """
+        ambito = f"{tree.client.application_id}:{guild.id if guild else 'global'}"
+        payload = await payload_arbol(tree, guild)
+        huella = hash_payload(payload)
+        estado = self._leer()
+        anterior = estado.get(ambito, {})
+
+        if not self.forzar and anterior.get("hash") == huella:
+            self.ultimo_resultado = "skipped"
+            ahorro = anterior.get("sync_seconds")
+            detalle = f", ~{ahorro:.2f}s ahorrados" if ahorro is not None else ""
+            logger.info(f"⏭️ Árbol de comandos sin cambios ({len(payload)} comandos, {huella[:12]}): sync omitido{detalle}")
+            return False
+
+        motivo = "forzado con --force-sync" if self.forzar else ("primer sync" if not anterior else "el árbol cambió")
+        inicio = time.perf_counter()
+        await tree.sync(guild=guild)
+        duracion = time.perf_counter() - inicio
+
+        estado[ambito] = {
+            "hash": huella,
+            "commands": len(payload),
+            "sync_seconds": round(duracion, 3),
+            "synced_at": datetime.datetime.now().isoformat(timespec="seconds")
+        }
+        try:
+            self._escribir(estado)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo guardar el hash del árbol de comandos: {e}")
+        self.ultimo_resultado = "synced"
+        logger.info(f"🔄 Árbol de comandos sincronizado en {duracion:.2f}s ({motivo}, {len(payload)} comandos)")
+        return True
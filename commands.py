@@ -2,83 +2,90 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from typing import Optional, List, Dict, Any
+import io
 import logging
+import datetime
 from utils import (
     obtener_todos_los_proximos_spawns, 
     obtener_tiempo_kst, 
     crear_embed_dsrworld, 
     buscar_digimon,
     obtener_estadisticas_raids,
-    crear_dropdown_digimons
+    crear_dropdown_digimons,
+    formato_fecha_spawn,
+    buscar_spawn_por_clave,
+    crear_embed_detalle_spawn,
+    crear_embeds_calendario
 )
-from data.default_data import EMBED_COLORS
+from data.default_data import EMBED_COLORS, ICS_SETTINGS, PROFILE_SETTINGS
+from roster_browser import render_roster, registrar_navegador_roster
+from raid_calendar import obtener_calendario
+from ical_export import obtener_ics
+from profiler import CapturaEnCurso
 
 logger = logging.getLogger(__name__)
 
+# custom_id estables de /raids: la vista persistente los atiende en cualquier mensaje
+RAIDS_SELECT_CUSTOM_ID = "dsr:raids:select"
+ROSTER_OPEN_CUSTOM_ID = "dsr:roster:open"
+
 class RaidDropdownView(discord.ui.View):
-    """Vista con dropdown para selección de Digimon"""
+    """
+    Vista persistente con dropdown para selección de Digimon
+    
+    Se registra una sola vez al arrancar con timeout=None y un custom_id estable.
+    La selección se resuelve contra el horario compartido en el momento de la
+    interacción, así que la vista no guarda estado por mensaje y los menús
+    siguen funcionando tras un reinicio.
+    """
     
-    def __init__(self, spawns_info):
-        super().__init__(timeout=300)  # 5 minutos de timeout
-        self.spawns_info = spawns_info
+    def __init__(self, spawns_info: Optional[List[Dict[str, Any]]] = None):
+        super().__init__(timeout=None)
         
-        # Crear dropdown con los Digimon
-        select = crear_dropdown_digimons(spawns_info)
+        # Crear dropdown con los Digimon (vacío para la vista registrada al arrancar)
+        if spawns_info:
+            select = crear_dropdown_digimons(spawns_info, custom_id=RAIDS_SELECT_CUSTOM_ID)
+        else:
+            select = discord.ui.Select(custom_id=RAIDS_SELECT_CUSTOM_ID, options=[])
         select.callback = self.dropdown_callback
         self.add_item(select)
+        
+        # El menú solo muestra los 25 próximos spawns; el roster completo va paginado
+        roster_button = discord.ui.Button(
+            label="Ver roster completo",
+            emoji="📚",
+            style=discord.ButtonStyle.secondary,
+            custom_id=ROSTER_OPEN_CUSTOM_ID
+        )
+        roster_button.callback = self.roster_callback
+        self.add_item(roster_button)
+    
+    @classmethod
+    def para_mensaje(cls, spawns_info: List[Dict[str, Any]]) -> "RaidDropdownView":
+        """
+        Crea la vista que se adjunta a un mensaje de /raids
+        
+        Se marca como terminada para que discord.py no la guarde por mensaje: las
+        interacciones las atiende la vista persistente registrada en setup_commands.
+        """
+        view = cls(spawns_info)
+        view.stop()
+        return view
     
     async def dropdown_callback(self, interaction: discord.Interaction):
         """Callback cuando se selecciona un Digimon del dropdown"""
         try:
             selected_key = interaction.data['values'][0]
             
-            # Buscar el spawn seleccionado
-            selected_spawn = None
-            for spawn_info in self.spawns_info:
-                if spawn_info['digimon_key'] == selected_key:
-                    selected_spawn = spawn_info
-                    break
+            # Resolver el spawn seleccionado contra el horario actual
+            selected_spawn = buscar_spawn_por_clave(selected_key, interaction.client.digimon_manager)
             
             if not selected_spawn:
                 await interaction.response.send_message("❌ Error: No se encontró el Digimon seleccionado.", ephemeral=True)
                 return
             
-            digimon = selected_spawn['digimon']
-            tiempo_restante = selected_spawn['tiempo_restante']
-            horario = selected_spawn['horario']
-            
             # Crear embed detallado
-            embed = crear_embed_dsrworld(digimon, tiempo_restante, "info")
-            
-            # Agregar información adicional
-            embed.add_field(
-                name="⏰ Horario específico",
-                value=f"{horario['hora']:02d}:{horario['minuto']:02d} KST",
-                inline=True
-            )
-            
-            embed.add_field(
-                name="🔄 Recurrencia",
-                value=f"Cada {digimon['recurrencia_dias']} día{'s' if digimon['recurrencia_dias'] > 1 else ''}",
-                inline=True
-            )
-            
-            embed.add_field(
-                name="📅 Próximo Spawn",
-                value=selected_spawn['spawn_time'].strftime("%Y-%m-%d %H:%M KST"),
-                inline=True
-            )
-            
-            # Mostrar todos los horarios si hay múltiples
-            if len(digimon['horarios']) > 1:
-                horarios_text = " • ".join([
-                    f"{h['hora']:02d}:{h['minuto']:02d}" for h in digimon['horarios']
-                ])
-                embed.add_field(
-                    name="⏲️ Todos los horarios",
-                    value=f"{horarios_text} (KST)",
-                    inline=False
-                )
+            embed = crear_embed_detalle_spawn(selected_spawn)
             
             await interaction.response.send_message(embed=embed, ephemeral=True)
             
@@ -86,68 +93,243 @@ class RaidDropdownView(discord.ui.View):
             logger.error(f"Error in dropdown callback: {e}")
             await interaction.response.send_message("❌ Error procesando la selección.", ephemeral=True)
     
-    async def on_timeout(self):
-        """Llamado cuando la vista expira"""
-        for item in self.children:
-            item.disabled = True
+    async def roster_callback(self, interaction: discord.Interaction):
+        """Abre el navegador paginado del roster"""
+        try:
+            await interaction.response.send_message(**render_roster(interaction.client), ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error opening roster browser: {e}")
+            await responder_error(interaction, "❌ Error abriendo el roster.")
+
+async def responder_error(interaction: discord.Interaction, mensaje: str):
+    """Envía un mensaje de error efímero tanto si la interacción ya fue respondida como si no"""
+    if interaction.response.is_done():
+        await interaction.followup.send(mensaje, ephemeral=True)
+    else:
+        await interaction.response.send_message(mensaje, ephemeral=True)
+
+def construir_payload_raids(bot) -> Dict[str, Any]:
+    """
+    Construye la respuesta de /raids (embed + menú desplegable)
+    
+    Se guarda en bot.payload_cache y se reutiliza durante todo el minuto.
+    """
+    spawns_info = obtener_todos_los_proximos_spawns(bot.digimon_manager)
+    
+    if not spawns_info:
+        embed = discord.Embed(
+            title="📊 Raids Digimon",
+            description="❌ No hay información de raids disponible en este momento.",
+            color=EMBED_COLORS["error"]
+        )
+        return {'embed': embed, 'view': None}
+    
+    # Crear embed principal
+    embed = discord.Embed(
+        title="☢️ Próximos Raids Digimon",
+        description=(
+            "**Sistema de raids DSR - Formato dsrworldwiki.com**\n"
+            f"🕐 **Hora actual KST:** {obtener_tiempo_kst().strftime('%Y-%m-%d %H:%M')}\n\n"
+            "**Próximos 6 raids:**\n"
+        ),
+        color=0x00FFFF,
+        timestamp=obtener_tiempo_kst()
+    )
+    
+    # Mostrar próximos 6 raids en el embed
+    for i, spawn_info in enumerate(spawns_info[:6]):
+        digimon = spawn_info['digimon']
+        horario = spawn_info['horario']
+        tiempo_formato = spawn_info['formato_tiempo']
+        
+        embed.add_field(
+            name=f"{i+1}. {digimon['nombre']} ({horario['hora']:02d}:{horario['minuto']:02d})",
+            value=(
+                f"**Tipo:** {digimon['tipo_icon']} {digimon['tipo']}\n"
+                f"**Respawn:** {tiempo_formato}"
+            ),
+            inline=True
+        )
+    
+    embed.set_footer(text="Usa el menú desplegable para información detallada • DSR Spain")
+    
+    # Vista con dropdown compartida por todas las respuestas del minuto
+    view = RaidDropdownView.para_mensaje(spawns_info)
+    
+    return {'embed': embed, 'view': view}
+
+def construir_payload_status(bot) -> Dict[str, Any]:
+    """
+    Construye la respuesta de /status
+    
+    Se guarda en bot.payload_cache y se reutiliza durante todo el minuto.
+    """
+    # Obtener estadísticas
+    stats = obtener_estadisticas_raids(bot.digimon_manager)
+    spawns_info = obtener_todos_los_proximos_spawns(bot.digimon_manager)
+    
+    embed = discord.Embed(
+        title="📊 Estado del Sistema DSR",
+        color=EMBED_COLORS["info"],
+        timestamp=obtener_tiempo_kst()
+    )
+    
+    # Información del bot
+    embed.add_field(
+        name="🤖 Bot Status",
+        value=(
+            f"**Conectado:** ✅ Sí\n"
+            f"**Servidores:** {len(bot.guilds)}\n"
+            f"**Latencia:** {round(bot.latency * 1000)}ms"
+        ),
+        inline=True
+    )
+    
+    # Información de raids
+    embed.add_field(
+        name="⚔️ Raids Monitoreados",
+        value=(
+            f"**Total Digimons:** {stats['total_digimons']}\n"
+            f"**Próximos spawns:** {len(spawns_info)}\n"
+            f"**Tipos:** {len(stats['types'])}"
+        ),
+        inline=True
+    )
+    
+    # Alta disponibilidad
+    ha_stats = bot.alert_lease.get_statistics()
+    failover_text = (
+        f"{ha_stats['last_failover_seconds']:.1f}s"
+        if ha_stats['last_failover_seconds'] is not None else "N/A"
+    )
+    embed.add_field(
+        name="🔐 Alta Disponibilidad",
+        value=(
+            f"**Rol:** {'👑 Líder' if ha_stats['role'] == 'leader' else '💤 Standby'}\n"
+            f"**Instancia:** {ha_stats['instance_id']}\n"
+            f"**Failovers:** {ha_stats['takeovers']} (último: {failover_text})\n"
+            f"**Posibles dobles envíos:** {ha_stats['double_send_suspected']}\n"
+            f"**Minutos duplicados omitidos:** {ha_stats['duplicate_ticks_skipped']}"
+        ),
+        inline=True
+    )
+    
+    # Planificador de alertas
+    if bot.raid_scheduler is not None:
+        scheduler_stats = bot.raid_scheduler.get_statistics()
+        embed.add_field(
+            name="🗓️ Planificador",
+            value=(
+                f"**Temporizadores:** {scheduler_stats['scheduled']}\n"
+                f"**Offsets:** {', '.join(str(offset) for offset in scheduler_stats['offsets'])} min\n"
+                f"**Alertas disparadas:** {scheduler_stats['fired']}\n"
+                f"**Servidores personalizados:** {len(bot.guild_settings.guilds)}"
+            ),
+            inline=True
+        )
+    
+    # Suscripciones por DM
+    sub_stats = bot.subscriptions.get_statistics()
+    dm_stats = bot.dm_pipeline.get_statistics()
+    latencia_text = (
+        f"{dm_stats['latency_p50']:.1f}s / {dm_stats['latency_p95']:.1f}s"
+        if dm_stats['latency_p50'] is not None else "N/A"
+    )
+    embed.add_field(
+        name="📬 DMs",
+        value=(
+            f"**Suscriptores:** {sub_stats['users']} ({sub_stats['paused_users']} en pausa)\n"
+            f"**Entregados:** {dm_stats['delivered']} • **En cola:** {dm_stats['queued']}\n"
+            f"**Fallidos:** {dm_stats['failed']} • **Reintentos:** {dm_stats['retried']}\n"
+            f"**Latencia p50/p95:** {latencia_text}"
+        ),
+        inline=True
+    )
+    
+    # Salud del event loop
+    loop_stats = bot.loop_monitor.get_statistics()
+    if loop_stats['lag_p50'] is not None:
+        lento = loop_stats['last_slow']
+        lento_text = (
+            f"{lento['duration'] * 1000:.0f} ms en `{lento['origin']}` (hace {int(lento['age_seconds'] // 60)} min)"
+            if lento else "ninguno"
+        )
+        embed.add_field(
+            name="🩺 Event Loop",
+            value=(
+                f"**Lag p50/p95:** {loop_stats['lag_p50'] * 1000:.1f} / {loop_stats['lag_p95'] * 1000:.1f} ms\n"
+                f"**Lag máximo:** {loop_stats['lag_max'] * 1000:.0f} ms\n"
+                f"**Bloqueos lentos:** {loop_stats['slow_callbacks']}\n"
+                f"**Último:** {lento_text}"
+            ),
+            inline=True
+        )
+    
+    # Configuración de canales
+    embed.add_field(
+        name="📺 Canales Configurados",
+        value=f"**Total:** {len(bot.raid_channels)}\n" +
+              "\n".join([f"• {bot.get_guild(guild_id).name if bot.get_guild(guild_id) else 'Unknown'}"
+                        for guild_id in list(bot.raid_channels.keys())[:3]]) +
+              (f"\n... y {len(bot.raid_channels) - 3} más" if len(bot.raid_channels) > 3 else ""),
+        inline=False
+    )
+    
+    # Próximos raids
+    if spawns_info:
+        proximos_text = "\n".join([
+            f"• **{spawn['digimon']['nombre']}** ({spawn['horario']['hora']:02d}:{spawn['horario']['minuto']:02d}): {spawn['formato_tiempo']}"
+            for spawn in spawns_info[:5]
+        ])
+        embed.add_field(
+            name="⏰ Próximos 5 Raids",
+            value=proximos_text,
+            inline=False
+        )
+    
+    # Estadísticas por tipo
+    tipos_text = "\n".join([
+        f"• **{tipo}**: {count}" for tipo, count in stats['types'].items()
+    ])
+    embed.add_field(
+        name="📈 Distribución por Tipo",
+        value=tipos_text or "Sin datos",
+        inline=True
+    )
+    
+    embed.set_footer(text="DSR Spain • Sistema de monitoreo automático")
+    
+    return {'embed': embed}
 
 async def setup_commands(bot):
     """Configura todos los comandos del bot"""
     
+    # Vista persistente del menú de /raids (una sola instancia para todos los mensajes)
+    bot.add_view(RaidDropdownView())
+    
+    # Componentes del navegador de roster (estado codificado en el custom_id)
+    registrar_navegador_roster(bot)
+    
+    # Respuestas precalculadas (se refrescan cada minuto y al cambiar los datos)
+    bot.payload_cache.register("raids", lambda: construir_payload_raids(bot))
+    bot.payload_cache.register("status", lambda: construir_payload_status(bot))
+    
     @bot.tree.command(name="raids", description="Muestra todos los próximos raids con menú interactivo")
     async def raids_command(interaction: discord.Interaction):
         """Comando /raids - Muestra lista de raids con dropdown"""
         try:
-            await interaction.response.defer()
+            # Payload precalculado: se responde directamente sin defer
+            payload = await bot.payload_cache.get("raids")
             
-            spawns_info = obtener_todos_los_proximos_spawns(bot.digimon_manager)
-            
-            if not spawns_info:
-                embed = discord.Embed(
-                    title="📊 Raids Digimon",
-                    description="❌ No hay información de raids disponible en este momento.",
-                    color=EMBED_COLORS["error"]
-                )
-                await interaction.followup.send(embed=embed)
+            if payload['view'] is None:
+                await interaction.response.send_message(embed=payload['embed'])
                 return
             
-            # Crear embed principal
-            embed = discord.Embed(
-                title="☢️ Próximos Raids Digimon",
-                description=(
-                    "**Sistema de raids DSR - Formato dsrworldwiki.com**\n"
-                    f"🕐 **Hora actual KST:** {obtener_tiempo_kst().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-                    "**Próximos 6 raids:**\n"
-                ),
-                color=0x00FFFF,
-                timestamp=obtener_tiempo_kst()
-            )
-            
-            # Mostrar próximos 6 raids en el embed
-            for i, spawn_info in enumerate(spawns_info[:6]):
-                digimon = spawn_info['digimon']
-                horario = spawn_info['horario']
-                tiempo_formato = spawn_info['formato_tiempo']
-                
-                embed.add_field(
-                    name=f"{i+1}. {digimon['nombre']} ({horario['hora']:02d}:{horario['minuto']:02d})",
-                    value=(
-                        f"**Tipo:** {digimon['tipo_icon']} {digimon['tipo']}\n"
-                        f"**Respawn:** {tiempo_formato}"
-                    ),
-                    inline=True
-                )
-            
-            embed.set_footer(text="Usa el menú desplegable para información detallada • DSR Spain")
-            
-            # Crear vista con dropdown
-            view = RaidDropdownView(spawns_info)
-            
-            await interaction.followup.send(embed=embed, view=view)
+            await interaction.response.send_message(embed=payload['embed'], view=payload['view'])
             
         except Exception as e:
             logger.error(f"Error in raids command: {e}")
-            await interaction.followup.send("❌ Error obteniendo información de raids.", ephemeral=True)
+            await responder_error(interaction, "❌ Error obteniendo información de raids.")
     
     @bot.tree.command(name="raid", description="Información específica de un raid")
     async def raid_command(interaction: discord.Interaction, digimon: str):
@@ -159,19 +341,17 @@ async def setup_commands(bot):
             digimon_data = buscar_digimon(digimon, bot.digimon_manager)
             
             if not digimon_data:
-                # Mostrar Digimons disponibles
-                nombres_disponibles = [d['nombre'] for d in bot.digimon_manager.get_all_digimon()]
+                # Mostrar el roster paginado en lugar de listar todos los nombres
+                browser = render_roster(bot)
                 embed = discord.Embed(
                     title="❌ Digimon no encontrado",
-                    description=f"No se encontró un Digimon con el nombre `{digimon}`",
+                    description=(
+                        f"No se encontró un Digimon con el nombre `{digimon}`\n"
+                        "Consulta los Digimon disponibles en el roster:"
+                    ),
                     color=EMBED_COLORS["error"]
                 )
-                embed.add_field(
-                    name="📋 Digimons disponibles:",
-                    value="\n".join([f"• {nombre}" for nombre in nombres_disponibles]),
-                    inline=False
-                )
-                await interaction.followup.send(embed=embed, ephemeral=True)
+                await interaction.followup.send(embeds=[embed, browser['embed']], view=browser['view'], ephemeral=True)
                 return
             
             # Obtener información de spawns para este Digimon
@@ -196,13 +376,14 @@ async def setup_commands(bot):
             embed = crear_embed_dsrworld(
                 digimon_data, 
                 next_spawn['tiempo_restante'], 
-                "info"
+                "info",
+                next_spawn['spawn_time']
             )
             
             # Agregar información adicional
             embed.add_field(
                 name="📅 Próximo Spawn",
-                value=next_spawn['spawn_time'].strftime("%Y-%m-%d %H:%M KST"),
+                value=formato_fecha_spawn(next_spawn['spawn_time']),
                 inline=True
             )
             
@@ -241,6 +422,170 @@ async def setup_commands(bot):
             logger.error(f"Error in raid command: {e}")
             await interaction.followup.send("❌ Error obteniendo información del raid.", ephemeral=True)
     
+    @bot.tree.command(name="roster", description="Explora todos los Digimon con filtros por tipo y mapa")
+    async def roster_command(interaction: discord.Interaction):
+        """Comando /roster - Navegador paginado del roster"""
+        try:
+            await interaction.response.send_message(**render_roster(bot), ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error in roster command: {e}")
+            await responder_error(interaction, "❌ Error abriendo el roster.")
+    
+    @bot.tree.command(name="calendar", description="Calendario de raids de los próximos días en cuadrícula semanal")
+    @app_commands.describe(dias="Número de días a mostrar (1-28, por defecto 7)")
+    async def calendar_command(interaction: discord.Interaction, dias: app_commands.Range[int, 1, 28] = 7):
+        """Comando /calendar - Cuadrícula semanal de spawns"""
+        try:
+            desde = obtener_tiempo_kst().replace(hour=0, minute=0, second=0, microsecond=0)
+            spawns = obtener_calendario(bot.digimon_manager).spawns(desde, desde + datetime.timedelta(days=dias))
+            
+            await interaction.response.send_message(embeds=crear_embeds_calendario(spawns, desde, dias))
+        except Exception as e:
+            logger.error(f"Error in calendar command: {e}")
+            await responder_error(interaction, "❌ Error generando el calendario.")
+
+    @bot.tree.command(name="calendar_export", description="Descarga los raids como archivo .ics para tu calendario")
+    @app_commands.describe(
+        tipo="Exportar solo un tipo de Digimon (ej: Vacuna)",
+        filtros_servidor="Exportar solo los Digimon que pasan los filtros de alertas del servidor"
+    )
+    async def calendar_export_command(interaction: discord.Interaction, tipo: Optional[str] = None,
+                                      filtros_servidor: bool = False):
+        """Comando /calendar_export - Archivo iCalendar con RRULE por horario"""
+        try:
+            if tipo and not any(d['tipo'].lower() == tipo.lower() for d in bot.digimon_manager.get_all_digimon()):
+                await interaction.response.send_message(f"❌ No hay Digimon de tipo **{tipo}** en el roster.", ephemeral=True)
+                return
+
+            guild_id = interaction.guild.id if filtros_servidor and interaction.guild else None
+            contenido = obtener_ics(bot, tipo, guild_id)
+
+            await interaction.response.send_message(
+                "📅 Importa este archivo en tu calendario (Google, Apple, Outlook...). "
+                "Los horarios se repiten solos, no hace falta volver a descargarlo salvo que cambie el roster.",
+                file=discord.File(io.BytesIO(contenido), filename=ICS_SETTINGS["filename"]),
+                ephemeral=True
+            )
+        except Exception as e:
+            logger.error(f"Error in calendar_export command: {e}")
+            await responder_error(interaction, "❌ Error exportando el calendario.")
+
+    def resolver_objetivo(digimon: Optional[str], tipo: Optional[str], recompensa: Optional[str]):
+        """Valida un Digimon, tipo o recompensa contra el roster (devuelve campo y valor canónico)"""
+        if digimon:
+            encontrado = buscar_digimon(digimon, bot.digimon_manager)
+            return ("digimon", encontrado['nombre']) if encontrado else None
+        
+        campo, valor = ("tipo", tipo) if tipo else ("recompensa", recompensa)
+        for d in bot.digimon_manager.get_all_digimon():
+            if d[campo].lower() == valor.lower():
+                return campo, d[campo]
+        return None
+    
+    @bot.tree.command(name="subscribe", description="Recibe por DM las alertas de un Digimon, tipo o recompensa")
+    @app_commands.describe(
+        digimon="Nombre del Digimon",
+        tipo="Tipo de Digimon (ej: Vacuna)",
+        recompensa="Recompensa del raid"
+    )
+    async def subscribe_command(interaction: discord.Interaction, digimon: Optional[str] = None,
+                                tipo: Optional[str] = None, recompensa: Optional[str] = None):
+        """Comando /subscribe - Suscripción a alertas por mensaje directo"""
+        try:
+            if [digimon, tipo, recompensa].count(None) != 2:
+                await interaction.response.send_message("❌ Indica solo uno: digimon, tipo o recompensa.", ephemeral=True)
+                return
+            
+            objetivo = resolver_objetivo(digimon, tipo, recompensa)
+            if objetivo is None:
+                await interaction.response.send_message(
+                    f"❌ No se encontró **{digimon or tipo or recompensa}** en el roster.", ephemeral=True
+                )
+                return
+            
+            campo, valor = objetivo
+            try:
+                nueva = bot.subscriptions.subscribe(interaction.user.id, campo, valor)
+            except ValueError:
+                await interaction.response.send_message(
+                    f"❌ Has alcanzado el máximo de {bot.subscriptions.max_per_user} suscripciones.", ephemeral=True
+                )
+                return
+            
+            embed = discord.Embed(
+                title="🔔 Suscripción activada" if nueva else "🔔 Ya estabas suscrito",
+                description=(
+                    f"Recibirás por DM los avisos y spawns de **{valor}** ({campo}).\n"
+                    "Asegúrate de tener activados los mensajes directos de miembros del servidor."
+                ),
+                color=EMBED_COLORS["success"]
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+        except Exception as e:
+            logger.error(f"Error in subscribe command: {e}")
+            await responder_error(interaction, "❌ Error creando la suscripción.")
+    
+    @bot.tree.command(name="unsubscribe", description="Deja de recibir alertas por DM")
+    @app_commands.describe(
+        digimon="Nombre del Digimon",
+        tipo="Tipo de Digimon",
+        recompensa="Recompensa del raid",
+        todas="Cancelar todas tus suscripciones"
+    )
+    async def unsubscribe_command(interaction: discord.Interaction, digimon: Optional[str] = None,
+                                  tipo: Optional[str] = None, recompensa: Optional[str] = None,
+                                  todas: bool = False):
+        """Comando /unsubscribe - Cancelar suscripciones por DM"""
+        try:
+            if todas:
+                eliminadas = bot.subscriptions.unsubscribe(interaction.user.id)
+            elif [digimon, tipo, recompensa].count(None) == 2:
+                campo, valor = ("digimon", digimon) if digimon else (("tipo", tipo) if tipo else ("recompensa", recompensa))
+                objetivo = resolver_objetivo(digimon, tipo, recompensa)
+                eliminadas = bot.subscriptions.unsubscribe(interaction.user.id, campo, objetivo[1] if objetivo else valor)
+            else:
+                await interaction.response.send_message("❌ Indica digimon, tipo o recompensa, o usa `todas`.", ephemeral=True)
+                return
+            
+            if eliminadas:
+                await interaction.response.send_message(f"🔕 {eliminadas} suscripción(es) cancelada(s).", ephemeral=True)
+            else:
+                await interaction.response.send_message("ℹ️ No tenías esa suscripción.", ephemeral=True)
+            
+        except Exception as e:
+            logger.error(f"Error in unsubscribe command: {e}")
+            await responder_error(interaction, "❌ Error cancelando la suscripción.")
+    
+    @bot.tree.command(name="subscriptions", description="Muestra tus suscripciones de alertas por DM")
+    async def subscriptions_command(interaction: discord.Interaction):
+        """Comando /subscriptions - Listar suscripciones del usuario"""
+        try:
+            suscripciones = bot.subscriptions.get_user(interaction.user.id)
+            
+            embed = discord.Embed(
+                title="🔔 Tus suscripciones",
+                color=EMBED_COLORS["info"]
+            )
+            
+            for campo, nombre in (("digimon", "🐉 Digimon"), ("tipo", "🧬 Tipos"), ("recompensa", "🎁 Recompensas")):
+                if suscripciones[campo]:
+                    embed.add_field(name=nombre, value="\n".join(f"• {valor}" for valor in suscripciones[campo]), inline=True)
+            
+            if not embed.fields:
+                embed.description = "No tienes suscripciones. Usa `/subscribe` para recibir alertas por DM."
+            elif suscripciones['dm_closed']:
+                embed.description = (
+                    "⚠️ Tus DMs estaban cerrados y las alertas están en pausa. "
+                    "Abre tus mensajes directos y vuelve a usar `/subscribe` para reactivarlas."
+                )
+            
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+        except Exception as e:
+            logger.error(f"Error in subscriptions command: {e}")
+            await responder_error(interaction, "❌ Error obteniendo tus suscripciones.")
+    
     @bot.tree.command(name="kst", description="Muestra la hora actual en KST")
     async def kst_command(interaction: discord.Interaction):
         """Comando /kst - Muestra hora actual KST"""
@@ -283,79 +628,12 @@ async def setup_commands(bot):
                 await interaction.response.send_message("❌ Solo administradores pueden usar este comando.", ephemeral=True)
                 return
             
-            await interaction.response.defer()
-            
-            # Obtener estadísticas
-            stats = obtener_estadisticas_raids(bot.digimon_manager)
-            spawns_info = obtener_todos_los_proximos_spawns(bot.digimon_manager)
-            
-            embed = discord.Embed(
-                title="📊 Estado del Sistema DSR",
-                color=EMBED_COLORS["info"],
-                timestamp=obtener_tiempo_kst()
-            )
-            
-            # Información del bot
-            embed.add_field(
-                name="🤖 Bot Status",
-                value=(
-                    f"**Conectado:** ✅ Sí\n"
-                    f"**Servidores:** {len(bot.guilds)}\n"
-                    f"**Latencia:** {round(bot.latency * 1000)}ms"
-                ),
-                inline=True
-            )
-            
-            # Información de raids
-            embed.add_field(
-                name="⚔️ Raids Monitoreados",
-                value=(
-                    f"**Total Digimons:** {stats['total_digimons']}\n"
-                    f"**Próximos spawns:** {len(spawns_info)}\n"
-                    f"**Tipos:** {len(stats['types'])}"
-                ),
-                inline=True
-            )
-            
-            # Configuración de canales
-            embed.add_field(
-                name="📺 Canales Configurados",
-                value=f"**Total:** {len(bot.raid_channels)}\n" +
-                      "\n".join([f"• {bot.get_guild(guild_id).name if bot.get_guild(guild_id) else 'Unknown'}"
-                                for guild_id in list(bot.raid_channels.keys())[:3]]) +
-                      (f"\n... y {len(bot.raid_channels) - 3} más" if len(bot.raid_channels) > 3 else ""),
-                inline=False
-            )
-            
-            # Próximos raids
-            if spawns_info:
-                proximos_text = "\n".join([
-                    f"• **{spawn['digimon']['nombre']}** ({spawn['horario']['hora']:02d}:{spawn['horario']['minuto']:02d}): {spawn['formato_tiempo']}"
-                    for spawn in spawns_info[:5]
-                ])
-                embed.add_field(
-                    name="⏰ Próximos 5 Raids",
-                    value=proximos_text,
-                    inline=False
-                )
-            
-            # Estadísticas por tipo
-            tipos_text = "\n".join([
-                f"• **{tipo}**: {count}" for tipo, count in stats['types'].items()
-            ])
-            embed.add_field(
-                name="📈 Distribución por Tipo",
-                value=tipos_text or "Sin datos",
-                inline=True
-            )
-            
-            embed.set_footer(text="DSR Spain • Sistema de monitoreo automático")
-            
-            await interaction.followup.send(embed=embed)
+            payload = await bot.payload_cache.get("status")
+            await interaction.response.send_message(embed=payload['embed'])
             
         except Exception as e:
             logger.error(f"Error in status command: {e}")
-            await interaction.followup.send("❌ Error obteniendo estado del sistema.", ephemeral=True)
+            await responder_error(interaction, "❌ Error obteniendo estado del sistema.")
     
     @bot.tree.command(name="setup_channel", description="Configurar canal para alertas de raids (administradores)")
     async def setup_channel_command(interaction: discord.Interaction, channel: Optional[discord.TextChannel] = None):
@@ -379,6 +657,9 @@ async def setup_commands(bot):
             
             # Configurar el canal
             bot.raid_channels[interaction.guild.id] = target_channel.id
+            bot.payload_cache.invalidate("status")
+            
+            avisos = ", ".join(str(offset) for offset in bot.guild_settings.get(interaction.guild.id)['warning_offsets']) or "—"
             
             embed = discord.Embed(
                 title="✅ Canal de Raids Configurado",
@@ -390,7 +671,7 @@ async def setup_commands(bot):
                 name="🔔 Tipos de Alertas",
                 value=(
                     "• **Spawn Alert**: Cuando aparece un raid\n"
-                    "• **Early Warning**: 20 minutos antes del spawn\n"
+                    f"• **Early Warning**: {avisos} minutos antes del spawn\n"
                     "• **Formato dsrworldwiki.com**: Información detallada"
                 ),
                 inline=False
@@ -421,10 +702,247 @@ async def setup_commands(bot):
             logger.error(f"Error in setup_channel command: {e}")
             await interaction.response.send_message("❌ Error configurando canal.", ephemeral=True)
     
+    @bot.tree.command(name="alert_settings", description="Configurar avisos, menciones y horas de silencio del servidor (administradores)")
+    @app_commands.describe(
+        avisos="Minutos de aviso antes del spawn separados por comas (ej: 60,20)",
+        spawn="Enviar alerta en el momento del spawn",
+        mencion="A quién mencionar en las alertas de spawn",
+        silencio_inicio="Hora KST (0-23) en que empiezan las horas de silencio",
+        silencio_fin="Hora KST (0-23) en que terminan las horas de silencio",
+        resumen_diario="Un único mensaje diario con todos los spawns en lugar de alertas por spawn",
+        hora_resumen="Hora KST (0-23) del resumen diario",
+        restablecer="Volver a la configuración por defecto"
+    )
+    @app_commands.choices(mencion=[
+        app_commands.Choice(name="@everyone", value="everyone"),
+        app_commands.Choice(name="@here", value="here"),
+        app_commands.Choice(name="Sin mención", value="none")
+    ])
+    async def alert_settings_command(interaction: discord.Interaction, avisos: Optional[str] = None,
+                                     spawn: Optional[bool] = None,
+                                     mencion: Optional[app_commands.Choice[str]] = None,
+                                     silencio_inicio: Optional[int] = None, silencio_fin: Optional[int] = None,
+                                     resumen_diario: Optional[bool] = None, hora_resumen: Optional[int] = None,
+                                     restablecer: bool = False):
+        """Comando /alert_settings - Configuración de alertas por servidor"""
+        try:
+            # Verificar permisos
+            if not (interaction.user.guild_permissions.administrator or bot.is_admin(interaction.user.id)):
+                await interaction.response.send_message("❌ Solo administradores pueden usar este comando.", ephemeral=True)
+                return
+            
+            guild_id = interaction.guild.id
+            
+            if restablecer:
+                bot.guild_settings.reset(guild_id)
+            else:
+                updates = {}
+                
+                if avisos is not None:
+                    try:
+                        updates['warning_offsets'] = [int(valor) for valor in avisos.replace(" ", "").split(",") if valor]
+                    except ValueError:
+                        await interaction.response.send_message("❌ Los avisos deben ser minutos separados por comas (ej: 60,20).", ephemeral=True)
+                        return
+                    if any(offset <= 0 or offset > 24 * 60 for offset in updates['warning_offsets']):
+                        await interaction.response.send_message("❌ Cada aviso debe estar entre 1 y 1440 minutos.", ephemeral=True)
+                        return
+                
+                if spawn is not None:
+                    updates['spawn_alert'] = spawn
+                
+                if mencion is not None:
+                    updates['mention'] = mencion.value
+                
+                if silencio_inicio is not None or silencio_fin is not None:
+                    if silencio_inicio is None or silencio_fin is None:
+                        await interaction.response.send_message("❌ Indica el inicio y el fin de las horas de silencio.", ephemeral=True)
+                        return
+                    # Inicio igual a fin desactiva las horas de silencio
+                    updates['quiet_hours'] = None if silencio_inicio == silencio_fin else [silencio_inicio, silencio_fin]
+                
+                if resumen_diario is not None:
+                    updates['digest'] = resumen_diario
+                
+                if hora_resumen is not None:
+                    updates['digest_hour'] = hora_resumen
+                
+                if updates and not bot.guild_settings.update(guild_id, updates):
+                    await interaction.response.send_message("❌ Configuración no válida.", ephemeral=True)
+                    return
+            
+            bot.payload_cache.invalidate("status")
+            settings = bot.guild_settings.get(guild_id)
+            
+            embed = discord.Embed(
+                title="⚙️ Configuración de Alertas",
+                description=(
+                    "Configuración personalizada de este servidor"
+                    if bot.guild_settings.is_custom(guild_id) else "Este servidor usa la configuración por defecto"
+                ),
+                color=EMBED_COLORS["success"]
+            )
+            
+            embed.add_field(
+                name="⏰ Avisos previos",
+                value=", ".join(f"{offset} min" for offset in settings['warning_offsets']) or "Desactivados",
+                inline=True
+            )
+            
+            embed.add_field(
+                name="🔥 Alerta de spawn",
+                value="✅ Activada" if settings['spawn_alert'] else "❌ Desactivada",
+                inline=True
+            )
+            
+            embed.add_field(
+                name="📣 Mención",
+                value={"everyone": "@everyone", "here": "@here"}.get(settings['mention'], "Sin mención"),
+                inline=True
+            )
+            
+            quiet_hours = settings['quiet_hours']
+            embed.add_field(
+                name="🌙 Horas de silencio",
+                value=f"{quiet_hours[0]:02d}:00 - {quiet_hours[1]:02d}:00 KST" if quiet_hours else "Desactivadas",
+                inline=True
+            )
+            
+            embed.add_field(
+                name="📅 Resumen diario",
+                value=f"✅ {settings['digest_hour']:02d}:00 KST (sin alertas por spawn)" if settings['digest'] else "❌ Desactivado",
+                inline=True
+            )
+            
+            if settings['filters']:
+                embed.add_field(name="🎯 Filtros", value=", ".join(settings['filters'])[:1024], inline=False)
+            
+            if settings['role_pings']:
+                embed.add_field(
+                    name="📣 Menciones de rol",
+                    value=", ".join(f"{clave}: <@&{role_id}>" for clave, role_id in sorted(settings['role_pings'].items()))[:1024],
+                    inline=False
+                )
+            
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+        except Exception as e:
+            logger.error(f"Error in alert_settings command: {e}")
+            await responder_error(interaction, "❌ Error actualizando la configuración de alertas.")
+    
+    @bot.tree.command(name="alert_filter", description="Elegir de qué Digimon, tipos o recompensas recibe alertas el servidor (administradores)")
+    @app_commands.describe(
+        accion="Añadir o quitar un filtro, o limpiarlos todos (sin filtros se reciben todas las alertas)",
+        digimon="Nombre del Digimon",
+        tipo="Tipo de Digimon",
+        recompensa="Recompensa del raid"
+    )
+    @app_commands.choices(accion=[
+        app_commands.Choice(name="Añadir", value="add"),
+        app_commands.Choice(name="Quitar", value="remove"),
+        app_commands.Choice(name="Limpiar todos", value="clear")
+    ])
+    async def alert_filter_command(interaction: discord.Interaction, accion: app_commands.Choice[str],
+                                   digimon: Optional[str] = None, tipo: Optional[str] = None,
+                                   recompensa: Optional[str] = None):
+        """Comando /alert_filter - Filtros de alertas por servidor"""
+        try:
+            # Verificar permisos
+            if not (interaction.user.guild_permissions.administrator or bot.is_admin(interaction.user.id)):
+                await interaction.response.send_message("❌ Solo administradores pueden usar este comando.", ephemeral=True)
+                return
+            
+            guild_id = interaction.guild.id
+            
+            if accion.value == "clear":
+                bot.guild_settings.remove_filter(guild_id)
+            else:
+                if [digimon, tipo, recompensa].count(None) != 2:
+                    await interaction.response.send_message("❌ Indica solo uno: digimon, tipo o recompensa.", ephemeral=True)
+                    return
+                
+                objetivo = resolver_objetivo(digimon, tipo, recompensa)
+                if objetivo is None:
+                    await interaction.response.send_message(
+                        f"❌ No se encontró **{digimon or tipo or recompensa}** en el roster.", ephemeral=True
+                    )
+                    return
+                
+                if accion.value == "add":
+                    bot.guild_settings.add_filter(guild_id, *objetivo)
+                else:
+                    bot.guild_settings.remove_filter(guild_id, *objetivo)
+            
+            filtros = bot.guild_settings.get(guild_id)['filters']
+            embed = discord.Embed(
+                title="🎯 Filtros de Alertas",
+                description=(
+                    "Este servidor solo recibe alertas de:\n" + "\n".join(f"• {filtro}" for filtro in filtros)
+                    if filtros else "Este servidor recibe alertas de todos los Digimon."
+                ),
+                color=EMBED_COLORS["success"]
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+        except Exception as e:
+            logger.error(f"Error in alert_filter command: {e}")
+            await responder_error(interaction, "❌ Error actualizando los filtros de alertas.")
+    
+    @bot.tree.command(name="alert_role", description="Rol a mencionar en los spawns de un Digimon, tipo o recompensa (administradores)")
+    @app_commands.describe(
+        rol="Rol a mencionar (vacío para quitar la mención configurada)",
+        digimon="Nombre del Digimon",
+        tipo="Tipo de Digimon",
+        recompensa="Recompensa del raid"
+    )
+    async def alert_role_command(interaction: discord.Interaction, rol: Optional[discord.Role] = None,
+                                 digimon: Optional[str] = None, tipo: Optional[str] = None,
+                                 recompensa: Optional[str] = None):
+        """Comando /alert_role - Menciones de rol por Digimon, tipo o recompensa"""
+        try:
+            # Verificar permisos
+            if not (interaction.user.guild_permissions.administrator or bot.is_admin(interaction.user.id)):
+                await interaction.response.send_message("❌ Solo administradores pueden usar este comando.", ephemeral=True)
+                return
+            
+            if [digimon, tipo, recompensa].count(None) < 2:
+                await interaction.response.send_message("❌ Indica como mucho uno: digimon, tipo o recompensa.", ephemeral=True)
+                return
+            
+            objetivo = (None, None)
+            if digimon or tipo or recompensa:
+                objetivo = resolver_objetivo(digimon, tipo, recompensa)
+                if objetivo is None:
+                    await interaction.response.send_message(
+                        f"❌ No se encontró **{digimon or tipo or recompensa}** en el roster.", ephemeral=True
+                    )
+                    return
+            
+            guild_id = interaction.guild.id
+            bot.guild_settings.set_role_ping(guild_id, rol.id if rol else None, *objetivo)
+            
+            role_pings = bot.guild_settings.get(guild_id)['role_pings']
+            embed = discord.Embed(
+                title="📣 Menciones de Rol",
+                description=(
+                    "\n".join(
+                        f"• {'Todos los spawns' if clave == '*' else clave}: <@&{role_id}>"
+                        for clave, role_id in sorted(role_pings.items())
+                    )
+                    if role_pings else "Sin menciones de rol: se usa la mención configurada en `/alert_settings`."
+                ),
+                color=EMBED_COLORS["success"]
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+        except Exception as e:
+            logger.error(f"Error in alert_role command: {e}")
+            await responder_error(interaction, "❌ Error configurando la mención de rol.")
+    
     # Comandos de gestión de Digimon (admin only)
     @bot.tree.command(name="add_digimon", description="Agregar nuevo Digimon (administradores)")
     async def add_digimon_command(interaction: discord.Interaction, nombre: str, tipo: str, mapa: str, recompensa: str, 
-                                 horarios: str, recurrencia_dias: int):
+                                 horarios: str, recurrencia_dias: int, avisos: Optional[str] = None):
         """Comando /add_digimon - Agregar nuevo Digimon"""
         try:
             # Verificar permisos
@@ -444,6 +962,15 @@ async def setup_commands(bot):
                 await interaction.followup.send("❌ Formato de horarios inválido. Usa formato HH:MM,HH:MM", ephemeral=True)
                 return
             
+            # Parsear avisos propios del Digimon en minutos (formato: "1440,60,10")
+            avisos_list = []
+            if avisos:
+                try:
+                    avisos_list = [int(aviso) for aviso in avisos.replace(" ", "").split(",") if aviso]
+                except ValueError:
+                    await interaction.followup.send("❌ Formato de avisos inválido. Usa minutos separados por comas (ej: 1440,60,10)", ephemeral=True)
+                    return
+            
             # Crear datos del Digimon
             digimon_data = {
                 "nombre": nombre,
@@ -453,6 +980,8 @@ async def setup_commands(bot):
                 "horarios": horarios_list,
                 "recurrencia_dias": recurrencia_dias
             }
+            if avisos_list:
+                digimon_data["avisos_minutos"] = avisos_list
             
             # Agregar Digimon
             if bot.digimon_manager.add_digimon(digimon_data):
@@ -467,6 +996,8 @@ async def setup_commands(bot):
                 embed.add_field(name="Recompensa", value=recompensa, inline=True)
                 embed.add_field(name="Horarios", value=horarios, inline=True)
                 embed.add_field(name="Recurrencia", value=f"{recurrencia_dias} días", inline=True)
+                if avisos_list:
+                    embed.add_field(name="Avisos", value=", ".join(f"{aviso} min" for aviso in sorted(set(avisos_list), reverse=True)), inline=True)
                 
                 await interaction.followup.send(embed=embed)
             else:
@@ -508,4 +1039,49 @@ async def setup_commands(bot):
             logger.error(f"Error in remove_digimon command: {e}")
             await interaction.followup.send("❌ Error removiendo Digimon.", ephemeral=True)
 
+    @bot.tree.command(name="profile", description="Perfil de CPU o memoria del bot en vivo (administradores del bot)")
+    @app_commands.describe(
+        seconds="Duración de la captura en segundos",
+        mode="cpu (tiempo de CPU) o mem (diferencia de memoria con tracemalloc)",
+        exacto="En modo cpu, usar cProfile determinista en lugar de muestreo (más coste, ventana más corta)"
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="CPU", value="cpu"),
+        app_commands.Choice(name="Memoria", value="mem")
+    ])
+    async def profile_command(interaction: discord.Interaction,
+                              seconds: app_commands.Range[int, 1, PROFILE_SETTINGS["max_seconds"]] = 10,
+                              mode: str = "cpu", exacto: bool = False):
+        """Comando /profile - Captura de perfil acotada en el proceso en marcha"""
+        try:
+            # Afecta a todo el proceso: solo administradores del bot
+            if not bot.is_admin(interaction.user.id):
+                await interaction.response.send_message("❌ Solo administradores del bot pueden usar este comando.", ephemeral=True)
+                return
+            
+            if bot.profiler.ocupado:
+                await interaction.response.send_message("⏳ Ya hay una captura de perfil en curso. Espera a que termine.", ephemeral=True)
+                return
+            
+            limite = bot.profiler.limite(mode, exacto)
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            
+            try:
+                resumen, informe = await bot.profiler.capturar(mode, seconds, exacto)
+            except CapturaEnCurso:
+                await interaction.followup.send("⏳ Ya hay una captura de perfil en curso. Espera a que termine.", ephemeral=True)
+                return
+            
+            aviso = f"\n⚠️ Duración recortada a {limite}s (límite de este modo)." if seconds > limite else ""
+            nombre_archivo = f"profile-{mode}{'-exacto' if exacto and mode == 'cpu' else ''}-{int(datetime.datetime.now().timestamp())}.txt"
+            await interaction.followup.send(
+                f"🔬 **Perfil {mode}** • {resumen}{aviso}",
+                file=discord.File(io.BytesIO(informe.encode("utf-8")), filename=nombre_archivo),
+                ephemeral=True
+            )
+            
+        except Exception as e:
+            logger.error(f"Error in profile command: {e}")
+            await responder_error(interaction, "❌ Error capturando el perfil.")
+
     logger.info("✅ Comandos configurados exitosamente")
@@ -0,0 +1,230 @@
+import json
+import os
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+class AlertLedger:
+    """
+    Persistent record of delivered alerts, keyed by (guild, digimon, horario, occurrence, alert type)
+
+    Deliveries are appended to a JSON-lines journal next to the ledger file, so
+    a flush only writes what changed since the previous one. The full snapshot
+    is rewritten (compaction) once the journal grows as large as the ledger or
+    after pruning, and flush_async does the file I/O in a worker thread so the
+    event loop never waits for it. Fan-outs journal their deliveries as they
+    go (compactar=False); compaction is left to the per-tick flush.
+    """
+
+    def __init__(self, ledger_file: str = "data/alert_ledger.json", retention_hours: int = 48,
+                 compact_min_records: int = 1000):
+        self.ledger_file = ledger_file
+        self.journal_file = f"{ledger_file}.journal"
+        self.retention = timedelta(hours=retention_hours)
+        self.compact_min_records = compact_min_records
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.last_tick: Optional[datetime] = None
+        self._pending: List[Dict[str, Any]] = []
+        self._tick_dirty = False
+        self._needs_compaction = False
+        self._journal_records = 0
+        self._write_lock = asyncio.Lock()
+        self.load_data()
+
+    @staticmethod
+    def make_key(guild_id: int, digimon_nombre: str, horario: Dict[str, int],
+                 occurrence: datetime, alert_type: str) -> str:
+        """Build the idempotency key for one alert delivered to one guild"""
+        return (
+            f"{guild_id}|{digimon_nombre}|{horario['hora']:02d}:{horario['minuto']:02d}|"
+            f"{occurrence.isoformat()}|{alert_type}"
+        )
+
+    def load_data(self):
+        """Load the ledger snapshot and replay the journal written after it"""
+        self.entries = {}
+        self.last_tick = None
+        self._pending = []
+        self._tick_dirty = False
+        self._needs_compaction = False
+        self._journal_records = 0
+        try:
+            if os.path.exists(self.ledger_file):
+                with open(self.ledger_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.entries = data.get('entries', {})
+                last_tick = data.get('last_tick')
+                self.last_tick = datetime.fromisoformat(last_tick) if last_tick else None
+
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # A crash mid-append leaves at most one partial last line
+                            logger.warning("⚠️ Skipping unreadable alert ledger journal line")
+                            self._needs_compaction = True
+                            continue
+                        self._apply(record)
+                        self._journal_records += 1
+
+            if self.entries or self._journal_records:
+                logger.info(f"✅ Loaded {len(self.entries)} alert deliveries from {self.ledger_file} "
+                            f"({self._journal_records} journal records)")
+        except Exception as e:
+            logger.error(f"❌ Error loading alert ledger: {e}")
+            self.entries = {}
+            self.last_tick = None
+
+    def _apply(self, record: Dict[str, Any]):
+        if 'key' in record:
+            self.entries[record['key']] = record['entry']
+        if record.get('last_tick'):
+            last_tick = datetime.fromisoformat(record['last_tick'])
+            if self.last_tick is None or last_tick > self.last_tick:
+                self.last_tick = last_tick
+
+    def _snapshot(self) -> Dict[str, Any]:
+        # Entries are never mutated once recorded, so a shallow copy is a consistent snapshot
+        return {
+            'entries': dict(self.entries),
+            'last_tick': self.last_tick.isoformat() if self.last_tick else None,
+            'last_updated': datetime.now().isoformat(),
+            'version': '1.0'
+        }
+
+    def _write_snapshot(self, data: Dict[str, Any]):
+        """Write the full ledger atomically (temp file + rename) and empty the journal"""
+        os.makedirs(os.path.dirname(self.ledger_file) or '.', exist_ok=True)
+        tmp_file = f"{self.ledger_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, self.ledger_file)
+        # The snapshot already holds every journaled record
+        open(self.journal_file, 'w').close()
+
+    def _append_journal(self, lines: str):
+        os.makedirs(os.path.dirname(self.journal_file) or '.', exist_ok=True)
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(lines)
+
+    @property
+    def pending_records(self) -> int:
+        """Deliveries recorded but not yet journaled"""
+        return len(self._pending)
+
+    def _take_pending(self, compactar: bool = True) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Collect what the next write has to persist and reset the pending state
+
+        Returns:
+            (journal lines to append, snapshot to write); the snapshot replaces
+            the journal when compaction is due
+        """
+        records = self._pending
+        if self._tick_dirty and self.last_tick:
+            records.append({'last_tick': self.last_tick.isoformat()})
+        self._pending = []
+        self._tick_dirty = False
+
+        journal_records = self._journal_records + len(records)
+        if compactar and (self._needs_compaction or
+                          journal_records >= max(self.compact_min_records, len(self.entries))):
+            self._needs_compaction = False
+            self._journal_records = 0
+            return None, self._snapshot()
+
+        self._journal_records = journal_records
+        if not records:
+            return None, None
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records), None
+
+    def _write(self, lines: Optional[str], snapshot: Optional[Dict[str, Any]]) -> bool:
+        try:
+            if snapshot is not None:
+                self._write_snapshot(snapshot)
+            elif lines:
+                self._append_journal(lines)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error saving alert ledger: {e}")
+            # Rewrite everything next time rather than lose the records
+            self._needs_compaction = True
+            return False
+
+    def save_data(self) -> bool:
+        """Write the full ledger now (compaction)"""
+        self._pending = []
+        self._tick_dirty = False
+        self._needs_compaction = False
+        self._journal_records = 0
+        return self._write(None, self._snapshot())
+
+    def flush(self) -> bool:
+        """Persist unsaved deliveries on the calling thread"""
+        return self._write(*self._take_pending())
+
+    async def flush_async(self, compactar: bool = True) -> bool:
+        """
+        Persist unsaved deliveries from a worker thread
+
+        Args:
+            compactar: Allow rewriting the snapshot if due (once per tick); without
+                it only the journal is appended, which is cheap enough mid fan-out
+        """
+        async with self._write_lock:
+            lines, snapshot = self._take_pending(compactar)
+            if lines is None and snapshot is None:
+                return True
+            return await asyncio.to_thread(self._write, lines, snapshot)
+
+    def was_delivered(self, key: str) -> bool:
+        """Check whether an alert was already delivered"""
+        return key in self.entries
+
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the delivery record for an alert"""
+        return self.entries.get(key)
+
+    def record_delivery(self, key: str, occurrence: datetime, channel_id: int, message_id: Optional[int] = None):
+        """Record a successful delivery (journaled on the next flush)"""
+        self.entries[key] = {
+            'channel_id': channel_id,
+            'message_id': message_id,
+            'occurrence': occurrence.isoformat(),
+            'delivered_at': datetime.now().isoformat()
+        }
+        self._pending.append({'key': key, 'entry': self.entries[key]})
+
+    def mark_tick(self, tick: datetime):
+        """Remember the last minute fully processed by the scheduler"""
+        self.last_tick = tick
+        self._tick_dirty = True
+
+    def prune(self, now: datetime) -> int:
+        """Drop deliveries whose occurrence is older than the retention window"""
+        cutoff = now - self.retention
+        expired = [
+            key for key, entry in self.entries.items()
+            if datetime.fromisoformat(entry['occurrence']) < cutoff
+        ]
+        for key in expired:
+            del self.entries[key]
+        if expired:
+            # Deletions are not journaled: the next flush rewrites the snapshot
+            self._needs_compaction = True
+            logger.info(f"🧹 Pruned {len(expired)} old alert deliveries")
+        return len(expired)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get ledger statistics"""
+        return {
+            'total_deliveries': len(self.entries),
+            'last_tick': self.last_tick.isoformat() if self.last_tick else None,
+            'journal_records': self._journal_records,
+            'ledger_file': self.ledger_file
+        }
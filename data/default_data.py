@@ -18,7 +18,7 @@ DEFAULT_DIGIMONS = [
             {"hora": 21, "minuto": 29}
         ],
         "recurrencia_dias": 1,
-        "fecha_inicio": datetime.datetime(2025, 8, 18, 19, 29, tzinfo=KST),
+        "fecha_inicio": KST.localize(datetime.datetime(2025, 8, 18, 19, 29)),
         "imagen": "https://dsrworldwiki.com/assets-opt/digimons/pumpmon-800.0d183a820368.avif",
         "color": 0x0099FF
     },
@@ -33,7 +33,7 @@ DEFAULT_DIGIMONS = [
             {"hora": 20, "minuto": 39}
         ],
         "recurrencia_dias": 1,
-        "fecha_inicio": datetime.datetime(2025, 8, 18, 20, 39, tzinfo=KST),
+        "fecha_inicio": KST.localize(datetime.datetime(2025, 8, 18, 20, 39)),
         "imagen": "https://dsrworldwiki.com/assets-opt/digimons/datamon-800.0616d90fb62c.avif",
         "color": 0xFF3366
     },
@@ -49,7 +49,7 @@ DEFAULT_DIGIMONS = [
             {"hora": 0, "minuto": 59}
         ],
         "recurrencia_dias": 1,
-        "fecha_inicio": datetime.datetime(2025, 8, 18, 22, 59, tzinfo=KST),
+        "fecha_inicio": KST.localize(datetime.datetime(2025, 8, 18, 22, 59)),
         "imagen": "https://dsrworldwiki.com/assets-opt/digimons/gottsumon-800.ca5003fad519.avif",
         "color": 0x0099FF
     },
@@ -64,7 +64,7 @@ DEFAULT_DIGIMONS = [
             {"hora": 16, "minuto": 0}
         ],
         "recurrencia_dias": 5,
-        "fecha_inicio": datetime.datetime(2025, 8, 23, 16, 0, tzinfo=KST),
+        "fecha_inicio": KST.localize(datetime.datetime(2025, 8, 23, 16, 0)),
         "imagen": "https://dsrworldwiki.com/assets-opt/digimons/blackseraphimon-800.4544de9758c5.avif",
         "color": 0xFF3366
     },
@@ -79,7 +79,8 @@ DEFAULT_DIGIMONS = [
             {"hora": 14, "minuto": 30}
         ],
         "recurrencia_dias": 6,
-        "fecha_inicio": datetime.datetime(2025, 8, 24, 14, 30, tzinfo=KST),
+        "avisos_minutos": [1440, 60, 10],
+        "fecha_inicio": KST.localize(datetime.datetime(2025, 8, 24, 14, 30)),
         "imagen": "https://dsrworldwiki.com/assets-opt/digimons/omegamon-800.7a602017a50c.avif",
         "color": 0x00FF00
     },
@@ -94,7 +95,7 @@ DEFAULT_DIGIMONS = [
             {"hora": 16, "minuto": 0}
         ],
         "recurrencia_dias": 12,
-        "fecha_inicio": datetime.datetime(2025, 8, 30, 16, 0, tzinfo=KST),
+        "fecha_inicio": KST.localize(datetime.datetime(2025, 8, 30, 16, 0)),
         "imagen": "https://dsrworldwiki.com/assets-opt/digimons/ophanimon-800.8dffa51532ee.avif",
         "color": 0x00FF00
     },
@@ -109,7 +110,7 @@ DEFAULT_DIGIMONS = [
             {"hora": 16, "minuto": 0}
         ],
         "recurrencia_dias": 13,
-        "fecha_inicio": datetime.datetime(2025, 8, 31, 16, 0, tzinfo=KST),
+        "fecha_inicio": KST.localize(datetime.datetime(2025, 8, 31, 16, 0)),
         "imagen": "https://dsrworldwiki.com/assets-opt/digimons/megidramon-800.ffeaccae5bb5.avif",
         "color": 0xFF3366
     }
@@ -142,5 +143,113 @@ REWARD_EMOJIS = {
 ALERT_SETTINGS = {
     "early_warning_minutes": 20,  # Early warning 20 minutes before
     "spawn_alert": True,          # Alert when raid spawns
-    "mention_everyone": True      # Mention @everyone on spawns
+    "mention_everyone": True,     # Mention @everyone on spawns
+    "edit_warning_on_spawn": False,  # Edit the early warning into the spawn alert instead of a new message
+    "edit_rate_per_second": 5     # Max message edits per second when editing warnings
+}
+
+# Default per-guild alert settings (guilds can override them with /alert_settings)
+DEFAULT_GUILD_SETTINGS = {
+    "warning_offsets": [ALERT_SETTINGS["early_warning_minutes"]],  # Minutes before spawn
+    "spawn_alert": ALERT_SETTINGS["spawn_alert"],                   # Alert when raid spawns
+    "mention": "everyone" if ALERT_SETTINGS["mention_everyone"] else "none",  # everyone, here, none
+    "quiet_hours": None,                                            # [start_hour, end_hour) KST, or None
+    "filters": [],       # Only alert for these "digimon:<name>", "tipo:<type>", "recompensa:<reward>" (empty = all)
+    "role_pings": {},    # Role to ping on spawns per "digimon:<name>"/"tipo:<type>"/"recompensa:<reward>", or "*" for any
+    "digest": False,     # Post one daily summary instead of per-spawn alerts
+    "digest_hour": 9     # KST hour of the daily summary
+}
+
+# Display settings for command replies and alerts
+DISPLAY_SETTINGS = {
+    "discord_timestamps": True    # Use <t:epoch:R>/<t:epoch:F> so clients render live countdowns
+}
+
+# High availability settings (active/passive lease)
+HA_SETTINGS = {
+    "lease_file": "data/alert_lease.json",  # Shared lease file between instances
+    "lease_ttl_seconds": 30,                # Lease expires if not renewed in this time
+    "renew_interval_seconds": 10            # Standby takes over within ttl + renew interval
+}
+
+# Alert ledger settings (idempotent delivery and restart catch-up)
+LEDGER_SETTINGS = {
+    "ledger_file": "data/alert_ledger.json",  # Persistent record of delivered alerts
+    "retention_hours": 48,                    # Forget deliveries older than this
+    "catchup_freshness_minutes": 10,          # Replay missed alerts only if this recent
+    "compact_min_records": 1000,              # Fold the journal into the ledger file past this many records
+    "journal_batch_records": 25               # Journal deliveries mid fan-out every this many sends
+}
+
+# DM subscription settings (/subscribe)
+SUBSCRIPTION_SETTINGS = {
+    "data_file": "data/subscriptions.json",  # Per-user subscriptions
+    "max_per_user": 25,                      # Max subscriptions per user
+    "dm_rate_per_second": 5,                 # Global DM send rate
+    "dm_workers": 2,                         # Concurrent DM senders
+    "dm_max_attempts": 3,                    # Attempts per DM before giving up
+    "dm_backoff_seconds": 5                  # Base retry delay (doubles on every attempt)
+}
+
+# iCalendar export settings (/calendar_export)
+ICS_SETTINGS = {
+    "calendar_name": "Raids DSR",                  # Calendar name shown by clients
+    "prodid": "-//Alerta Boss DSR//Raids//ES",     # Producer identifier
+    "uid_domain": "alerta-boss-dsr",               # Domain part of the stable event UIDs
+    "event_minutes": 30,                           # Duration of each raid event
+    "alarm_minutes": [ALERT_SETTINGS["early_warning_minutes"]],  # Reminders when a Digimon has no avisos_minutos
+    "filename": "raids-dsr.ics"                    # Attachment name
+}
+
+# Embedded read-only HTTP API (disabled unless API_PORT is set)
+API_SETTINGS = {
+    "host": "0.0.0.0",          # Interface to listen on (API_HOST overrides it)
+    "calendar_days": 7,         # Default /calendar window
+    "max_calendar_days": 28,    # Largest /calendar?dias= accepted
+    "cors_origin": "*"          # Access-Control-Allow-Origin for browser dashboards (None to omit)
+}
+
+# Prometheus metrics endpoint (disabled unless METRICS_PORT is set)
+METRICS_SETTINGS = {
+    "host": "127.0.0.1"              # Local only by default (METRICS_HOST overrides it)
+}
+
+# Event-loop health monitor (lag probe and slow-callback detector)
+LOOP_MONITOR_SETTINGS = {
+    "interval_seconds": 0.5,         # How often the heartbeat wakes up
+    "slow_threshold_seconds": 0.25,  # Stalls longer than this are logged with the blocking stack
+    "max_events": 20,                # Recent stalls kept for /status
+    "stack_depth": 12                # Frames kept per captured stack
+}
+
+# Logging pipeline (LOG_LEVEL, LOG_FORMAT and LOG_ROTATION env vars override these)
+LOGGING_SETTINGS = {
+    "file": "bot.log",                # Log file (rotated copies get a suffix and .gz)
+    "format": "text",                 # text, or json for one JSON object per line with alert/guild IDs
+    "rotation": "size",               # size (max_bytes) or time (when)
+    "max_bytes": 10 * 1024 * 1024,    # Rotate after 10 MB with size rotation
+    "when": "midnight",               # Rotation interval with time rotation
+    "backup_count": 7,                # Rotated files kept
+    "compress": True                  # Gzip rotated files
+}
+
+# Per-alert and per-command tracing (TRACE_SAMPLE_RATE env var overrides the rate)
+TRACING_SETTINGS = {
+    "file": "data/traces.jsonl",   # One JSON line per sampled trace (analyze with tools/analizar_trazas.py)
+    "sample_rate": 0.0             # Fraction of alerts/commands traced (0 disables tracing)
+}
+
+# On-demand /profile captures (bot admins only, one at a time)
+PROFILE_SETTINGS = {
+    "max_seconds": 60,               # Upper bound for any capture window
+    "max_exact_seconds": 10,         # cProfile slows every call, so its window is shorter
+    "max_memory_seconds": 30,        # tracemalloc adds allocation overhead while tracing
+    "sample_interval_ms": 5,         # Stack sampling period in sampling CPU mode
+    "top_entries": 40,               # Rows per table in the attached report
+    "tracemalloc_frames": 5          # Frames stored per traced allocation
+}
+
+# Slash command tree sync (python main.py --force-sync pushes it regardless)
+COMMAND_SYNC_SETTINGS = {
+    "state_file": "data/command_sync.json"  # Hash of the last synced tree per application and scope
 }
@@ -1,7 +1,7 @@
 import json
 import os
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable
 from datetime import datetime
 import pytz
 from .default_data import DEFAULT_DIGIMONS, EMBED_COLORS, TYPE_EMOJIS, REWARD_EMOJIS, ALERT_SETTINGS
@@ -37,8 +37,24 @@ class DigimonManager:
     def __init__(self, data_file: str = "data/digimon_data.json"):
         self.data_file = data_file
         self.digimons = []
+        self.version = 0
+        self._change_listeners: List[Callable[[int], None]] = []
+        self._data_mtime = None
         self.load_data()
     
+    def add_change_listener(self, callback: Callable[[int], None]):
+        """Register a callback invoked with the new version after every data change"""
+        self._change_listeners.append(callback)
+    
+    def _mark_changed(self):
+        """Bump the data version and notify listeners (caches, templates...)"""
+        self.version += 1
+        for callback in self._change_listeners:
+            try:
+                callback(self.version)
+            except Exception as e:
+                logger.error(f"❌ Error in data change listener: {e}")
+    
     def load_data(self):
         """Load Digimon data from file or create with defaults"""
         try:
@@ -46,6 +62,7 @@ class DigimonManager:
                 with open(self.data_file, 'r', encoding='utf-8') as f:
                     data = json.load(f, object_hook=datetime_hook)
                     self.digimons = data.get('digimons', DEFAULT_DIGIMONS.copy())
+                    self._data_mtime = os.path.getmtime(self.data_file)
                     logger.info(f"✅ Loaded {len(self.digimons)} Digimon from {self.data_file}")
             else:
                 # Create default data
@@ -56,6 +73,8 @@ class DigimonManager:
             logger.error(f"❌ Error loading data: {e}")
             logger.info("🔄 Using default Digimon data")
             self.digimons = [digimon.copy() for digimon in DEFAULT_DIGIMONS]
+        
+        self._mark_changed()
     
     def save_data(self):
         """Save current Digimon data to file"""
@@ -71,6 +90,7 @@ class DigimonManager:
             
             with open(self.data_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False, cls=DigimonDateTimeEncoder)
+            self._data_mtime = os.path.getmtime(self.data_file)
                 
             logger.info(f"💾 Saved {len(self.digimons)} Digimon to {self.data_file}")
             return True
@@ -79,6 +99,19 @@ class DigimonManager:
             logger.error(f"❌ Error saving data: {e}")
             return False
     
+    def reload_if_changed(self) -> bool:
+        """Reload data if another process (e.g. the HA leader) modified the file"""
+        try:
+            if not os.path.exists(self.data_file):
+                return False
+            if os.path.getmtime(self.data_file) == self._data_mtime:
+                return False
+            self.load_data()
+            return True
+        except OSError as e:
+            logger.error(f"❌ Error checking data file: {e}")
+            return False
+    
     def get_all_digimon(self) -> List[Dict[str, Any]]:
         """Get all Digimon data"""
         return [digimon.copy() for digimon in self.digimons]
@@ -118,6 +151,9 @@ class DigimonManager:
             digimon_data.setdefault('color', self._get_default_color(digimon_data['tipo']))
             digimon_data.setdefault('imagen', '')
             
+            if 'avisos_minutos' in digimon_data:
+                digimon_data['avisos_minutos'] = self._normalize_warning_offsets(digimon_data['avisos_minutos'])
+            
             # Convert date strings to datetime objects if needed
             if 'fecha_inicio' in digimon_data and isinstance(digimon_data['fecha_inicio'], str):
                 KST = pytz.timezone('Asia/Seoul')
@@ -132,6 +168,7 @@ class DigimonManager:
                 digimon_data['fecha_inicio'] = datetime.now(KST)
             
             self.digimons.append(digimon_data)
+            self._mark_changed()
             self.save_data()
             
             logger.info(f"✅ Added new Digimon: {digimon_data['nombre']}")
@@ -162,6 +199,8 @@ class DigimonManager:
                         value = KST.localize(dt)
                     else:
                         value = dt.astimezone(KST)
+                elif key == 'avisos_minutos':
+                    value = self._normalize_warning_offsets(value)
                 digimon[key] = value
             
             # Update icons if type or reward changed
@@ -172,6 +211,7 @@ class DigimonManager:
             if 'recompensa' in updates:
                 digimon['recompensa_icon'] = REWARD_EMOJIS.get(digimon['recompensa'], '❓')
             
+            self._mark_changed()
             self.save_data()
             logger.info(f"✅ Updated Digimon: {digimon['nombre']}")
             return True
@@ -189,6 +229,7 @@ class DigimonManager:
             if len(self.digimons) == original_count:
                 raise ValueError(f"Digimon '{name}' not found")
             
+            self._mark_changed()
             self.save_data()
             logger.info(f"🗑️ Removed Digimon: {name}")
             return True
@@ -289,6 +330,12 @@ class DigimonManager:
             logger.error(f"❌ Error creating backup: {e}")
             return False
     
+    def _normalize_warning_offsets(self, offsets: List[int]) -> List[int]:
+        """Validate per-timer warning offsets (minutes before spawn), largest first"""
+        if any(not isinstance(offset, int) or offset <= 0 for offset in offsets):
+            raise ValueError("Warning offsets must be positive minutes")
+        return sorted(set(offsets), reverse=True)
+    
     def _get_default_color(self, digimon_type: str) -> int:
         """Get default color for Digimon type"""
         color_map = {
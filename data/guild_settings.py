@@ -0,0 +1,362 @@
+import json
+import os
+import logging
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Any, Optional, Callable, ContextManager, Iterable, Set, Tuple
+from datetime import datetime
+from .default_data import DEFAULT_GUILD_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+MENTION_POLICIES = ("everyone", "here", "none")
+FILTER_KINDS = ("digimon", "tipo", "recompensa")
+# Role ping key that matches every Digimon
+ANY_DIGIMON = "*"
+
+def filter_key(kind: str, value: str) -> str:
+    """Build a filter / role ping key such as "tipo:virus" """
+    if kind not in FILTER_KINDS:
+        raise ValueError(f"Filter kind must be one of {FILTER_KINDS}")
+    return f"{kind}:{value.lower()}"
+
+def digimon_keys(digimon: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Filter keys that match a Digimon, most specific first"""
+    return (
+        filter_key("digimon", digimon['nombre']),
+        filter_key("recompensa", digimon['recompensa']),
+        filter_key("tipo", digimon['tipo'])
+    )
+
+class GuildSettingsManager:
+    """
+    Manages per-guild alert settings with automatic loading and saving
+
+    Only guilds that customized something are stored; every other guild uses
+    DEFAULT_GUILD_SETTINGS. Recipients of each (Digimon, offset) timer chain
+    are precomputed as a set of guild IDs. A settings change or a guild
+    joining/leaving only updates that guild's membership in the cached sets,
+    so dispatch touches the interested guilds and never loops over all of them.
+    """
+
+    def __init__(self, data_file: str = "data/guild_settings.json",
+                 lock_factory: Optional[Callable[[], ContextManager]] = None):
+        self.data_file = data_file
+        self.lock_factory = lock_factory or nullcontext
+        self._transaction_depth = 0
+        self.guilds: Dict[int, Dict[str, Any]] = {}
+        self.known_guilds: Set[int] = set()
+        self._custom_offsets: Set[int] = set()
+        self._digest_index: Dict[int, Set[int]] = {}
+        self._recipients: Dict[Tuple[str, int], Tuple[Dict[str, Any], Set[int]]] = {}
+        self._change_listeners: List[Callable[[], None]] = []
+        self._data_signature = None
+        self.load_data()
+
+    def add_change_listener(self, callback: Callable[[], None]):
+        """Register a callback invoked after every settings change"""
+        self._change_listeners.append(callback)
+
+    def _mark_changed(self, guild_id: int):
+        self._refresh_indexes()
+        self._update_recipients(guild_id)
+        for callback in self._change_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"❌ Error in guild settings listener: {e}")
+
+    def load_data(self):
+        """Load guild settings from file"""
+        try:
+            if os.path.exists(self.data_file):
+                with open(self.data_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.guilds = {int(guild_id): settings for guild_id, settings in data.get('guilds', {}).items()}
+                self._data_signature = self._file_signature()
+                logger.info(f"✅ Loaded settings for {len(self.guilds)} guild(s) from {self.data_file}")
+        except Exception as e:
+            logger.error(f"❌ Error loading guild settings: {e}")
+            self.guilds = {}
+        self._refresh_indexes()
+        self.invalidate_recipients()
+
+    def save_data(self) -> bool:
+        """Save guild settings to file"""
+        try:
+            os.makedirs(os.path.dirname(self.data_file) if os.path.dirname(self.data_file) else '.', exist_ok=True)
+
+            data = {
+                'guilds': {str(guild_id): settings for guild_id, settings in self.guilds.items()},
+                'last_updated': datetime.now().isoformat(),
+                'version': '1.0'
+            }
+
+            tmp_file = f"{self.data_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, self.data_file)
+            self._data_signature = self._file_signature()
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Error saving guild settings: {e}")
+            return False
+
+    def _file_signature(self) -> Optional[Tuple[int, int, int]]:
+        # Every save replaces the file, so the inode changes even within one mtime tick
+        try:
+            stat = os.stat(self.data_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def reload_if_changed(self) -> bool:
+        """Reload settings if another process (the other HA instance) modified the file"""
+        try:
+            signature = self._file_signature()
+        except OSError as e:
+            logger.error(f"❌ Error checking guild settings file: {e}")
+            return False
+        if signature is None or signature == self._data_signature:
+            return False
+        self.load_data()
+        for callback in self._change_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"❌ Error in guild settings listener: {e}")
+        return True
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Read-modify-write under the shared lock
+
+        Both HA instances serve commands and save the whole file, so every change
+        first picks up the other instance's writes. Nested calls reuse the
+        outer transaction.
+        """
+        if self._transaction_depth:
+            yield
+            return
+        with self.lock_factory():
+            self._transaction_depth += 1
+            try:
+                self.reload_if_changed()
+                yield
+            finally:
+                self._transaction_depth -= 1
+
+    def _refresh_indexes(self):
+        self._custom_offsets = {offset for guild_id in self.guilds for offset in self.alert_offsets(guild_id)}
+        digest_index: Dict[int, Set[int]] = {}
+        for guild_id in self.guilds:
+            if self._setting(guild_id, 'digest'):
+                digest_index.setdefault(self._setting(guild_id, 'digest_hour'), set()).add(guild_id)
+        self._digest_index = digest_index
+
+    def get(self, guild_id: int) -> Dict[str, Any]:
+        """Get the effective settings of a guild (defaults merged with overrides)"""
+        settings = dict(DEFAULT_GUILD_SETTINGS)
+        settings.update(self.guilds.get(guild_id, {}))
+        return settings
+
+    def _setting(self, guild_id: int, key: str) -> Any:
+        """Get one effective setting without copying the whole settings dict"""
+        return self.guilds.get(guild_id, DEFAULT_GUILD_SETTINGS).get(key, DEFAULT_GUILD_SETTINGS[key])
+
+    def is_custom(self, guild_id: int) -> bool:
+        """Check whether a guild overrides the default settings"""
+        return guild_id in self.guilds
+
+    def update(self, guild_id: int, updates: Dict[str, Any]) -> bool:
+        """Validate and store setting overrides for a guild"""
+        with self._transaction():
+            try:
+                for key, value in updates.items():
+                    if key not in DEFAULT_GUILD_SETTINGS:
+                        raise ValueError(f"Unknown setting: {key}")
+                    if key == 'warning_offsets':
+                        if any(not isinstance(offset, int) or offset <= 0 for offset in value):
+                            raise ValueError("Warning offsets must be positive minutes")
+                        updates[key] = sorted(set(value), reverse=True)
+                    elif key == 'mention' and value not in MENTION_POLICIES:
+                        raise ValueError(f"Mention policy must be one of {MENTION_POLICIES}")
+                    elif key == 'quiet_hours' and value is not None:
+                        start, end = value
+                        if not (0 <= start < 24 and 0 <= end < 24) or start == end:
+                            raise ValueError("Quiet hours must be two different hours between 0 and 23")
+                        updates[key] = [start, end]
+                    elif key == 'filters':
+                        if any(entry.split(":", 1)[0] not in FILTER_KINDS for entry in value):
+                            raise ValueError(f"Filters must start with one of {FILTER_KINDS}")
+                        updates[key] = sorted(set(value))
+                    elif key == 'role_pings':
+                        if any(entry != ANY_DIGIMON and entry.split(":", 1)[0] not in FILTER_KINDS for entry in value):
+                            raise ValueError(f"Role pings must be '{ANY_DIGIMON}' or start with one of {FILTER_KINDS}")
+                        updates[key] = {entry: int(role_id) for entry, role_id in value.items()}
+                    elif key == 'digest_hour' and not (isinstance(value, int) and 0 <= value < 24):
+                        raise ValueError("Digest hour must be between 0 and 23")
+
+                self.guilds.setdefault(guild_id, {}).update(updates)
+                self.save_data()
+                self._mark_changed(guild_id)
+                logger.info(f"✅ Updated alert settings for guild {guild_id}: {updates}")
+                return True
+
+            except Exception as e:
+                logger.error(f"❌ Error updating guild settings: {e}")
+                return False
+
+    def reset(self, guild_id: int) -> bool:
+        """Restore the default settings for a guild"""
+        with self._transaction():
+            if self.guilds.pop(guild_id, None) is None:
+                return False
+            self.save_data()
+            self._mark_changed(guild_id)
+            logger.info(f"🔄 Reset alert settings for guild {guild_id}")
+            return True
+
+    def add_filter(self, guild_id: int, kind: str, value: str) -> bool:
+        """Only alert the guild for this Digimon, type or reward (filters accumulate)"""
+        with self._transaction():
+            filters = set(self._setting(guild_id, 'filters'))
+            filters.add(filter_key(kind, value))
+            return self.update(guild_id, {'filters': list(filters)})
+
+    def remove_filter(self, guild_id: int, kind: Optional[str] = None, value: Optional[str] = None) -> bool:
+        """Remove one filter, or every filter if kind is None"""
+        with self._transaction():
+            filters = set(self._setting(guild_id, 'filters'))
+            if kind is None:
+                filters.clear()
+            else:
+                filters.discard(filter_key(kind, value))
+            return self.update(guild_id, {'filters': list(filters)})
+
+    def set_role_ping(self, guild_id: int, role_id: Optional[int], kind: Optional[str] = None,
+                      value: Optional[str] = None) -> bool:
+        """Ping a role on spawns of a Digimon, type or reward (kind None = every spawn); role None removes it"""
+        with self._transaction():
+            key = ANY_DIGIMON if kind is None else filter_key(kind, value)
+            role_pings = dict(self._setting(guild_id, 'role_pings'))
+            if role_id is None:
+                role_pings.pop(key, None)
+            else:
+                role_pings[key] = role_id
+            return self.update(guild_id, {'role_pings': role_pings})
+
+    def alert_offsets(self, guild_id: Optional[int] = None) -> List[int]:
+        """
+        Alert offsets in minutes before spawn for a guild (0 = spawn alert)
+
+        Without guild_id, returns the default offsets. Guilds in digest mode
+        get no per-spawn alerts.
+        """
+        settings = self.guilds.get(guild_id, DEFAULT_GUILD_SETTINGS) if guild_id is not None else DEFAULT_GUILD_SETTINGS
+        if guild_id is not None and settings.get('digest', DEFAULT_GUILD_SETTINGS['digest']):
+            return []
+        offsets = list(settings.get('warning_offsets', DEFAULT_GUILD_SETTINGS['warning_offsets']))
+        if settings.get('spawn_alert', DEFAULT_GUILD_SETTINGS['spawn_alert']):
+            offsets.append(0)
+        return offsets
+
+    def all_offsets(self) -> Set[int]:
+        """Every offset used by the defaults or by any guild"""
+        return set(self.alert_offsets()) | self._custom_offsets
+
+    # Guild membership (kept in sync by the bot's guild join/remove events)
+
+    def set_guilds(self, guild_ids: Iterable[int]):
+        """Replace the set of guilds the bot is in"""
+        self.known_guilds = set(guild_ids)
+        self.invalidate_recipients()
+
+    def add_guild(self, guild_id: int):
+        """Register a guild the bot joined"""
+        self.known_guilds.add(guild_id)
+        self._update_recipients(guild_id)
+
+    def remove_guild(self, guild_id: int):
+        """Forget a guild the bot left"""
+        self.known_guilds.discard(guild_id)
+        self._update_recipients(guild_id)
+
+    # Precomputed recipients per (Digimon, offset)
+
+    def invalidate_recipients(self, version: Optional[int] = None):
+        """Drop every precomputed recipient set (e.g. after the roster changes)"""
+        self._recipients = {}
+
+    def passes_filters(self, guild_id: int, digimon: Dict[str, Any]) -> bool:
+        """Check whether a Digimon passes the guild's filters (no filters = every Digimon)"""
+        filters = self._setting(guild_id, 'filters')
+        return not filters or any(key in filters for key in digimon_keys(digimon))
+
+    def wants_alert(self, guild_id: int, digimon: Dict[str, Any], offset: int) -> bool:
+        """Check whether a guild wants the alert of a Digimon at `offset` minutes before spawn"""
+        if not self.passes_filters(guild_id, digimon):
+            return False
+
+        offsets = self.alert_offsets(guild_id)
+        if offset in offsets:
+            return True
+        # The Digimon's own reminders go to every guild with warnings enabled
+        return offset > 0 and offset in digimon.get('avisos_minutos', ()) and any(offsets)
+
+    def _update_recipients(self, guild_id: int):
+        """Recompute one guild's membership in every cached recipient set"""
+        member = guild_id in self.known_guilds
+        for (_, offset), (digimon, recipients) in self._recipients.items():
+            if member and self.wants_alert(guild_id, digimon, offset):
+                recipients.add(guild_id)
+            else:
+                recipients.discard(guild_id)
+
+    def recipients_for(self, digimon: Dict[str, Any], offset: int) -> Set[int]:
+        """
+        Guilds that receive the alert of a Digimon at `offset` minutes before spawn
+
+        Built on first use and then maintained incrementally.
+        """
+        key = (digimon['nombre'], offset)
+        cached = self._recipients.get(key)
+        if cached is None:
+            recipients = {guild_id for guild_id in self.known_guilds if self.wants_alert(guild_id, digimon, offset)}
+            cached = self._recipients[key] = (digimon, recipients)
+        return cached[1]
+
+    def digest_guilds(self, hour: int) -> Set[int]:
+        """Guilds in digest mode whose daily summary is due at `hour` KST"""
+        guilds = self._digest_index.get(hour, set()) & self.known_guilds
+        if DEFAULT_GUILD_SETTINGS['digest'] and DEFAULT_GUILD_SETTINGS['digest_hour'] == hour:
+            guilds |= {guild_id for guild_id in self.known_guilds if guild_id not in self.guilds}
+        return guilds
+
+    def in_quiet_hours(self, guild_id: int, momento: datetime) -> bool:
+        """Check whether a KST datetime falls inside the guild's quiet hours"""
+        quiet_hours = self._setting(guild_id, 'quiet_hours')
+        if not quiet_hours:
+            return False
+        start, end = quiet_hours
+        if start < end:
+            return start <= momento.hour < end
+        return momento.hour >= start or momento.hour < end
+
+    def mention_for(self, guild_id: int, digimon: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Message content used to mention members on spawn alerts
+
+        The most specific role ping wins (Digimon, then reward, then type, then
+        any); without one, the guild's mention policy applies.
+        """
+        role_pings = self._setting(guild_id, 'role_pings')
+        if role_pings:
+            keys = (digimon_keys(digimon) if digimon else ()) + (ANY_DIGIMON,)
+            for key in keys:
+                if key in role_pings:
+                    return f"<@&{role_pings[key]}>"
+
+        mention = self._setting(guild_id, 'mention')
+        return {"everyone": "@everyone", "here": "@here"}.get(mention, "")
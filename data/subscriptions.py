@@ -0,0 +1,301 @@
+import json
+import os
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Callable, ContextManager, Set, Tuple
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTION_KINDS = ("digimon", "tipo", "recompensa")
+
+class SubscriptionManager:
+    """
+    Manages per-user DM subscriptions to a Digimon, a type or a reward
+
+    An inverted index maps (kind, value) to the subscribed users, and the
+    recipients of each Digimon are cached as a single set, so resolving who
+    gets a DM when a timer fires costs O(subscribers) without scanning users.
+    A subscription change only moves that user between index entries and
+    cached recipient sets.
+
+    Both HA instances serve /subscribe, so every change reloads the file under
+    the shared lock before saving it. Users whose DMs turn out to be closed are
+    paused in memory during a fan-out and written in one batch by flush_async.
+    """
+
+    def __init__(self, data_file: str = "data/subscriptions.json", max_per_user: int = 25,
+                 lock_factory: Optional[Callable[[], ContextManager]] = None):
+        self.data_file = data_file
+        self.max_per_user = max_per_user
+        # flush_async writes from a worker thread, so even a single instance needs a lock
+        self._thread_lock = threading.Lock()
+        self.lock_factory = lock_factory or (lambda: self._thread_lock)
+        self.users: Dict[int, Dict[str, Any]] = {}
+        self._index: Dict[Tuple[str, str], Set[int]] = {}
+        self._recipients: Dict[str, Tuple[Tuple[Tuple[str, str], ...], Set[int]]] = {}
+        self._pending_closed: Set[int] = set()
+        self._transaction_depth = 0
+        self._data_signature = None
+        self.load_data()
+
+    def load_data(self):
+        """Load subscriptions from file"""
+        try:
+            if os.path.exists(self.data_file):
+                with open(self.data_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.users = {int(user_id): user for user_id, user in data.get('users', {}).items()}
+                self._data_signature = self._file_signature()
+                logger.info(f"✅ Loaded subscriptions for {len(self.users)} user(s) from {self.data_file}")
+        except Exception as e:
+            logger.error(f"❌ Error loading subscriptions: {e}")
+            self.users = {}
+        # Closed DMs not written yet stay paused across reloads
+        for user_id in self._pending_closed:
+            if user_id in self.users:
+                self.users[user_id]['dm_closed'] = True
+        self._rebuild_index()
+
+    def _file_signature(self) -> Optional[Tuple[int, int, int]]:
+        # Every save replaces the file, so the inode changes even within one mtime tick
+        try:
+            stat = os.stat(self.data_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _write_file(self, users: Dict[str, Any]):
+        os.makedirs(os.path.dirname(self.data_file) if os.path.dirname(self.data_file) else '.', exist_ok=True)
+        data = {
+            'users': users,
+            'last_updated': datetime.now().isoformat(),
+            'version': '1.0'
+        }
+        tmp_file = f"{self.data_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.data_file)
+
+    def save_data(self) -> bool:
+        """Save subscriptions to file"""
+        try:
+            self._write_file({str(user_id): user for user_id, user in self.users.items()})
+            self._data_signature = self._file_signature()
+            # The whole file was written, pending closed DMs included
+            self._pending_closed.clear()
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Error saving subscriptions: {e}")
+            return False
+
+    def reload_if_changed(self) -> bool:
+        """Reload subscriptions if another process (the other HA instance) modified the file"""
+        try:
+            signature = self._file_signature()
+        except OSError as e:
+            logger.error(f"❌ Error checking subscriptions file: {e}")
+            return False
+        if signature is None or signature == self._data_signature:
+            return False
+        self.load_data()
+        return True
+
+    @contextmanager
+    def _transaction(self):
+        """Read-modify-write under the shared lock (nested calls reuse the outer one)"""
+        if self._transaction_depth:
+            yield
+            return
+        with self.lock_factory():
+            self._transaction_depth += 1
+            try:
+                self.reload_if_changed()
+                yield
+            finally:
+                self._transaction_depth -= 1
+
+    def _write_closed(self, user_ids: Set[int], expected: Optional[Tuple[int, int, int]]):
+        """
+        Mark users as dm_closed in the file itself (runs in a worker thread)
+
+        Returns:
+            (whether another instance changed the file since our last load, new signature)
+        """
+        with self.lock_factory():
+            before = self._file_signature()
+            users = {}
+            if before is not None:
+                with open(self.data_file, 'r', encoding='utf-8') as f:
+                    users = json.load(f).get('users', {})
+            for user_id in user_ids:
+                # A user who subscribed again meanwhile is no longer pending
+                if user_id in self._pending_closed and str(user_id) in users:
+                    users[str(user_id)]['dm_closed'] = True
+            self._write_file(users)
+            return before != expected, self._file_signature()
+
+    async def flush_async(self) -> bool:
+        """Write the users paused by mark_dm_closed since the last flush, off the event loop"""
+        if not self._pending_closed:
+            return True
+        closed = set(self._pending_closed)
+        expected = self._data_signature
+        try:
+            changed_elsewhere, signature = await asyncio.to_thread(self._write_closed, closed, expected)
+        except Exception as e:
+            logger.error(f"❌ Error saving closed DMs: {e}")
+            return False
+        self._pending_closed -= closed
+        if changed_elsewhere:
+            self.load_data()
+        elif self._data_signature == expected:
+            self._data_signature = signature
+        return True
+
+    @staticmethod
+    def _user_keys(user: Optional[Dict[str, Any]]) -> Set[Tuple[str, str]]:
+        """Index keys of a user (none while their DMs are closed)"""
+        if not user or user.get('dm_closed'):
+            return set()
+        return {(kind, value.lower()) for kind in SUBSCRIPTION_KINDS for value in user.get(kind, [])}
+
+    def _rebuild_index(self):
+        index: Dict[Tuple[str, str], Set[int]] = {}
+        for user_id, user in self.users.items():
+            for key in self._user_keys(user):
+                index.setdefault(key, set()).add(user_id)
+        self._index = index
+        self._recipients = {}
+
+    def _update_user(self, user_id: int, previous_keys: Set[Tuple[str, str]]):
+        """Move one user between index entries and cached recipient sets after a change"""
+        keys = self._user_keys(self.users.get(user_id))
+        for key in previous_keys - keys:
+            users = self._index.get(key)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._index[key]
+        for key in keys - previous_keys:
+            self._index.setdefault(key, set()).add(user_id)
+
+        for digimon_keys, recipients in self._recipients.values():
+            if keys.intersection(digimon_keys):
+                recipients.add(user_id)
+            else:
+                recipients.discard(user_id)
+
+    def invalidate_recipients(self, version: Optional[int] = None):
+        """Drop cached recipients per Digimon (e.g. after a Digimon changes type)"""
+        self._recipients = {}
+
+    def subscribers_for(self, digimon: Dict[str, Any]) -> Set[int]:
+        """Users to DM about a Digimon (subscribed to its name, type or reward)"""
+        cached = self._recipients.get(digimon['nombre'])
+        if cached is None:
+            digimon_keys = tuple((kind, value.lower()) for kind, value in (
+                ("digimon", digimon['nombre']), ("tipo", digimon['tipo']), ("recompensa", digimon['recompensa'])))
+            recipients = set()
+            for key in digimon_keys:
+                recipients |= self._index.get(key, set())
+            cached = self._recipients[digimon['nombre']] = (digimon_keys, recipients)
+        return cached[1]
+
+    def get_user(self, user_id: int) -> Dict[str, Any]:
+        """Get the subscriptions of a user"""
+        user = self.users.get(user_id, {})
+        subscriptions = {kind: list(user.get(kind, [])) for kind in SUBSCRIPTION_KINDS}
+        subscriptions['dm_closed'] = user.get('dm_closed', False)
+        return subscriptions
+
+    def subscribe(self, user_id: int, kind: str, value: str) -> bool:
+        """
+        Subscribe a user to a Digimon, type or reward
+
+        Subscribing again also re-enables DMs for a user whose DMs were closed.
+        """
+        if kind not in SUBSCRIPTION_KINDS:
+            raise ValueError(f"Subscription kind must be one of {SUBSCRIPTION_KINDS}")
+
+        with self._transaction():
+            user = self.users.get(user_id, {})
+            if any(existing.lower() == value.lower() for existing in user.get(kind, [])):
+                if user.pop('dm_closed', False):
+                    self._pending_closed.discard(user_id)
+                    self.save_data()
+                    self._update_user(user_id, set())
+                return False
+
+            # Checked before touching anything: a rejected subscribe leaves the user as it was
+            if sum(len(user.get(k, [])) for k in SUBSCRIPTION_KINDS) >= self.max_per_user:
+                raise ValueError(f"Subscription limit reached ({self.max_per_user})")
+
+            previous_keys = self._user_keys(user)
+            user.pop('dm_closed', None)
+            self._pending_closed.discard(user_id)
+            user.setdefault(kind, []).append(value)
+            self.users[user_id] = user
+            self.save_data()
+            self._update_user(user_id, previous_keys)
+            logger.info(f"🔔 User {user_id} subscribed to {kind} '{value}'")
+            return True
+
+    def unsubscribe(self, user_id: int, kind: Optional[str] = None, value: Optional[str] = None) -> int:
+        """
+        Remove subscriptions of a user (all of them if kind is None)
+
+        Returns:
+            Number of subscriptions removed
+        """
+        with self._transaction():
+            user = self.users.get(user_id)
+            if not user:
+                return 0
+
+            previous_keys = self._user_keys(user)
+            removed = 0
+            if kind is None:
+                removed = sum(len(user.get(k, [])) for k in SUBSCRIPTION_KINDS)
+                del self.users[user_id]
+            else:
+                values = user.get(kind, [])
+                kept = [existing for existing in values if value is not None and existing.lower() != value.lower()]
+                removed = len(values) - len(kept)
+                user[kind] = kept
+                if not any(user.get(k) for k in SUBSCRIPTION_KINDS):
+                    del self.users[user_id]
+
+            if removed:
+                self.save_data()
+                self._update_user(user_id, previous_keys)
+                logger.info(f"🔕 User {user_id} removed {removed} subscription(s)")
+            return removed
+
+    def mark_dm_closed(self, user_id: int):
+        """
+        Stop DMing a user whose DMs are closed until they subscribe again
+
+        Takes effect immediately in memory; the file is updated by the next flush_async.
+        """
+        user = self.users.get(user_id)
+        if user is None or user.get('dm_closed'):
+            return
+        previous_keys = self._user_keys(user)
+        user['dm_closed'] = True
+        self._pending_closed.add(user_id)
+        self._update_user(user_id, previous_keys)
+        logger.info(f"📪 DMs closed for user {user_id}, subscriptions paused")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Subscription statistics"""
+        return {
+            'users': len(self.users),
+            'subscriptions': sum(len(user.get(kind, [])) for user in self.users.values() for kind in SUBSCRIPTION_KINDS),
+            'paused_users': sum(1 for user in self.users.values() if user.get('dm_closed')),
+            'unsaved_paused_users': len(self._pending_closed),
+            'index_keys': len(self._index)
+        }
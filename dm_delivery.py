@@ -0,0 +1,169 @@
+import asyncio
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, Iterable, Optional
+import discord
+from rate_limit import TokenBucket
+from data.default_data import LEDGER_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Código de la API de Discord: "Cannot send messages to this user" (DMs cerrados)
+DM_CERRADOS = 50007
+
+def percentil(muestras, fraccion: float) -> Optional[float]:
+    """Percentil simple sobre una colección de muestras (None si está vacía)"""
+    if not muestras:
+        return None
+    ordenadas = sorted(muestras)
+    return ordenadas[min(len(ordenadas) - 1, int(fraccion * len(ordenadas)))]
+
+class DMDeliveryPipeline:
+    """
+    Cola de envío masivo de mensajes directos con límite de ritmo
+
+    Las alertas se encolan por usuario y un número fijo de workers las envía
+    respetando un token bucket global. Los DMs cerrados pausan las suscripciones
+    del usuario, los 429 vacían el bucket durante el Retry-After y los demás
+    errores HTTP se reintentan con espera exponencial. Cada entrega se registra
+    en el ledger, así que un reintento o un failover no duplica DMs.
+    """
+
+    def __init__(self, bot, rate_per_second: float, workers: int = 2, max_attempts: int = 3,
+                 backoff_seconds: float = 5):
+        self.bot = bot
+        self.limiter = TokenBucket(rate_per_second)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._pendientes_reintento = 0
+        # Latencia de entrega (encolado -> enviado) de las últimas entregas
+        self.latencias = deque(maxlen=1000)
+        self.contadores = {"enqueued": 0, "delivered": 0, "duplicates": 0, "dm_closed": 0,
+                           "retried": 0, "rate_limited": 0, "failed": 0}
+
+    def start(self):
+        """Arranca los workers (requiere un event loop en marcha)"""
+        if self._tasks:
+            return
+        self.queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"📬 Pipeline de DMs iniciado con {self.workers} worker(s)")
+
+    async def stop(self):
+        """Detiene los workers; los DMs pendientes se descartan"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, user_ids: Iterable[int], embed: discord.Embed, alert: Dict[str, Any]) -> int:
+        """
+        Encola una alerta para varios usuarios
+
+        Returns:
+            Número de DMs encolados
+        """
+        if self.queue is None:
+            logger.warning("⚠️ Pipeline de DMs sin iniciar, alerta descartada")
+            return 0
+
+        encolados = 0
+        ahora = time.monotonic()
+        for user_id in user_ids:
+            self.queue.put_nowait({"user_id": user_id, "embed": embed, "alert": alert,
+                                   "enqueued_at": ahora, "attempts": 0})
+            encolados += 1
+        self.contadores["enqueued"] += encolados
+        return encolados
+
+    def _reintentar(self, job: Dict[str, Any], espera: float):
+        """Vuelve a encolar un DM tras `espera` segundos"""
+        self.contadores["retried"] += 1
+        self._pendientes_reintento += 1
+
+        def reencolar():
+            self._pendientes_reintento -= 1
+            self.queue.put_nowait(job)
+
+        asyncio.get_running_loop().call_later(espera, reencolar)
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._deliver(job)
+            except Exception as e:
+                self.contadores["failed"] += 1
+                logger.error(f"❌ Error enviando DM a {job['user_id']}: {e}")
+            finally:
+                self.queue.task_done()
+                # Entregas al journal por lotes y al vaciarse la cola; la compactación queda para el tick
+                ledger = self.bot.alert_ledger
+                if self.queue.empty() or ledger.pending_records >= LEDGER_SETTINGS["journal_batch_records"]:
+                    await ledger.flush_async(compactar=False)
+                if self.queue.empty():
+                    # Usuarios con DMs cerrados de este lote, en una sola escritura
+                    await self.bot.subscriptions.flush_async()
+
+    async def _deliver(self, job: Dict[str, Any]):
+        ledger = self.bot.alert_ledger
+        alert = job["alert"]
+        key = ledger.make_key(f"dm:{job['user_id']}", alert['digimon'], alert['horario'],
+                              alert['occurrence'], alert['tipo'])
+        if ledger.was_delivered(key):
+            self.contadores["duplicates"] += 1
+            return
+
+        job["attempts"] += 1
+        await self.limiter.acquire()
+
+        try:
+            user = self.bot.get_user(job["user_id"]) or await self.bot.fetch_user(job["user_id"])
+            message = await user.send(embed=job["embed"])
+        except discord.NotFound:
+            # La cuenta ya no existe
+            self.contadores["failed"] += 1
+            self.bot.subscriptions.unsubscribe(job["user_id"])
+            return
+        except discord.Forbidden as e:
+            if e.code == DM_CERRADOS:
+                self.contadores["dm_closed"] += 1
+                self.bot.subscriptions.mark_dm_closed(job["user_id"])
+            else:
+                self.contadores["failed"] += 1
+                logger.warning(f"⚠️ Sin permisos para enviar DM a {job['user_id']}: {e}")
+            return
+        except discord.HTTPException as e:
+            if e.status == 429:
+                self.contadores["rate_limited"] += 1
+                retry_after = float(e.response.headers.get("Retry-After", self.backoff_seconds))
+                self.limiter.penalize(retry_after)
+                espera = retry_after
+            else:
+                espera = self.backoff_seconds * 2 ** (job["attempts"] - 1)
+
+            if job["attempts"] < self.max_attempts:
+                self._reintentar(job, espera)
+            else:
+                self.contadores["failed"] += 1
+                logger.warning(f"⚠️ DM a {job['user_id']} descartado tras {job['attempts']} intentos: {e}")
+            return
+
+        ledger.record_delivery(key, alert['occurrence'], message.channel.id, message.id)
+        self.contadores["delivered"] += 1
+        self.latencias.append(time.monotonic() - job["enqueued_at"])
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Contadores y latencia de entrega (segundos)"""
+        return {
+            **self.contadores,
+            'queued': self.queue.qsize() if self.queue else 0,
+            'waiting_retry': self._pendientes_reintento,
+            'latency_p50': percentil(self.latencias, 0.50),
+            'latency_p95': percentil(self.latencias, 0.95),
+            'latency_max': max(self.latencias) if self.latencias else None
+        }
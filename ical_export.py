@@ -0,0 +1,142 @@
+import re
+import datetime
+import logging
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
+import pytz
+from data.default_data import ICS_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Longitud máxima de línea del RFC 5545 (en octetos, sin el CRLF)
+LONGITUD_LINEA = 75
+
+def escapar_texto(texto: str) -> str:
+    """Escapa un valor TEXT de iCalendar (barra invertida, comas, punto y coma y saltos de línea)"""
+    return (str(texto).replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+def plegar_linea(linea: str) -> str:
+    """Pliega una línea de contenido a 75 octetos sin partir caracteres UTF-8"""
+    if len(linea.encode("utf-8")) <= LONGITUD_LINEA:
+        return linea + "\r\n"
+
+    partes, actual, octetos = [], "", 0
+    for caracter in linea:
+        tamano = len(caracter.encode("utf-8"))
+        # Las líneas de continuación empiezan con un espacio que también cuenta
+        limite = LONGITUD_LINEA if not partes else LONGITUD_LINEA - 1
+        if octetos + tamano > limite:
+            partes.append(actual)
+            actual, octetos = "", 0
+        actual += caracter
+        octetos += tamano
+    partes.append(actual)
+    return "\r\n ".join(partes) + "\r\n"
+
+def formato_utc(momento: datetime.datetime) -> str:
+    """Fecha-hora en UTC con el formato básico de iCalendar (20250818T102900Z)"""
+    return momento.astimezone(pytz.utc).strftime("%Y%m%dT%H%M%SZ")
+
+def uid_evento(digimon: Dict[str, Any], horario: Dict[str, int]) -> str:
+    """UID estable por horario, para que los clientes actualicen en lugar de duplicar al reimportar"""
+    nombre = re.sub(r"[^a-z0-9]+", "-", digimon["nombre"].lower()).strip("-")
+    return f"{nombre}-{horario['hora']:02d}{horario['minuto']:02d}@{ICS_SETTINGS['uid_domain']}"
+
+def generar_evento(digimon: Dict[str, Any], horario: Dict[str, int], dtstamp: str) -> Iterator[str]:
+    """
+    Produce las líneas de un VEVENT con su RRULE
+
+    Cada horario es una serie FREQ=DAILY;INTERVAL=recurrencia_dias que
+    empieza en fecha_inicio, así que el archivo no crece con el horizonte.
+    """
+    inicio = digimon["fecha_inicio"].replace(
+        hour=horario["hora"], minute=horario["minuto"], second=0, microsecond=0
+    )
+
+    yield "BEGIN:VEVENT"
+    yield f"UID:{uid_evento(digimon, horario)}"
+    yield f"DTSTAMP:{dtstamp}"
+    yield f"DTSTART:{formato_utc(inicio)}"
+    yield f"DURATION:PT{ICS_SETTINGS['event_minutes']}M"
+    yield f"RRULE:FREQ=DAILY;INTERVAL={digimon['recurrencia_dias']}"
+    yield f"SUMMARY:{escapar_texto(digimon['nombre'] + ' (raid)')}"
+    yield f"LOCATION:{escapar_texto(digimon['mapa'])}"
+    descripcion = f"Tipo: {digimon['tipo']}\nRecompensa: {digimon['recompensa']}"
+    yield f"DESCRIPTION:{escapar_texto(descripcion)}"
+    yield f"CATEGORIES:{escapar_texto(digimon['tipo'])}"
+
+    # Un recordatorio por aviso del Digimon (o el aviso por defecto)
+    for minutos in digimon.get("avisos_minutos") or ICS_SETTINGS["alarm_minutes"]:
+        yield "BEGIN:VALARM"
+        yield "ACTION:DISPLAY"
+        yield f"DESCRIPTION:{escapar_texto(digimon['nombre'])}"
+        yield f"TRIGGER:-PT{minutos}M"
+        yield "END:VALARM"
+    yield "END:VEVENT"
+
+def generar_ics(digimons: Iterable[Dict[str, Any]], filtro=None,
+                dtstamp: Optional[datetime.datetime] = None) -> Iterator[str]:
+    """
+    Generador de un calendario iCalendar completo, línea a línea (ya plegadas y con CRLF)
+
+    Args:
+        digimons: Roster a exportar
+        filtro: Función digimon -> bool para exportar solo parte del roster
+        dtstamp: Momento de generación (por defecto ahora)
+    """
+    sello = formato_utc(dtstamp or datetime.datetime.now(pytz.utc))
+
+    lineas = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{ICS_SETTINGS['prodid']}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escapar_texto(ICS_SETTINGS['calendar_name'])}",
+        "X-WR-TIMEZONE:Asia/Seoul"
+    ]
+    for linea in lineas:
+        yield plegar_linea(linea)
+
+    for digimon in digimons:
+        if filtro is not None and not filtro(digimon):
+            continue
+        for horario in digimon["horarios"]:
+            try:
+                for linea in generar_evento(digimon, horario, sello):
+                    yield plegar_linea(linea)
+            except Exception as e:
+                logger.error(f"Error exportando {digimon.get('nombre', 'Unknown')} a iCalendar: {e}")
+
+    yield plegar_linea("END:VCALENDAR")
+
+_ics_cache: Dict[Tuple, bytes] = {}
+_ics_cache_version: Optional[int] = None
+
+def obtener_ics(bot, tipo: Optional[str] = None, guild_id: Optional[int] = None) -> bytes:
+    """
+    Archivo .ics del roster, filtrado por tipo y/o por los filtros de alertas de un servidor
+
+    El resultado se guarda por versión de datos y filtro: repetir la
+    exportación sin cambios en el roster no vuelve a generar nada.
+    """
+    global _ics_cache_version
+    if _ics_cache_version != bot.digimon_manager.version:
+        _ics_cache.clear()
+        _ics_cache_version = bot.digimon_manager.version
+
+    filtros_servidor = None
+    if guild_id is not None:
+        filtros_servidor = tuple(sorted(bot.guild_settings.get(guild_id)['filters']))
+    clave = (tipo.lower() if tipo else None, filtros_servidor)
+
+    contenido = _ics_cache.get(clave)
+    if contenido is None:
+        def filtro(digimon: Dict[str, Any]) -> bool:
+            if tipo and digimon["tipo"].lower() != tipo.lower():
+                return False
+            return guild_id is None or bot.guild_settings.passes_filters(guild_id, digimon)
+
+        contenido = "".join(generar_ics(bot.digimon_manager.get_all_digimon(), filtro)).encode("utf-8")
+        _ics_cache[clave] = contenido
+    return contenido
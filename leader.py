@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import uuid
+import socket
+import logging
+import datetime
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin flock, el lease sigue funcionando para una sola instancia
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class AlertLease:
+    """
+    Lease local para alta disponibilidad activo/pasivo.
+
+    Solo la instancia que posee el lease ejecuta `raid_monitor` y envía alertas.
+    El lease se guarda en un archivo JSON compartido y cada lectura/escritura se
+    hace bajo un flock exclusivo, de modo que dos procesos en la misma máquina
+    (o sobre el mismo volumen) nunca se consideran líderes a la vez.
+    """
+
+    def __init__(self, lease_file: str = "data/alert_lease.json", ttl_seconds: int = 30,
+                 instance_id: Optional[str] = None):
+        self.lease_file = lease_file
+        self.lock_file = f"{lease_file}.lock"
+        self.ttl_seconds = ttl_seconds
+        self.instance_id = instance_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+        self.is_leader = False
+        self.leader_since: Optional[float] = None
+        self.takeovers = 0
+        self.last_failover_seconds: Optional[float] = None
+        self.double_send_suspected = 0
+        self.duplicate_ticks_skipped = 0
+
+    def _locked(self):
+        """Abre el archivo de lock y toma un flock exclusivo"""
+        os.makedirs(os.path.dirname(self.lock_file) or '.', exist_ok=True)
+        handle = open(self.lock_file, 'a+')
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        return handle
+
+    @contextmanager
+    def bloqueo(self):
+        """
+        flock exclusivo del lease, compartido por todas las instancias
+
+        Lo usan también los datos que ambas instancias modifican (configuración
+        de servidores, suscripciones) para hacer leer-modificar-guardar sin
+        pisar los cambios de la otra. No es reentrante.
+        """
+        handle = self._locked()
+        try:
+            yield
+        finally:
+            handle.close()
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.lease_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, state: Dict[str, Any]):
+        tmp_file = f"{self.lease_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_file, self.lease_file)
+
+    def try_acquire_or_renew(self) -> bool:
+        """
+        Renueva el lease si somos el líder o lo toma si ha expirado.
+
+        Returns:
+            True si esta instancia es el líder tras la llamada
+        """
+        now = time.time()
+        handle = self._locked()
+        try:
+            state = self._read()
+            holder = state.get('holder')
+            expires_at = state.get('expires_at', 0)
+
+            if holder == self.instance_id or not holder or expires_at <= now:
+                if holder != self.instance_id:
+                    self._on_takeover(state, now)
+                    state['acquired_at'] = now
+                    state['fencing_token'] = state.get('fencing_token', 0) + 1
+
+                state['holder'] = self.instance_id
+                state['expires_at'] = now + self.ttl_seconds
+                state['renewed_at'] = now
+                self._write(state)
+
+                if not self.is_leader:
+                    self.leader_since = now
+                self.is_leader = True
+            else:
+                if self.is_leader:
+                    # Otro proceso tomó el lease mientras creíamos ser líderes
+                    self.double_send_suspected += 1
+                    logger.warning(f"⚠️ Lease perdido: {holder} es ahora líder (posible doble envío)")
+                    self.is_leader = False
+                    self.leader_since = None
+        except Exception as e:
+            logger.error(f"❌ Error renovando lease: {e}")
+            self.is_leader = False
+            self.leader_since = None
+        finally:
+            handle.close()
+
+        return self.is_leader
+
+    def _on_takeover(self, state: Dict[str, Any], now: float):
+        """Registra la toma de control del lease y el tiempo de failover"""
+        previous_holder = state.get('holder')
+        self.takeovers += 1
+
+        if previous_holder:
+            last_heartbeat = state.get('renewed_at', state.get('expires_at', now) - self.ttl_seconds)
+            self.last_failover_seconds = max(0.0, now - last_heartbeat)
+            logger.warning(
+                f"🔁 Failover: {self.instance_id} toma el lease de {previous_holder} "
+                f"tras {self.last_failover_seconds:.1f}s sin heartbeat"
+            )
+        else:
+            logger.info(f"👑 {self.instance_id} adquiere el lease de alertas")
+
+    def record_tick(self, tick: datetime.datetime) -> bool:
+        """
+        Marca un minuto como procesado por el líder.
+
+        Si otro líder ya procesó este minuto (failover en mitad del minuto) se
+        devuelve False para no repetir las alertas.
+
+        Returns:
+            True si el minuto debe procesarse
+        """
+        if not self.is_leader:
+            return False
+
+        tick_iso = tick.isoformat()
+        handle = self._locked()
+        try:
+            state = self._read()
+            if state.get('holder') != self.instance_id:
+                self.is_leader = False
+                self.leader_since = None
+                return False
+
+            if state.get('last_tick') == tick_iso and state.get('last_tick_holder') != self.instance_id:
+                self.duplicate_ticks_skipped += 1
+                logger.warning(f"⚠️ Minuto {tick_iso} ya procesado por {state.get('last_tick_holder')}, se omite")
+                return False
+
+            state['last_tick'] = tick_iso
+            state['last_tick_holder'] = self.instance_id
+            self._write(state)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error registrando tick en el lease: {e}")
+            return False
+        finally:
+            handle.close()
+
+    def release(self):
+        """Libera el lease para que el standby tome el control sin esperar al TTL"""
+        if not self.is_leader:
+            return
+
+        handle = self._locked()
+        try:
+            state = self._read()
+            if state.get('holder') == self.instance_id:
+                state['expires_at'] = 0
+                self._write(state)
+                logger.info(f"👋 Lease liberado por {self.instance_id}")
+        except Exception as e:
+            logger.error(f"❌ Error liberando lease: {e}")
+        finally:
+            self.is_leader = False
+            self.leader_since = None
+            handle.close()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Estadísticas de alta disponibilidad para /status y logs"""
+        state = self._read()
+        return {
+            'instance_id': self.instance_id,
+            'role': 'leader' if self.is_leader else 'standby',
+            'holder': state.get('holder'),
+            'leader_since': self.leader_since,
+            'takeovers': self.takeovers,
+            'last_failover_seconds': self.last_failover_seconds,
+            'double_send_suspected': self.double_send_suspected,
+            'duplicate_ticks_skipped': self.duplicate_ticks_skipped,
+            'ttl_seconds': self.ttl_seconds
+        }
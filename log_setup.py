@@ -0,0 +1,134 @@
+import os
+import gzip
+import json
+import queue
+import atexit
+import shutil
+import logging
+import logging.handlers
+import contextvars
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+# Campos de contexto (alert_id, guild_id...) que se añaden a cada registro del log
+_contexto_log: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("contexto_log", default={})
+
+def asignar_contexto_log(**campos: Any):
+    """
+    Añade o quita (con None) campos de contexto para los logs de la tarea actual
+
+    Cada tarea de asyncio tiene su propia copia del contexto, así que los
+    campos asignados durante el envío de una alerta no se mezclan con los
+    logs de comandos que se ejecutan a la vez.
+    """
+    contexto = dict(_contexto_log.get())
+    for clave, valor in campos.items():
+        if valor is None:
+            contexto.pop(clave, None)
+        else:
+            contexto[clave] = valor
+    _contexto_log.set(contexto)
+
+class FiltroContexto(logging.Filter):
+    """Copia el contexto de la tarea al registro (se ejecuta en el hilo que emite el log)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for clave, valor in _contexto_log.get().items():
+            if not hasattr(record, clave):
+                setattr(record, clave, valor)
+        return True
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro, con alert_id/guild_id cuando están en el contexto"""
+
+    CAMPOS_EXTRA = ("alert_id", "guild_id", "user_id", "command")
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for campo in self.CAMPOS_EXTRA:
+            valor = getattr(record, campo, None)
+            if valor is not None:
+                datos[campo] = valor
+        if record.exc_info:
+            datos["exc"] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+def _comprimir_al_rotar(origen: str, destino: str):
+    """Rotador que guarda el archivo rotado comprimido con gzip"""
+    with open(origen, "rb") as entrada, gzip.open(destino, "wb") as salida:
+        shutil.copyfileobj(entrada, salida)
+    os.remove(origen)
+
+def crear_handler_archivo(archivo: str, rotacion: str, max_bytes: int, cuando: str,
+                          copias: int, comprimir: bool) -> logging.Handler:
+    """Handler de archivo con rotación por tamaño ("size") o por tiempo ("time")"""
+    if rotacion == "time":
+        handler = logging.handlers.TimedRotatingFileHandler(archivo, when=cuando, backupCount=copias,
+                                                            encoding="utf-8", delay=True)
+    elif rotacion == "size":
+        handler = logging.handlers.RotatingFileHandler(archivo, maxBytes=max_bytes, backupCount=copias,
+                                                       encoding="utf-8", delay=True)
+    else:
+        raise ValueError(f"Rotación de logs desconocida: {rotacion} (usa 'size' o 'time')")
+
+    if comprimir:
+        handler.namer = lambda nombre: nombre + ".gz"
+        handler.rotator = _comprimir_al_rotar
+    return handler
+
+def configurar_logging(nivel: str = "INFO", archivo: Optional[str] = "bot.log", formato_archivo: str = "text",
+                       rotacion: str = "size", max_bytes: int = 10 * 1024 * 1024, cuando: str = "midnight",
+                       copias: int = 7, comprimir: bool = True) -> logging.handlers.QueueListener:
+    """
+    Configura un logging que no bloquea el event loop
+
+    Los registros se dejan en una cola en memoria (QueueHandler) y un hilo en
+    segundo plano (QueueListener) los formatea y escribe en consola y en el
+    archivo rotado. La cola se vacía al salir del proceso.
+
+    Args:
+        nivel: Nivel mínimo (DEBUG, INFO, WARNING, ERROR)
+        archivo: Archivo de log (None para solo consola)
+        formato_archivo: "text" o "json" (una línea JSON por registro)
+        rotacion: "size" (max_bytes) o "time" (cuando, p. ej. "midnight")
+        copias: Archivos rotados que se conservan
+        comprimir: Comprimir con gzip los archivos rotados
+
+    Returns:
+        El QueueListener en marcha
+    """
+    formato_texto = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    consola = logging.StreamHandler()
+    consola.setFormatter(formato_texto)
+    handlers = [consola]
+
+    if archivo:
+        handler_archivo = crear_handler_archivo(archivo, rotacion, max_bytes, cuando, copias, comprimir)
+        handler_archivo.setFormatter(FormatoJSON() if formato_archivo == "json" else formato_texto)
+        handlers.append(handler_archivo)
+
+    cola: queue.SimpleQueue = queue.SimpleQueue()
+    handler_cola = logging.handlers.QueueHandler(cola)
+    handler_cola.addFilter(FiltroContexto())
+
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(handler_cola)
+
+    nivel_numerico = getattr(logging, str(nivel).upper(), None)
+    if not isinstance(nivel_numerico, int):
+        nivel_numerico = logging.INFO
+        raiz.warning(f"⚠️ LOG_LEVEL desconocido '{nivel}', usando INFO")
+    raiz.setLevel(nivel_numerico)
+
+    listener = logging.handlers.QueueListener(cola, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,152 @@
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from typing import Dict, Any, List, Optional
+from dm_delivery import percentil
+from metrics import LOOP_LAG, SLOW_CALLBACKS
+
+logger = logging.getLogger(__name__)
+
+def describir_tarea(tarea: Optional[asyncio.Task]) -> str:
+    """Nombre legible de la tarea/corrutina en ejecución"""
+    if tarea is None:
+        return "callback fuera de una tarea"
+    coro = tarea.get_coro()
+    nombre = getattr(coro, "__qualname__", None) or repr(coro)
+    return f"{tarea.get_name()} ({nombre})"
+
+class MonitorEventLoop:
+    """
+    Monitor de salud del event loop
+
+    Un latido asíncrono se despierta cada `intervalo` segundos y mide cuánto
+    tarde llega (lag de planificación). En paralelo, un hilo vigilante
+    comprueba que el latido avance: si el loop lleva más de `umbral` segundos
+    sin volver, captura con sys._current_frames la pila del hilo del loop en
+    ese momento (la llamada que lo está bloqueando) y la tarea en curso. Al
+    reanudarse el latido se cierra el bloqueo con su duración real, se
+    registra en el log y queda disponible para /status.
+    """
+
+    def __init__(self, intervalo: float = 0.5, umbral: float = 0.25, max_eventos: int = 20,
+                 profundidad_pila: int = 12):
+        self.intervalo = intervalo
+        self.umbral = umbral
+        self.profundidad_pila = profundidad_pila
+        self.lags = deque(maxlen=600)
+        self.eventos = deque(maxlen=max_eventos)
+        self.bloqueos = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._hilo_loop: Optional[int] = None
+        self._latido = time.monotonic()
+        self._captura: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._parar = threading.Event()
+        self._vigilante: Optional[threading.Thread] = None
+
+    def start(self):
+        """Arranca el latido y el hilo vigilante (requiere un event loop en marcha)"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._hilo_loop = threading.get_ident()
+        self._latido = time.monotonic()
+        self._parar.clear()
+        self._task = asyncio.create_task(self._latir(), name="loop-monitor")
+        self._vigilante = threading.Thread(target=self._vigilar, name="loop-watchdog", daemon=True)
+        self._vigilante.start()
+        logger.info(f"🩺 Monitor del event loop iniciado (umbral {self.umbral * 1000:.0f} ms)")
+
+    async def stop(self):
+        """Detiene el latido y el hilo vigilante"""
+        self._parar.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _latir(self):
+        while True:
+            inicio = time.monotonic()
+            await asyncio.sleep(self.intervalo)
+            ahora = time.monotonic()
+            self._latido = ahora
+
+            lag = max(0.0, ahora - inicio - self.intervalo)
+            self.lags.append(lag)
+            LOOP_LAG.observe(lag)
+
+            captura, self._captura = self._captura, None
+            if lag >= self.umbral:
+                self._registrar_bloqueo(lag, captura)
+
+    def _vigilar(self):
+        # Revisa varias veces por umbral para capturar la pila mientras el loop sigue bloqueado
+        paso = min(self.intervalo, self.umbral) / 2
+        while not self._parar.wait(paso):
+            if self._captura is not None:
+                continue
+            retraso = time.monotonic() - self._latido - self.intervalo
+            if retraso < self.umbral:
+                continue
+
+            frame = sys._current_frames().get(self._hilo_loop)
+            if frame is None:
+                continue
+            pila = traceback.format_stack(frame)[-self.profundidad_pila:]
+            tarea = asyncio.current_task(self._loop)
+            self._captura = {"tarea": describir_tarea(tarea), "pila": pila}
+
+    def _registrar_bloqueo(self, lag: float, captura: Optional[Dict[str, Any]]):
+        self.bloqueos += 1
+        SLOW_CALLBACKS.inc()
+
+        evento = {
+            "momento": time.time(),
+            "duracion": lag,
+            "tarea": captura["tarea"] if captura else "desconocida (bloqueo más corto que la revisión del vigilante)",
+            "pila": captura["pila"] if captura else []
+        }
+        self.eventos.append(evento)
+
+        mensaje = f"🐢 Event loop bloqueado {lag * 1000:.0f} ms en {evento['tarea']}"
+        if evento["pila"]:
+            logger.warning(mensaje + "\n" + "".join(evento["pila"]).rstrip())
+        else:
+            logger.warning(mensaje)
+
+    @staticmethod
+    def origen(evento: Dict[str, Any]) -> str:
+        """Última línea de código de la pila capturada (archivo:línea función)"""
+        for linea in reversed(evento["pila"]):
+            cabecera = linea.strip().splitlines()[0]
+            if cabecera.startswith("File "):
+                partes = cabecera.split('"')
+                archivo = partes[1].rsplit("/", 1)[-1] if len(partes) > 1 else "?"
+                resto = partes[-1].strip(", ").replace("line ", "").replace(", in ", " ")
+                return f"{archivo}:{resto}"
+        return "?"
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Lag reciente (segundos) y bloqueos detectados"""
+        ultimo = self.eventos[-1] if self.eventos else None
+        return {
+            'lag_p50': percentil(self.lags, 0.50),
+            'lag_p95': percentil(self.lags, 0.95),
+            'lag_max': max(self.lags) if self.lags else None,
+            'slow_callbacks': self.bloqueos,
+            'last_slow': {
+                'duration': ultimo['duracion'],
+                'task': ultimo['tarea'],
+                'origin': self.origen(ultimo),
+                'age_seconds': time.time() - ultimo['momento']
+            } if ultimo else None
+        }
+
+    def recent_events(self) -> List[Dict[str, Any]]:
+        """Bloqueos recientes con su pila completa"""
+        return list(self.eventos)
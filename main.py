@@ -1,33 +1,61 @@
 import discord
 from discord.ext import commands, tasks
 import asyncio
+import time
 import logging
 import os
+import sys
 from dotenv import load_dotenv
 from datetime import datetime
 from commands import setup_commands
 from tasks import setup_raid_tasks
 from data.digimon_manager import DigimonManager
-from utils import obtener_tiempo_kst
+from data.alert_ledger import AlertLedger
+from data.guild_settings import GuildSettingsManager
+from data.subscriptions import SubscriptionManager
+from data.default_data import HA_SETTINGS, LEDGER_SETTINGS, SUBSCRIPTION_SETTINGS, API_SETTINGS, METRICS_SETTINGS, LOOP_MONITOR_SETTINGS, LOGGING_SETTINGS, TRACING_SETTINGS, PROFILE_SETTINGS, COMMAND_SYNC_SETTINGS
+from leader import AlertLease
+from dm_delivery import DMDeliveryPipeline
+from payload_cache import PayloadCache
+from api_server import InstantaneaHorario, ServidorAPI
+from metrics import REGISTRY, COMMAND_LATENCY, TICK_JITTER, ServidorMetricas, registrar_metricas_bot
+from loop_monitor import MonitorEventLoop
+from profiler import Perfilador
+from command_sync import SincronizadorComandos
+from log_setup import configurar_logging
+from tracing import TRAZADOR
+from utils import obtener_tiempo_kst, obtener_todos_los_proximos_spawns, invalidar_plantillas_embed
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
+# Configure logging: formatting and file I/O happen on a background thread
+configurar_logging(
+    nivel=os.getenv('LOG_LEVEL', 'INFO'),
+    archivo=LOGGING_SETTINGS["file"],
+    formato_archivo=os.getenv('LOG_FORMAT') or LOGGING_SETTINGS["format"],
+    rotacion=os.getenv('LOG_ROTATION') or LOGGING_SETTINGS["rotation"],
+    max_bytes=LOGGING_SETTINGS["max_bytes"],
+    cuando=LOGGING_SETTINGS["when"],
+    copias=LOGGING_SETTINGS["backup_count"],
+    comprimir=LOGGING_SETTINGS["compress"]
 )
 logger = logging.getLogger(__name__)
 
+# Sampled span trees for alerts and commands
+TRAZADOR.configurar(TRACING_SETTINGS["file"], float(os.getenv('TRACE_SAMPLE_RATE') or TRACING_SETTINGS["sample_rate"]))
+
 # Bot configuration
 BOT_TOKEN = os.getenv('DISCORD_TOKEN') or os.getenv('BOT_TOKEN')
 GUILD_ID = os.getenv('GUILD_ID')
 ADMIN_IDS = [int(id.strip()) for id in os.getenv('ADMIN_IDS', '').split(',') if id.strip()]
+INSTANCE_ID = os.getenv('INSTANCE_ID') or None
+API_PORT = os.getenv('API_PORT')
+API_HOST = os.getenv('API_HOST') or API_SETTINGS["host"]
+METRICS_PORT = os.getenv('METRICS_PORT')
+METRICS_HOST = os.getenv('METRICS_HOST') or METRICS_SETTINGS["host"]
+# python main.py --force-sync: push the command tree even if its hash is unchanged
+FORCE_SYNC = "--force-sync" in sys.argv[1:]
 
 if not BOT_TOKEN:
     logger.error("❌ BOT_TOKEN/DISCORD_TOKEN not found in environment variables!")
@@ -39,12 +67,27 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True
 
+class TracedCommandTree(discord.app_commands.CommandTree):
+    """Command tree that opens a root trace span for every slash command"""
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # Runs in the same task as the command, so spans opened by the command nest under it
+        command = interaction.command.qualified_name if interaction.command else "unknown"
+        span = TRAZADOR.iniciar("command", activar=True, command=command, guild_id=interaction.guild_id)
+        interaction.extras['trace_span'] = span
+        return True
+    
+    async def on_error(self, interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
+        TRAZADOR.terminar(interaction.extras.pop('trace_span', None), error=type(error).__name__)
+        await super().on_error(interaction, error)
+
 class DSRBot(commands.Bot):
     def __init__(self):
         super().__init__(
             command_prefix='!',
             intents=intents,
             help_command=None,
+            tree_cls=TracedCommandTree,
             activity=discord.Activity(
                 type=discord.ActivityType.watching,
                 name="DSR Raid Timers | /raids"
@@ -52,6 +95,91 @@ class DSRBot(commands.Bot):
         )
         self.raid_channels = {}
         self.digimon_manager = DigimonManager()
+        self.digimon_manager.add_change_listener(invalidar_plantillas_embed)
+        
+        # Pre-rendered command payloads, valid for the current KST minute and data version
+        self.payload_cache = PayloadCache(
+            lambda: (obtener_tiempo_kst().replace(second=0, microsecond=0), self.digimon_manager.version)
+        )
+        self.digimon_manager.add_change_listener(lambda version: self.payload_cache.invalidate())
+        self.alert_lease = AlertLease(
+            lease_file=HA_SETTINGS["lease_file"],
+            ttl_seconds=HA_SETTINGS["lease_ttl_seconds"],
+            instance_id=INSTANCE_ID
+        )
+        self.alert_ledger = AlertLedger(
+            ledger_file=LEDGER_SETTINGS["ledger_file"],
+            retention_hours=LEDGER_SETTINGS["retention_hours"],
+            compact_min_records=LEDGER_SETTINGS["compact_min_records"]
+        )
+        # Both instances serve commands: settings changes are made under the lease's flock
+        self.guild_settings = GuildSettingsManager(lock_factory=self.alert_lease.bloqueo)
+        self.guild_settings.add_change_listener(self._sync_scheduler_offsets)
+        self.digimon_manager.add_change_listener(self.guild_settings.invalidate_recipients)
+        # Built by the lease holder on its first tick (see raid_monitor)
+        self.raid_scheduler = None
+        
+        # DM subscriptions (/subscribe) and their rate-limited delivery queue
+        self.subscriptions = SubscriptionManager(
+            data_file=SUBSCRIPTION_SETTINGS["data_file"],
+            max_per_user=SUBSCRIPTION_SETTINGS["max_per_user"],
+            lock_factory=self.alert_lease.bloqueo
+        )
+        self.digimon_manager.add_change_listener(self.subscriptions.invalidate_recipients)
+        self.dm_pipeline = DMDeliveryPipeline(
+            self,
+            rate_per_second=SUBSCRIPTION_SETTINGS["dm_rate_per_second"],
+            workers=SUBSCRIPTION_SETTINGS["dm_workers"],
+            max_attempts=SUBSCRIPTION_SETTINGS["dm_max_attempts"],
+            backoff_seconds=SUBSCRIPTION_SETTINGS["dm_backoff_seconds"]
+        )
+        
+        # Optional read-only HTTP API served from a shared schedule snapshot
+        self.api_server = None
+        if API_PORT:
+            self.api_server = ServidorAPI(
+                InstantaneaHorario(
+                    self.digimon_manager,
+                    dias_calendario=API_SETTINGS["calendar_days"],
+                    dias_maximos=API_SETTINGS["max_calendar_days"]
+                ),
+                host=API_HOST,
+                port=int(API_PORT),
+                cors_origin=API_SETTINGS["cors_origin"]
+            )
+        
+        # In-process metrics, exposed on a local /metrics endpoint when METRICS_PORT is set
+        registrar_metricas_bot(self)
+        self.metrics_server = ServidorMetricas(REGISTRY, METRICS_HOST, int(METRICS_PORT)) if METRICS_PORT else None
+        
+        # Event-loop lag and blocking-call detector (feeds /status, logs and metrics)
+        self.loop_monitor = MonitorEventLoop(
+            intervalo=LOOP_MONITOR_SETTINGS["interval_seconds"],
+            umbral=LOOP_MONITOR_SETTINGS["slow_threshold_seconds"],
+            max_eventos=LOOP_MONITOR_SETTINGS["max_events"],
+            profundidad_pila=LOOP_MONITOR_SETTINGS["stack_depth"]
+        )
+        
+        # On-demand CPU/memory captures for /profile (one at a time, bounded windows)
+        self.profiler = Perfilador(
+            max_segundos=PROFILE_SETTINGS["max_seconds"],
+            max_segundos_exacto=PROFILE_SETTINGS["max_exact_seconds"],
+            max_segundos_memoria=PROFILE_SETTINGS["max_memory_seconds"],
+            intervalo_muestreo=PROFILE_SETTINGS["sample_interval_ms"] / 1000,
+            top=PROFILE_SETTINGS["top_entries"],
+            marcos_tracemalloc=PROFILE_SETTINGS["tracemalloc_frames"]
+        )
+        
+        # Slash command sync gated on a hash of the tree payload
+        self.command_sync = SincronizadorComandos(
+            state_file=COMMAND_SYNC_SETTINGS["state_file"],
+            forzar=FORCE_SYNC
+        )
+    
+    def _sync_scheduler_offsets(self):
+        """Arm timer chains for alert offsets introduced by a guild settings change"""
+        if self.raid_scheduler is not None:
+            self.raid_scheduler.sync_offsets()
         
     async def setup_hook(self):
         """Called when the bot is starting up"""
@@ -60,21 +188,35 @@ class DSRBot(commands.Bot):
         # Setup commands
         await setup_commands(self)
         
-        # Sync slash commands
+        # Sync slash commands (skipped when the tree payload matches the last sync)
         try:
             if GUILD_ID:
                 guild = discord.Object(id=int(GUILD_ID))
                 self.tree.copy_global_to(guild=guild)
-                await self.tree.sync(guild=guild)
-                logger.info(f"✅ Synced commands to guild {GUILD_ID}")
+                if await self.command_sync.sincronizar(self.tree, guild=guild):
+                    logger.info(f"✅ Synced commands to guild {GUILD_ID}")
             else:
-                await self.tree.sync()
-                logger.info("✅ Synced commands globally")
+                if await self.command_sync.sincronizar(self.tree):
+                    logger.info("✅ Synced commands globally")
         except Exception as e:
             logger.error(f"❌ Failed to sync commands: {e}")
         
         # Setup raid monitoring tasks
         setup_raid_tasks(self)
+        self.dm_pipeline.start()
+        
+        if self.api_server is not None:
+            try:
+                await self.api_server.start()
+            except Exception as e:
+                logger.error(f"❌ Failed to start HTTP API: {e}")
+        
+        if self.metrics_server is not None:
+            try:
+                await self.metrics_server.start()
+            except Exception as e:
+                logger.error(f"❌ Failed to start metrics endpoint: {e}")
+        self.loop_monitor.start()
         
     async def on_ready(self):
         """Called when bot is fully ready"""
@@ -84,6 +226,9 @@ class DSRBot(commands.Bot):
         logger.info(f"🕐 Current KST time: {obtener_tiempo_kst().strftime('%Y-%m-%d %H:%M:%S KST')}")
         logger.info(f"⚔️ Monitoring {total_digimon} raid timers")
         
+        # Alert recipients are precomputed per timer from the guilds we are in
+        self.guild_settings.set_guilds(guild.id for guild in self.guilds)
+        
         # Update activity
         activity = discord.Activity(
             type=discord.ActivityType.watching,
@@ -91,14 +236,37 @@ class DSRBot(commands.Bot):
         )
         await self.change_presence(activity=activity)
         
+        # Start lease renewal (active/passive HA)
+        if not self.lease_monitor.is_running():
+            self.lease_monitor.start()
+            logger.info(f"🔐 Lease monitor started (instance {self.alert_lease.instance_id})")
+        
+        # Start background refresh of /raids and /status payloads
+        if not self.payload_refresher.is_running():
+            self.payload_refresher.start()
+        
         # Start raid monitoring
         if not self.raid_monitor.is_running():
             self.raid_monitor.start()
             logger.info("🚀 Raid monitoring started")
     
+    async def close(self):
+        """Release the alert lease so the standby takes over immediately"""
+        self.alert_lease.release()
+        await self.dm_pipeline.stop()
+        await self.alert_ledger.flush_async()
+        await self.subscriptions.flush_async()
+        if self.api_server is not None:
+            await self.api_server.stop()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        await self.loop_monitor.stop()
+        await super().close()
+    
     async def on_guild_join(self, guild):
         """Called when bot joins a new guild"""
         logger.info(f"🎉 Joined new guild: {guild.name} (ID: {guild.id})")
+        self.guild_settings.add_guild(guild.id)
         
         # Try to find a suitable channel for raid alerts
         suitable_channels = [
@@ -135,6 +303,18 @@ class DSRBot(commands.Bot):
             except Exception as e:
                 logger.warning(f"⚠️ Couldn't send welcome message to {guild.name}: {e}")
     
+    async def on_guild_remove(self, guild):
+        """Called when bot leaves or is removed from a guild"""
+        logger.info(f"👋 Removed from guild: {guild.name} (ID: {guild.id})")
+        self.guild_settings.remove_guild(guild.id)
+        self.raid_channels.pop(guild.id, None)
+    
+    async def on_app_command_completion(self, interaction, command):
+        """Record slash command latency (since Discord created the interaction)"""
+        elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        COMMAND_LATENCY.labels(command.qualified_name).observe(max(0.0, elapsed))
+        TRAZADOR.terminar(interaction.extras.pop('trace_span', None))
+    
     def is_admin(self, user_id: int) -> bool:
         """Check if user is admin"""
         return user_id in ADMIN_IDS or user_id == self.owner_id
@@ -142,17 +322,86 @@ class DSRBot(commands.Bot):
 # Create bot instance
 bot = DSRBot()
 
+# Monotonic time of the previous raid_monitor tick (tick jitter metric)
+last_tick_monotonic = None
+
 @tasks.loop(minutes=1)
 async def raid_monitor():
-    """Monitor raid spawns every minute"""
+    """Monitor raid spawns every minute (only the lease holder sends alerts)"""
+    global last_tick_monotonic
+    now_monotonic = time.monotonic()
+    if last_tick_monotonic is not None:
+        TICK_JITTER.observe(abs(now_monotonic - last_tick_monotonic - 60))
+    last_tick_monotonic = now_monotonic
+    
     try:
-        from tasks import check_raids
+        if not bot.alert_lease.is_leader:
+            # Standby: keep data and spawn calculations warm for a fast takeover
+            bot.digimon_manager.reload_if_changed()
+            bot.guild_settings.reload_if_changed()
+            bot.subscriptions.reload_if_changed()
+            obtener_todos_los_proximos_spawns(bot.digimon_manager)
+            return
+        
+        tick = obtener_tiempo_kst().replace(second=0, microsecond=0)
+        if not bot.alert_lease.record_tick(tick):
+            return
+        
+        # Roster and settings edits made through the other instance
+        bot.digimon_manager.reload_if_changed()
+        bot.guild_settings.reload_if_changed()
+        bot.subscriptions.reload_if_changed()
+        
+        from tasks import check_raids, crear_scheduler
+        
+        # The scheduler starts at the last processed minute, so alerts that fell
+        # due while no instance was sending fire on this first tick
+        if bot.raid_scheduler is None:
+            bot.raid_scheduler = crear_scheduler(bot, tick)
+        
         await check_raids(bot)
     except Exception as e:
         logger.error(f"❌ Error in raid monitor: {e}")
 
-# Attach the task to the bot
+@tasks.loop(seconds=HA_SETTINGS["renew_interval_seconds"])
+async def lease_monitor():
+    """Renew the alert lease or take it over when the leader stops renewing"""
+    try:
+        was_leader = bot.alert_lease.is_leader
+        is_leader = bot.alert_lease.try_acquire_or_renew()
+        
+        if is_leader and not was_leader:
+            # The previous leader may have delivered alerts and saved settings or
+            # subscriptions: reload them before the scheduler is rebuilt on the next tick
+            bot.alert_ledger.load_data()
+            bot.digimon_manager.reload_if_changed()
+            bot.guild_settings.load_data()
+            bot.subscriptions.load_data()
+            bot.raid_scheduler = None
+            logger.info(f"👑 Instance {bot.alert_lease.instance_id} is now the alert leader")
+        elif was_leader and not is_leader:
+            logger.warning(f"💤 Instance {bot.alert_lease.instance_id} is now on standby")
+    except Exception as e:
+        logger.error(f"❌ Error in lease monitor: {e}")
+
+@tasks.loop(minutes=1)
+async def payload_refresher():
+    """Rebuild cached command payloads at the start of every minute"""
+    try:
+        await bot.payload_cache.refresh_all()
+    except Exception as e:
+        logger.error(f"❌ Error refreshing payloads: {e}")
+
+@payload_refresher.before_loop
+async def align_payload_refresher():
+    """Start refreshing right after a KST minute boundary"""
+    ahora = obtener_tiempo_kst()
+    await asyncio.sleep(60 - ahora.second - ahora.microsecond / 1_000_000 + 0.05)
+
+# Attach the tasks to the bot
 bot.raid_monitor = raid_monitor
+bot.lease_monitor = lease_monitor
+bot.payload_refresher = payload_refresher
 
 # Error handlers
 @bot.event
@@ -189,7 +438,8 @@ async def on_application_command_error(interaction, error):
 
 if __name__ == "__main__":
     try:
-        bot.run(BOT_TOKEN)
+        # log_handler=None: discord.py logs go through the same queued pipeline
+        bot.run(BOT_TOKEN, log_handler=None)
     except KeyboardInterrupt:
         logger.info("🛑 Bot stopped by user")
     except Exception as e:
@@ -0,0 +1,307 @@
+import bisect
+import logging
+from typing import Dict, Any, Callable, Iterable, List, Optional, Sequence, Tuple
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Buckets por defecto en segundos: de 5 ms a 2 minutos
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Valor de etiqueta para las series que superan el límite de cardinalidad
+OTRAS_SERIES = "other"
+
+def escapar_etiqueta(valor: Any) -> str:
+    """Escapa un valor de etiqueta para el formato de texto de Prometheus"""
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def formato_etiquetas(nombres: Sequence[str], valores: Sequence[Any], extra: str = "") -> str:
+    """{a="x",b="y"} (vacío si no hay etiquetas)"""
+    partes = [f'{nombre}="{escapar_etiqueta(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+def formato_valor(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+class _Metrica:
+    """
+    Base de las métricas con etiquetas
+
+    Las series hijas se crean una vez por combinación de etiquetas y se
+    guardan en un diccionario. No hay locks: solo el hilo del event loop
+    escribe cada métrica, y los incrementos de enteros/floats sobre atributos
+    bastan para que una lectura concurrente vea un valor coherente. Con
+    max_series, las combinaciones nuevas por encima del límite se agregan en
+    una única serie "other" para acotar la cardinalidad (p. ej. por servidor).
+    Si se indica etiqueta_acotada, solo esa etiqueta pasa a "other" y el resto
+    (p. ej. el resultado) se conserva.
+    """
+
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (), max_series: Optional[int] = None,
+                 etiqueta_acotada: Optional[str] = None):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.max_series = max_series
+        self._posicion_acotada = self.etiquetas.index(etiqueta_acotada) if etiqueta_acotada else None
+        self._series: Dict[Tuple[str, ...], Any] = {}
+        if not self.etiquetas:
+            self._series[()] = self._nueva_serie()
+
+    def _nueva_serie(self):
+        raise NotImplementedError
+
+    def labels(self, *valores: Any, **por_nombre: Any):
+        """Serie hija para unos valores de etiqueta (posicionales o por nombre)"""
+        clave = tuple(str(v) for v in valores) if valores else tuple(str(por_nombre[e]) for e in self.etiquetas)
+        serie = self._series.get(clave)
+        if serie is None:
+            if self.max_series is not None and len(self._series) >= self.max_series:
+                if self._posicion_acotada is None:
+                    clave = (OTRAS_SERIES,) * len(self.etiquetas)
+                else:
+                    clave = clave[:self._posicion_acotada] + (OTRAS_SERIES,) + clave[self._posicion_acotada + 1:]
+                serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = self._nueva_serie()
+        return serie
+
+    def muestras(self) -> Iterable[str]:
+        raise NotImplementedError
+
+class _ValorContador:
+    __slots__ = ("valor",)
+
+    def __init__(self):
+        self.valor = 0.0
+
+    def inc(self, cantidad: float = 1):
+        self.valor += cantidad
+
+class Counter(_Metrica):
+    """Contador monótono"""
+
+    tipo = "counter"
+
+    def _nueva_serie(self):
+        return _ValorContador()
+
+    def inc(self, cantidad: float = 1):
+        self._series[()].inc(cantidad)
+
+    def muestras(self) -> Iterable[str]:
+        for clave, serie in list(self._series.items()):
+            yield f"{self.nombre}{formato_etiquetas(self.etiquetas, clave)} {formato_valor(serie.valor)}"
+
+class _ValorHistograma:
+    __slots__ = ("limites", "cuentas", "suma", "total")
+
+    def __init__(self, limites: Tuple[float, ...]):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1)  # el último es +Inf
+        self.suma = 0.0
+        self.total = 0
+
+    def observe(self, valor: float):
+        self.cuentas[bisect.bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+class Histogram(_Metrica):
+    """Histograma de buckets fijos (observe cuesta una búsqueda binaria y tres sumas)"""
+
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                 buckets: Sequence[float] = BUCKETS_SEGUNDOS, max_series: Optional[int] = None,
+                 etiqueta_acotada: Optional[str] = None):
+        self.limites = tuple(sorted(buckets))
+        super().__init__(nombre, ayuda, etiquetas, max_series, etiqueta_acotada)
+
+    def _nueva_serie(self):
+        return _ValorHistograma(self.limites)
+
+    def observe(self, valor: float):
+        self._series[()].observe(valor)
+
+    def muestras(self) -> Iterable[str]:
+        for clave, serie in list(self._series.items()):
+            acumulado = 0
+            for limite, cuenta in zip(self.limites + (float("inf"),), list(serie.cuentas)):
+                acumulado += cuenta
+                le = f'le="{formato_valor(limite)}"'
+                yield f"{self.nombre}_bucket{formato_etiquetas(self.etiquetas, clave, le)} {acumulado}"
+            yield f"{self.nombre}_sum{formato_etiquetas(self.etiquetas, clave)} {formato_valor(serie.suma)}"
+            yield f"{self.nombre}_count{formato_etiquetas(self.etiquetas, clave)} {serie.total}"
+
+class GaugeFunc(_Metrica):
+    """
+    Gauge calculado en el momento del scrape
+
+    La función devuelve un número, o un diccionario {valores de etiqueta: número}
+    si la métrica tiene etiquetas. No cuesta nada entre scrapes.
+    """
+
+    tipo = "gauge"
+
+    def __init__(self, nombre: str, ayuda: str, funcion: Callable[[], Any], etiquetas: Sequence[str] = ()):
+        self.funcion = funcion
+        super().__init__(nombre, ayuda, etiquetas)
+
+    def _nueva_serie(self):
+        return None
+
+    def muestras(self) -> Iterable[str]:
+        valor = self.funcion()
+        if valor is None:
+            return
+        series = valor if isinstance(valor, dict) else {(): valor}
+        for clave, numero in series.items():
+            if numero is None:
+                continue
+            clave = clave if isinstance(clave, tuple) else (clave,)
+            yield f"{self.nombre}{formato_etiquetas(self.etiquetas, clave)} {formato_valor(numero)}"
+
+class MetricsRegistry:
+    """Registro de métricas del proceso y su exposición en formato de texto de Prometheus"""
+
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+
+    def register(self, metrica: _Metrica) -> _Metrica:
+        """Registra una métrica (una por nombre) y la devuelve"""
+        if metrica.nombre in self._metricas:
+            raise ValueError(f"Métrica duplicada: {metrica.nombre}")
+        self._metricas[metrica.nombre] = metrica
+        return metrica
+
+    def counter(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (), max_series: Optional[int] = None,
+                etiqueta_acotada: Optional[str] = None) -> Counter:
+        return self.register(Counter(nombre, ayuda, etiquetas, max_series, etiqueta_acotada))
+
+    def histogram(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                  buckets: Sequence[float] = BUCKETS_SEGUNDOS, max_series: Optional[int] = None,
+                  etiqueta_acotada: Optional[str] = None) -> Histogram:
+        return self.register(Histogram(nombre, ayuda, etiquetas, buckets, max_series, etiqueta_acotada))
+
+    def gauge_func(self, nombre: str, ayuda: str, funcion: Callable[[], Any], etiquetas: Sequence[str] = ()) -> GaugeFunc:
+        return self.register(GaugeFunc(nombre, ayuda, funcion, etiquetas))
+
+    def render(self) -> str:
+        """Todas las métricas en el formato de exposición de texto 0.0.4"""
+        lineas: List[str] = []
+        for metrica in list(self._metricas.values()):
+            try:
+                muestras = list(metrica.muestras())
+            except Exception as e:
+                logger.error(f"❌ Error calculando la métrica {metrica.nombre}: {e}")
+                continue
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            lineas.extend(muestras)
+        return "\n".join(lineas) + "\n"
+
+# Registro global del bot y métricas de la ruta de alertas
+REGISTRY = MetricsRegistry()
+
+ALERT_LATENCY = REGISTRY.histogram(
+    "dsr_alert_delivery_latency_seconds",
+    "Retraso entre el momento programado de una alerta y su entrega en cada canal",
+    ("tipo",)
+)
+FANOUT_DURATION = REGISTRY.histogram(
+    "dsr_alert_fanout_duration_seconds",
+    "Duración del envío de una alerta a todos sus servidores",
+    ("tipo",)
+)
+GUILD_SENDS = REGISTRY.counter(
+    "dsr_guild_sends_total",
+    "Resultados de envío a canales de servidor",
+    ("outcome",)
+)
+GUILD_SEND_FAILURES = REGISTRY.counter(
+    "dsr_guild_send_failures_total",
+    "Envíos fallidos por servidor y causa (servidores por encima del límite se agregan en guild='other')",
+    ("guild", "outcome"),
+    max_series=200,
+    etiqueta_acotada="guild"
+)
+COMMAND_LATENCY = REGISTRY.histogram(
+    "dsr_command_latency_seconds",
+    "Tiempo desde que Discord crea la interacción hasta que el comando termina",
+    ("command",)
+)
+TICK_JITTER = REGISTRY.histogram(
+    "dsr_tick_jitter_seconds",
+    "Desviación del intervalo entre ticks de raid_monitor respecto a 60 s",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+)
+LOOP_LAG = REGISTRY.histogram(
+    "dsr_event_loop_lag_seconds",
+    "Retraso del event loop al despertar una sonda periódica",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+SLOW_CALLBACKS = REGISTRY.counter(
+    "dsr_event_loop_slow_callbacks_total",
+    "Bloqueos del event loop por encima del umbral del monitor"
+)
+
+def registrar_metricas_bot(bot):
+    """Gauges calculados al hacer scrape a partir de las estadísticas de los componentes del bot"""
+    from utils import obtener_estadisticas_plantillas
+
+    def ratios_cache():
+        ratios = {
+            ("payloads",): bot.payload_cache.get_statistics()['hit_ratio'],
+            ("embed_templates",): obtener_estadisticas_plantillas()['hit_ratio']
+        }
+        if bot.api_server is not None:
+            ratios[("api_snapshot",)] = bot.api_server.instantanea.get_statistics()['hit_ratio']
+        return ratios
+
+    REGISTRY.gauge_func("dsr_cache_hit_ratio", "Proporción de aciertos por cache", ratios_cache, ("cache",))
+    REGISTRY.gauge_func("dsr_guilds", "Servidores conectados", lambda: len(bot.guilds))
+    REGISTRY.gauge_func("dsr_raid_channels", "Servidores con canal de alertas", lambda: len(bot.raid_channels))
+    REGISTRY.gauge_func("dsr_is_leader", "1 si esta instancia envía las alertas",
+                        lambda: 1 if bot.alert_lease.is_leader else 0)
+    REGISTRY.gauge_func("dsr_dm_queue", "DMs en cola", lambda: bot.dm_pipeline.get_statistics()['queued'])
+    REGISTRY.gauge_func(
+        "dsr_scheduler_timers", "Temporizadores armados en el planificador",
+        lambda: bot.raid_scheduler.get_statistics()['scheduled'] if bot.raid_scheduler is not None else None
+    )
+
+class ServidorMetricas:
+    """Endpoint HTTP local (/metrics) con el formato de texto de Prometheus"""
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+        self.app = web.Application()
+        self.app.router.add_get("/metrics", self._handle_metrics)
+
+    async def start(self):
+        """Arranca el servidor (requiere un event loop en marcha)"""
+        if self._runner is not None:
+            return
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"📈 Métricas disponibles en http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        """Detiene el servidor"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.registry.render().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
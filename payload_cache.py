@@ -0,0 +1,89 @@
+import asyncio
+import inspect
+import logging
+from typing import Dict, Any, Callable, Hashable, Optional, Tuple
+from tracing import TRAZADOR
+
+logger = logging.getLogger(__name__)
+
+class PayloadCache:
+    """
+    Cache de respuestas precalculadas para comandos (/raids, /status...)
+
+    Cada payload se identifica por un sello (p. ej. minuto KST + versión de datos).
+    Mientras el sello no cambie se reutiliza el payload; cuando cambia, la primera
+    petición lo reconstruye y las peticiones concurrentes esperan a esa misma
+    construcción (single-flight) en lugar de repetirla.
+    """
+
+    def __init__(self, stamp_fn: Callable[[], Hashable]):
+        self.stamp_fn = stamp_fn
+        self._builders: Dict[str, Callable[[], Any]] = {}
+        self._entries: Dict[str, Tuple[Hashable, Any]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def register(self, name: str, builder: Callable[[], Any]):
+        """Registra la función (síncrona o async) que construye un payload"""
+        self._builders[name] = builder
+
+    async def _build(self, name: str, stamp: Hashable) -> Any:
+        with TRAZADOR.span("payload_build", payload=name):
+            payload = self._builders[name]()
+            if inspect.isawaitable(payload):
+                payload = await payload
+        self._entries[name] = (stamp, payload)
+        return payload
+
+    async def get(self, name: str) -> Any:
+        """
+        Obtiene un payload, reconstruyéndolo solo si su sello ha caducado
+
+        Returns:
+            El payload construido por el builder registrado
+        """
+        stamp = self.stamp_fn()
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == stamp:
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(name)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._build(name, stamp))
+            self._inflight[name] = task
+            task.add_done_callback(lambda _: self._inflight.pop(name, None))
+        else:
+            self.coalesced += 1
+
+        # shield: si una interacción se cancela, la construcción sigue para los demás
+        return await asyncio.shield(task)
+
+    def invalidate(self, name: Optional[str] = None):
+        """Descarta un payload (o todos) para que se reconstruya en la próxima petición"""
+        if name is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(name, None)
+
+    async def refresh_all(self):
+        """Reconstruye en segundo plano los payloads cuyo sello ha caducado"""
+        for name in self._builders:
+            try:
+                await self.get(name)
+            except Exception as e:
+                logger.error(f"❌ Error precalculando payload '{name}': {e}")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Estadísticas de aciertos del cache"""
+        total = self.hits + self.misses + self.coalesced
+        return {
+            'payloads': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_ratio': (self.hits + self.coalesced) / total if total else 0.0
+        }
@@ -0,0 +1,206 @@
+import io
+import sys
+import time
+import pstats
+import asyncio
+import cProfile
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class CapturaEnCurso(Exception):
+    """Ya hay una captura de perfil en marcha"""
+    pass
+
+def nombre_funcion(codigo) -> str:
+    """archivo:línea(función) de un objeto código, con la ruta acortada"""
+    archivo = codigo.co_filename
+    if "site-packages/" in archivo:
+        archivo = archivo.split("site-packages/", 1)[1]
+    elif "/lib/python" in archivo:
+        # .../lib/python3.11/asyncio/events.py -> asyncio/events.py
+        archivo = archivo.split("/lib/python", 1)[1].split("/", 1)[-1]
+    else:
+        archivo = archivo.rsplit("/", 1)[-1]
+    return f"{archivo}:{codigo.co_firstlineno}({codigo.co_name})"
+
+def es_espera_del_loop(frame) -> bool:
+    """True si el hilo del loop está parado en select() esperando eventos"""
+    return frame.f_code.co_name in ("select", "poll", "control") and frame.f_code.co_filename.endswith("selectors.py")
+
+class Perfilador:
+    """
+    Capturas de perfil bajo demanda en el proceso en marcha (/profile)
+
+    Tres modos, todos con una ventana acotada y de uno en uno:
+      - cpu: muestreo. Un hilo lee cada pocos milisegundos la pila del hilo del
+        event loop con sys._current_frames; el coste es fijo por muestra y no
+        depende de lo que esté haciendo el bot.
+      - cpu exacto: cProfile determinista sobre el hilo del loop. Mide cada
+        llamada y ralentiza el código perfilado, por eso su ventana máxima es
+        más corta.
+      - mem: diferencia entre dos instantáneas de tracemalloc. Trazar
+        asignaciones también tiene coste, así que se para al terminar salvo
+        que ya estuviera activo antes.
+    """
+
+    def __init__(self, max_segundos: int = 60, max_segundos_exacto: int = 10, max_segundos_memoria: int = 30,
+                 intervalo_muestreo: float = 0.005, top: int = 40, marcos_tracemalloc: int = 5):
+        self.max_segundos = max_segundos
+        self.max_segundos_exacto = max_segundos_exacto
+        self.max_segundos_memoria = max_segundos_memoria
+        self.intervalo_muestreo = intervalo_muestreo
+        self.top = top
+        self.marcos_tracemalloc = marcos_tracemalloc
+        self._lock = asyncio.Lock()
+        self.capturas = 0
+
+    @property
+    def ocupado(self) -> bool:
+        return self._lock.locked()
+
+    def limite(self, modo: str, exacto: bool = False) -> int:
+        """Duración máxima permitida para un modo"""
+        if modo == "mem":
+            return min(self.max_segundos, self.max_segundos_memoria)
+        if exacto:
+            return min(self.max_segundos, self.max_segundos_exacto)
+        return self.max_segundos
+
+    async def capturar(self, modo: str, segundos: float, exacto: bool = False) -> Tuple[str, str]:
+        """
+        Ejecuta una captura y devuelve (resumen, informe)
+
+        Args:
+            modo: "cpu" o "mem"
+            segundos: Duración pedida (se recorta al límite del modo)
+            exacto: En modo cpu, usar cProfile en lugar de muestreo
+
+        Raises:
+            CapturaEnCurso: Si ya hay otra captura en marcha
+        """
+        if self._lock.locked():
+            raise CapturaEnCurso()
+        async with self._lock:
+            segundos = max(1.0, min(float(segundos), self.limite(modo, exacto)))
+            logger.info(f"🔬 Captura de perfil {modo}{' exacto' if exacto else ''} durante {segundos:.0f}s")
+            if modo == "mem":
+                resultado = await self._memoria(segundos)
+            elif exacto:
+                resultado = await self._cpu_exacto(segundos)
+            else:
+                resultado = await self._cpu_muestreo(segundos)
+            self.capturas += 1
+            return resultado
+
+    async def _cpu_muestreo(self, segundos: float) -> Tuple[str, str]:
+        hilo_loop = threading.get_ident()
+        propias: Counter = Counter()
+        acumuladas: Counter = Counter()
+        estado = {"muestras": 0, "espera": 0, "coste": 0.0}
+        parar = threading.Event()
+
+        def muestrear():
+            inicio_cpu = time.thread_time()
+            while not parar.wait(self.intervalo_muestreo):
+                frame = sys._current_frames().get(hilo_loop)
+                if frame is None:
+                    continue
+                estado["muestras"] += 1
+                if es_espera_del_loop(frame):
+                    estado["espera"] += 1
+                    continue
+                propias[nombre_funcion(frame.f_code)] += 1
+                # Cada función cuenta una vez por muestra aunque sea recursiva
+                vistas = set()
+                while frame is not None:
+                    vistas.add(nombre_funcion(frame.f_code))
+                    frame = frame.f_back
+                acumuladas.update(vistas)
+            estado["coste"] = time.thread_time() - inicio_cpu
+
+        hilo = threading.Thread(target=muestrear, name="profile-sampler", daemon=True)
+        hilo.start()
+        try:
+            await asyncio.sleep(segundos)
+        finally:
+            parar.set()
+            await asyncio.to_thread(hilo.join)
+
+        muestras = estado["muestras"]
+        activas = muestras - estado["espera"]
+        ocupacion = activas / muestras if muestras else 0.0
+        sobrecoste = estado["coste"] / segundos
+
+        lineas = [
+            f"Perfil de CPU por muestreo • {segundos:.0f}s • intervalo {self.intervalo_muestreo * 1000:.0f} ms",
+            f"Muestras: {muestras} ({activas} con el loop ocupado, {ocupacion:.1%})",
+            f"Coste del muestreo: {estado['coste'] * 1000:.0f} ms de CPU ({sobrecoste:.2%})",
+            ""
+        ]
+        for titulo, contador in (("Tiempo propio", propias), ("Tiempo acumulado", acumuladas)):
+            lineas.append(f"{titulo} (muestras • % del tiempo ocupado):")
+            for funcion, cuenta in contador.most_common(self.top):
+                lineas.append(f"  {cuenta:>7} {cuenta / activas:>7.1%}  {funcion}")
+            lineas.append("")
+
+        resumen = f"{muestras} muestras • loop ocupado {ocupacion:.1%} • coste {sobrecoste:.2%}"
+        return resumen, "\n".join(lineas)
+
+    async def _cpu_exacto(self, segundos: float) -> Tuple[str, str]:
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            await asyncio.sleep(segundos)
+        finally:
+            perfil.disable()
+
+        salida = io.StringIO()
+        estadisticas = pstats.Stats(perfil, stream=salida)
+        estadisticas.strip_dirs().sort_stats("cumulative").print_stats(self.top)
+        salida.write("\n")
+        estadisticas.sort_stats("tottime").print_stats(self.top)
+
+        resumen = f"{estadisticas.total_calls} llamadas • {estadisticas.total_tt:.2f}s perfilados"
+        cabecera = f"Perfil de CPU determinista (cProfile) • {segundos:.0f}s\n"
+        return resumen, cabecera + salida.getvalue()
+
+    async def _memoria(self, segundos: float) -> Tuple[str, str]:
+        ya_activo = tracemalloc.is_tracing()
+        if not ya_activo:
+            tracemalloc.start(self.marcos_tracemalloc)
+        try:
+            antes = tracemalloc.take_snapshot()
+            await asyncio.sleep(segundos)
+            despues = tracemalloc.take_snapshot()
+            actual, pico = tracemalloc.get_traced_memory()
+        finally:
+            if not ya_activo:
+                tracemalloc.stop()
+
+        filtros = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>")
+        ]
+        diferencias = despues.filter_traces(filtros).compare_to(antes.filter_traces(filtros), "lineno")
+        neto = sum(d.size_diff for d in diferencias)
+
+        lineas = [
+            f"Diferencia de memoria (tracemalloc) • {segundos:.0f}s",
+            f"Neto: {neto / 1024:+.1f} KiB • trazado {actual / 1024:.0f} KiB (pico {pico / 1024:.0f} KiB)",
+            "",
+            "Mayores cambios por línea:"
+        ]
+        for diferencia in diferencias[:self.top]:
+            lineas.append(f"  {diferencia}")
+
+        resumen = f"Neto {neto / 1024:+.1f} KiB en {segundos:.0f}s • pico {pico / 1024:.0f} KiB"
+        return resumen, "\n".join(lineas)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {'busy': self.ocupado, 'captures': self.capturas}
@@ -0,0 +1,177 @@
+import datetime
+import heapq
+import logging
+from typing import Dict, Any, List, Iterator, Iterable, Optional, Tuple
+from data.default_data import KST
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él se usa la implementación en Python puro
+    np = None
+
+logger = logging.getLogger(__name__)
+
+def primera_ocurrencia(digimon: Dict[str, Any], horario: Dict[str, int],
+                       desde: datetime.datetime) -> datetime.datetime:
+    """
+    Primera ocurrencia de un horario en `desde` o después
+
+    Se calcula con aritmética sobre el periodo (sin avanzar día a día desde
+    fecha_inicio), así que el coste no depende de lo lejos que esté `desde`.
+    """
+    base = digimon["fecha_inicio"].replace(
+        hour=horario["hora"], minute=horario["minuto"], second=0, microsecond=0
+    )
+    if base >= desde:
+        return base
+
+    periodo = datetime.timedelta(days=digimon["recurrencia_dias"])
+    periodos = -((base - desde) // periodo)  # ceil((desde - base) / periodo)
+    return base + periodo * periodos
+
+def ocurrencias_en_rango(digimon: Dict[str, Any], horario: Dict[str, int],
+                         desde: datetime.datetime, hasta: Optional[datetime.datetime] = None) -> Iterator[datetime.datetime]:
+    """Ocurrencias de un horario en el intervalo [desde, hasta) (sin fin si hasta es None)"""
+    periodo = datetime.timedelta(days=digimon["recurrencia_dias"])
+    momento = primera_ocurrencia(digimon, horario, desde)
+    while hasta is None or momento < hasta:
+        yield momento
+        momento += periodo
+
+class CalendarioRaids:
+    """
+    Motor de calendario: todas las ocurrencias de todos los horarios en un horizonte
+
+    Cada horario se reduce a dos enteros (instante base y periodo en segundos
+    epoch). `generar` calcula todas las ocurrencias del horizonte de una vez
+    como arrays (vectorizado con NumPy si está instalado, bucle en Python si
+    no) y `iterar` las produce en orden bajo demanda con una mezcla de heap,
+    sin materializar el horizonte completo.
+    """
+
+    def __init__(self, digimons: Iterable[Dict[str, Any]], version: Optional[int] = None,
+                 usar_numpy: Optional[bool] = None):
+        self.version = version
+        self.usar_numpy = (np is not None) if usar_numpy is None else (usar_numpy and np is not None)
+        self.timers: List[Tuple[Dict[str, Any], Dict[str, int]]] = []
+        bases, periodos = [], []
+
+        for digimon in digimons:
+            for horario in digimon["horarios"]:
+                try:
+                    base = digimon["fecha_inicio"].replace(
+                        hour=horario["hora"], minute=horario["minuto"], second=0, microsecond=0
+                    )
+                    bases.append(int(base.timestamp()))
+                    periodos.append(digimon["recurrencia_dias"] * 86400)
+                    self.timers.append((digimon, horario))
+                except Exception as e:
+                    logger.error(f"Error añadiendo {digimon.get('nombre', 'Unknown')} al calendario: {e}")
+
+        if self.usar_numpy:
+            self.bases = np.array(bases, dtype=np.int64)
+            self.periodos = np.array(periodos, dtype=np.int64)
+        else:
+            self.bases = bases
+            self.periodos = periodos
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    def generar(self, desde: datetime.datetime, hasta: datetime.datetime):
+        """
+        Todas las ocurrencias en [desde, hasta) ordenadas por instante
+
+        Returns:
+            (índices de horario, instantes epoch en segundos): arrays de NumPy
+            o listas en el modo Python puro
+        """
+        inicio, fin = int(desde.timestamp()), int(hasta.timestamp())
+        if self.usar_numpy:
+            return self._generar_numpy(inicio, fin)
+        return self._generar_python(inicio, fin)
+
+    def _generar_numpy(self, inicio: int, fin: int):
+        # Primera ocurrencia >= inicio de cada horario y cuántas caben antes de fin
+        saltos = np.maximum(0, -((self.bases - inicio) // self.periodos))
+        primeras = self.bases + saltos * self.periodos
+        cuantas = np.maximum(0, -((primeras - fin) // self.periodos))
+
+        total = int(cuantas.sum())
+        indices = np.repeat(np.arange(len(self.timers), dtype=np.int64), cuantas)
+        # Posición de cada ocurrencia dentro de su horario (0, 1, 2...)
+        posiciones = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(cuantas) - cuantas, cuantas)
+        instantes = primeras[indices] + posiciones * self.periodos[indices]
+
+        orden = np.argsort(instantes, kind="stable")
+        return indices[orden], instantes[orden]
+
+    def _generar_python(self, inicio: int, fin: int):
+        ocurrencias = []
+        for indice, (base, periodo) in enumerate(zip(self.bases, self.periodos)):
+            instante = base + max(0, -((base - inicio) // periodo)) * periodo
+            while instante < fin:
+                ocurrencias.append((instante, indice))
+                instante += periodo
+        ocurrencias.sort()
+        return [indice for _, indice in ocurrencias], [instante for instante, _ in ocurrencias]
+
+    def _spawn(self, indice: int, instante: int) -> Dict[str, Any]:
+        digimon, horario = self.timers[indice]
+        return {
+            'digimon': digimon,
+            'horario': horario,
+            'spawn_time': datetime.datetime.fromtimestamp(instante, KST)
+        }
+
+    def spawns(self, desde: datetime.datetime, hasta: datetime.datetime) -> List[Dict[str, Any]]:
+        """
+        Spawns del intervalo [desde, hasta) ordenados por momento
+
+        Returns:
+            Lista de diccionarios {digimon, horario, spawn_time}
+        """
+        indices, instantes = self.generar(desde, hasta)
+        return [self._spawn(int(indice), int(instante)) for indice, instante in zip(indices, instantes)]
+
+    def iterar(self, desde: datetime.datetime, hasta: Optional[datetime.datetime] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Produce los spawns en orden a partir de `desde` sin calcular el horizonte entero
+
+        Mezcla con un heap una secuencia aritmética por horario: cada paso
+        cuesta O(log horarios), útil para "los próximos N" o horizontes abiertos.
+        """
+        inicio = int(desde.timestamp())
+        fin = int(hasta.timestamp()) if hasta is not None else None
+
+        def secuencia(indice: int, base: int, periodo: int) -> Iterator[Tuple[int, int]]:
+            instante = base + max(0, -((base - inicio) // periodo)) * periodo
+            while fin is None or instante < fin:
+                yield instante, indice
+                instante += periodo
+
+        secuencias = [
+            secuencia(indice, int(base), int(periodo))
+            for indice, (base, periodo) in enumerate(zip(self.bases, self.periodos))
+        ]
+        for instante, indice in heapq.merge(*secuencias):
+            yield self._spawn(indice, instante)
+
+_calendario_cache: Optional[CalendarioRaids] = None
+
+def obtener_calendario(digimon_manager) -> CalendarioRaids:
+    """Devuelve el calendario del roster, reconstruyéndolo solo si cambió la versión de datos"""
+    global _calendario_cache
+    if _calendario_cache is None or _calendario_cache.version != digimon_manager.version:
+        _calendario_cache = CalendarioRaids(digimon_manager.get_all_digimon(), digimon_manager.version)
+    return _calendario_cache
+
+def spawns_en_rango(digimons: Iterable[Dict[str, Any]], desde: datetime.datetime,
+                    hasta: datetime.datetime) -> List[Dict[str, Any]]:
+    """
+    Todos los spawns del roster en [desde, hasta), ordenados por momento
+
+    Returns:
+        Lista de diccionarios {digimon, horario, spawn_time}
+    """
+    return CalendarioRaids(digimons).spawns(desde, hasta)
@@ -0,0 +1,39 @@
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Limitador de ritmo tipo token bucket para llamadas a la API de Discord
+
+    Permite ráfagas de hasta `capacity` operaciones y después limita a
+    `rate` operaciones por segundo. `acquire()` espera sin bloquear el loop.
+    """
+
+    def __init__(self, rate: float, capacity: int = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        """Espera hasta que haya un token disponible y lo consume"""
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def penalize(self, seconds: float):
+        """Vacía el bucket durante `seconds` (p. ej. tras un 429 con Retry-After)"""
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+        self.updated_at = time.monotonic()
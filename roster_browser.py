@@ -0,0 +1,263 @@
+import discord
+import logging
+from typing import Optional, List, Dict, Any, Tuple
+from utils import (
+    obtener_tiempo_kst,
+    crear_spawn_info,
+    crear_embed_detalle_spawn,
+    buscar_spawn_por_clave
+)
+from data.default_data import EMBED_COLORS, TYPE_EMOJIS
+
+logger = logging.getLogger(__name__)
+
+# Discord admite como máximo 25 opciones por select
+PAGE_SIZE = 25
+# Valor de filtro que significa "todos"
+TODOS = -1
+# Valores por página de un select de filtro: se reservan "todos" y las dos opciones de navegación
+FILTROS_POR_PAGINA = PAGE_SIZE - 3
+
+class RosterIndex:
+    """
+    Índice ordenado del roster (un elemento por Digimon y horario)
+
+    Los filtros por tipo/mapa se calculan bajo demanda y se guardan como listas
+    de posiciones; una página solo calcula el próximo spawn de sus 25 entradas.
+    """
+
+    def __init__(self, digimons: List[Dict[str, Any]], version: int):
+        self.version = version
+        self.entries: List[Tuple[Dict[str, Any], Dict[str, int]]] = sorted(
+            ((digimon, horario) for digimon in digimons for horario in digimon['horarios']),
+            key=lambda entry: (entry[0]['nombre'].lower(), entry[1]['hora'], entry[1]['minuto'])
+        )
+        self.tipos = sorted({digimon['tipo'] for digimon in digimons})
+        self.mapas = sorted({digimon['mapa'] for digimon in digimons})
+        self._filtrados: Dict[Tuple[int, int], List[int]] = {}
+
+    def filtrar(self, tipo: int = TODOS, mapa: int = TODOS) -> List[int]:
+        """Posiciones de las entradas que cumplen los filtros (índices en self.tipos/self.mapas)"""
+        clave = (tipo, mapa)
+        if clave not in self._filtrados:
+            tipo_nombre = self.tipos[tipo] if 0 <= tipo < len(self.tipos) else None
+            mapa_nombre = self.mapas[mapa] if 0 <= mapa < len(self.mapas) else None
+            self._filtrados[clave] = [
+                posicion for posicion, (digimon, _) in enumerate(self.entries)
+                if (tipo_nombre is None or digimon['tipo'] == tipo_nombre)
+                and (mapa_nombre is None or digimon['mapa'] == mapa_nombre)
+            ]
+        return self._filtrados[clave]
+
+    def total_paginas(self, tipo: int = TODOS, mapa: int = TODOS) -> int:
+        """Número de páginas para los filtros dados (mínimo 1)"""
+        return max(1, -(-len(self.filtrar(tipo, mapa)) // PAGE_SIZE))
+
+    def pagina(self, numero: int, tipo: int = TODOS, mapa: int = TODOS) -> List[Dict[str, Any]]:
+        """Calcula la información de spawn solo para las entradas de una página"""
+        posiciones = self.filtrar(tipo, mapa)
+        inicio = numero * PAGE_SIZE
+        ahora = obtener_tiempo_kst()
+
+        spawns_info = []
+        for posicion in posiciones[inicio:inicio + PAGE_SIZE]:
+            digimon, horario = self.entries[posicion]
+            spawn_info = crear_spawn_info(digimon, horario, ahora)
+            if spawn_info is not None:
+                spawns_info.append(spawn_info)
+        return spawns_info
+
+_indice_cache: Optional[RosterIndex] = None
+
+def obtener_indice_roster(digimon_manager) -> RosterIndex:
+    """Devuelve el índice del roster, reconstruyéndolo solo si cambió la versión de datos"""
+    global _indice_cache
+    if _indice_cache is None or _indice_cache.version != digimon_manager.version:
+        _indice_cache = RosterIndex(digimon_manager.get_all_digimon(), digimon_manager.version)
+    return _indice_cache
+
+def _estado(match) -> Tuple[int, int, int]:
+    return int(match['page']), int(match['tipo']), int(match['mapa'])
+
+class RosterPageButton(discord.ui.DynamicItem[discord.ui.Button],
+                       template=r'dsr:roster:(?P<dir>prev|next):(?P<page>\d+):(?P<tipo>-?\d+):(?P<mapa>-?\d+)'):
+    """Botón de paginación; la página destino y los filtros van codificados en el custom_id"""
+
+    def __init__(self, direccion: str, page: int, tipo: int, mapa: int, label: str = "", disabled: bool = False):
+        super().__init__(discord.ui.Button(
+            label=label,
+            style=discord.ButtonStyle.secondary,
+            custom_id=f"dsr:roster:{direccion}:{page}:{tipo}:{mapa}",
+            disabled=disabled
+        ))
+        self.page, self.tipo, self.mapa = page, tipo, mapa
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match['dir'], *_estado(match), label=item.label or "")
+
+    async def callback(self, interaction: discord.Interaction):
+        await interaction.response.edit_message(**render_roster(interaction.client, self.page, self.tipo, self.mapa))
+
+class RosterSpawnSelect(discord.ui.DynamicItem[discord.ui.Select],
+                        template=r'dsr:roster:sel:(?P<page>\d+):(?P<tipo>-?\d+):(?P<mapa>-?\d+)'):
+    """Select con los Digimon de la página actual; muestra el detalle del elegido"""
+
+    def __init__(self, item: discord.ui.Select):
+        super().__init__(item)
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Select, match):
+        return cls(item)
+
+    async def callback(self, interaction: discord.Interaction):
+        spawn_info = buscar_spawn_por_clave(self.item.values[0], interaction.client.digimon_manager)
+        if spawn_info is None:
+            await interaction.response.send_message("❌ Error: No se encontró el Digimon seleccionado.", ephemeral=True)
+            return
+        await interaction.response.send_message(embed=crear_embed_detalle_spawn(spawn_info), ephemeral=True)
+
+class RosterFilterSelect(discord.ui.DynamicItem[discord.ui.Select],
+                         template=r'dsr:roster:(?P<campo>tipo|mapa):(?P<tipo>-?\d+):(?P<mapa>-?\d+)(?::(?P<page>\d+):(?P<fpag>\d+))?'):
+    """
+    Select de filtro por tipo o mapa; al elegir se vuelve a la primera página
+
+    Con más valores de los que caben en un select, las opciones "◀️"/"▶️" pasan
+    de página de valores sin cambiar los filtros ni la página del roster.
+    """
+
+    def __init__(self, item: discord.ui.Select, campo: str, tipo: int, mapa: int, page: int = 0):
+        super().__init__(item)
+        self.campo, self.tipo, self.mapa, self.page = campo, tipo, mapa, page
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Select, match):
+        return cls(item, match['campo'], int(match['tipo']), int(match['mapa']), int(match['page'] or 0))
+
+    async def callback(self, interaction: discord.Interaction):
+        valor = self.item.values[0]
+        if valor.startswith("p:"):
+            paginas = {f"pagina_{self.campo}": int(valor[2:])}
+            await interaction.response.edit_message(
+                **render_roster(interaction.client, self.page, self.tipo, self.mapa, **paginas)
+            )
+            return
+        valor = int(valor)
+        tipo, mapa = (valor, self.mapa) if self.campo == "tipo" else (self.tipo, valor)
+        await interaction.response.edit_message(**render_roster(interaction.client, 0, tipo, mapa))
+
+def _opciones_filtro(valores: List[str], seleccionado: int, etiqueta_todos: str,
+                     pagina: Optional[int] = None) -> Tuple[List[discord.SelectOption], int]:
+    """
+    Opciones de una página del select de filtro
+
+    Returns:
+        (opciones, página mostrada); sin página explícita se muestra la del valor seleccionado
+    """
+    total_paginas = max(1, -(-len(valores) // FILTROS_POR_PAGINA))
+    if pagina is None:
+        pagina = seleccionado // FILTROS_POR_PAGINA if seleccionado >= 0 else 0
+    pagina = min(max(pagina, 0), total_paginas - 1)
+    inicio = pagina * FILTROS_POR_PAGINA
+
+    opciones = [discord.SelectOption(label=etiqueta_todos, value=str(TODOS), default=seleccionado == TODOS)]
+    if pagina > 0:
+        opciones.append(discord.SelectOption(label=f"◀️ Valores anteriores (página {pagina}/{total_paginas})",
+                                             value=f"p:{pagina - 1}"))
+    for posicion in range(inicio, min(inicio + FILTROS_POR_PAGINA, len(valores))):
+        opciones.append(discord.SelectOption(label=valores[posicion][:100], value=str(posicion),
+                                             default=posicion == seleccionado))
+    if pagina < total_paginas - 1:
+        opciones.append(discord.SelectOption(label=f"▶️ Más valores (página {pagina + 2}/{total_paginas})",
+                                             value=f"p:{pagina + 1}"))
+    return opciones, pagina
+
+def render_roster(bot, page: int = 0, tipo: int = TODOS, mapa: int = TODOS,
+                  pagina_tipo: Optional[int] = None, pagina_mapa: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Construye el embed y la vista de una página del navegador de roster
+
+    Args:
+        pagina_tipo, pagina_mapa: Página de valores de cada select de filtro
+            (por defecto la que contiene el valor seleccionado)
+
+    Returns:
+        kwargs para send_message/edit_message (embed y view)
+    """
+    indice = obtener_indice_roster(bot.digimon_manager)
+    total_paginas = indice.total_paginas(tipo, mapa)
+    page = min(max(page, 0), total_paginas - 1)
+    spawns_info = indice.pagina(page, tipo, mapa)
+
+    filtros = []
+    if 0 <= tipo < len(indice.tipos):
+        filtros.append(f"Tipo: {indice.tipos[tipo]}")
+    if 0 <= mapa < len(indice.mapas):
+        filtros.append(f"Mapa: {indice.mapas[mapa]}")
+
+    # Las líneas van en la descripción (hasta 4096 caracteres) y no en un campo (1024)
+    if spawns_info:
+        lineas = [
+            f"{TYPE_EMOJIS.get(s['digimon']['tipo'], '❓')} **{s['digimon']['nombre']}** "
+            f"({s['horario']['hora']:02d}:{s['horario']['minuto']:02d}) • {s['formato_tiempo']}"
+            for s in spawns_info
+        ]
+    else:
+        lineas = ["Ningún Digimon coincide con los filtros."]
+
+    embed = discord.Embed(
+        title=f"📚 Roster de Raids Digimon • Página {page + 1}/{total_paginas}",
+        description=(
+            f"**{' • '.join(filtros) if filtros else 'Todos los Digimon'}**\n\n" + "\n".join(lineas)
+        )[:4096],
+        color=EMBED_COLORS["info"]
+    )
+
+    embed.set_footer(text=f"{len(indice.filtrar(tipo, mapa))} horarios • DSR Spain")
+
+    view = discord.ui.View(timeout=None)
+
+    if spawns_info:
+        select = discord.ui.Select(
+            placeholder="Selecciona un Digimon para ver información detallada...",
+            custom_id=f"dsr:roster:sel:{page}:{tipo}:{mapa}",
+            options=[
+                discord.SelectOption(
+                    label=f"{s['digimon']['nombre']} ({s['horario']['hora']:02d}:{s['horario']['minuto']:02d})"[:100],
+                    description=f"{s['digimon']['tipo']} • {s['digimon']['mapa']}"[:100],
+                    value=s['digimon_key'],
+                    emoji=TYPE_EMOJIS.get(s['digimon']['tipo'], '❓')
+                )
+                for s in spawns_info
+            ],
+            row=0
+        )
+        view.add_item(RosterSpawnSelect(select))
+
+    for campo, valores, seleccionado, pagina_filtro, etiqueta_todos, fila in (
+        ("tipo", indice.tipos, tipo, pagina_tipo, "Todos los tipos", 1),
+        ("mapa", indice.mapas, mapa, pagina_mapa, "Todos los mapas", 2)
+    ):
+        opciones, pagina_filtro = _opciones_filtro(valores, seleccionado, etiqueta_todos, pagina_filtro)
+        view.add_item(RosterFilterSelect(discord.ui.Select(
+            placeholder=f"Filtrar por {campo}",
+            custom_id=f"dsr:roster:{campo}:{tipo}:{mapa}:{page}:{pagina_filtro}",
+            options=opciones,
+            row=fila
+        ), campo, tipo, mapa, page))
+
+    anterior = RosterPageButton("prev", max(page - 1, 0), tipo, mapa, label="◀️ Anterior", disabled=page == 0)
+    siguiente = RosterPageButton("next", min(page + 1, total_paginas - 1), tipo, mapa, label="Siguiente ▶️",
+                                 disabled=page >= total_paginas - 1)
+    anterior.row = siguiente.row = 3
+    view.add_item(anterior)
+    view.add_item(siguiente)
+
+    # Sin estado por mensaje: las interacciones las resuelven los DynamicItem registrados
+    view.stop()
+
+    return {'embed': embed, 'view': view}
+
+def registrar_navegador_roster(bot):
+    """Registra los componentes dinámicos del navegador (una vez, al arrancar)"""
+    bot.add_dynamic_items(RosterPageButton, RosterSpawnSelect, RosterFilterSelect)
@@ -0,0 +1,151 @@
+import datetime
+import logging
+from typing import Dict, Any, List, Optional, Tuple, Set
+from timing_wheel import HierarchicalTimingWheel
+from utils import obtener_proximo_spawn
+from data.default_data import KST
+
+logger = logging.getLogger(__name__)
+
+TimerKey = Tuple[str, int, int]
+
+def minuto_a_tick(momento: datetime.datetime) -> int:
+    """Convierte un datetime a tick de la rueda (minutos desde epoch)"""
+    return int(momento.timestamp()) // 60
+
+def tick_a_minuto(tick: int) -> datetime.datetime:
+    """Convierte un tick de la rueda a datetime en KST"""
+    return datetime.datetime.fromtimestamp(tick * 60, KST)
+
+class RaidScheduler:
+    """
+    Planificador de alertas basado en una rueda de temporización jerárquica
+
+    Cada combinación (horario de Digimon, offset) es una cadena independiente
+    con un único temporizador en la rueda: al dispararse se reprograma para la
+    siguiente ocurrencia. Los offsets de un horario son los minutos antes del
+    spawn que usa algún servidor (0 = alerta de spawn) más los avisos propios
+    del Digimon (`avisos_minutos`). En cada tick se recogen de una pasada todos
+    los temporizadores vencidos, sin recorrer la lista de horarios ni de offsets.
+    """
+
+    def __init__(self, digimon_manager, guild_settings, desde: datetime.datetime):
+        self.digimon_manager = digimon_manager
+        self.guild_settings = guild_settings
+        self.wheel = HierarchicalTimingWheel(minuto_a_tick(desde))
+        self.timers: Dict[TimerKey, Tuple[Dict[str, Any], Dict[str, int]]] = {}
+        self.offsets: Set[int] = set()
+        # Cadenas con un temporizador pendiente en la rueda: (horario, offset)
+        self.armed: Set[Tuple[TimerKey, int]] = set()
+        self.version: Optional[int] = None
+        self.fired = 0
+        self.rebuild()
+
+    @property
+    def current_time(self) -> datetime.datetime:
+        """Último minuto procesado por la rueda"""
+        return tick_a_minuto(self.wheel.current_tick)
+
+    def rebuild(self):
+        """Reconstruye todas las cadenas desde el minuto actual de la rueda"""
+        desde = self.current_time
+        self.wheel.clear()
+        self.timers = {}
+        self.armed = set()
+        self.offsets = self.guild_settings.all_offsets()
+        self.version = self.digimon_manager.version
+
+        for digimon in self.digimon_manager.get_all_digimon():
+            for horario in digimon["horarios"]:
+                key = (digimon["nombre"], horario["hora"], horario["minuto"])
+                self.timers[key] = (digimon, horario)
+                for offset in self.offsets_for(digimon):
+                    self._arm(key, offset, desde)
+
+        logger.info(f"🗓️ Scheduler: {len(self.timers)} horarios, {len(self.wheel)} temporizadores (offsets globales: {sorted(self.offsets, reverse=True)})")
+
+    def sync_offsets(self):
+        """
+        Añade cadenas para offsets nuevos (p. ej. tras cambiar la configuración de un servidor)
+
+        Un offset quitado y vuelto a añadir antes de que su cadena se dispare
+        conserva la cadena que sigue en la rueda en lugar de armar otra.
+        """
+        offsets = self.guild_settings.all_offsets()
+        nuevos = offsets - self.offsets
+        self.offsets = offsets
+
+        desde = self.current_time
+        for offset in nuevos:
+            for key in self.timers:
+                # Los avisos propios del Digimon ya tienen su cadena
+                if (key, offset) not in self.armed:
+                    self._arm(key, offset, desde)
+
+        if nuevos:
+            logger.info(f"🗓️ Scheduler: nuevos offsets {sorted(nuevos)}")
+
+    def offsets_for(self, digimon: Dict[str, Any]) -> Set[int]:
+        """Offsets activos para los horarios de un Digimon"""
+        return self.offsets.union(digimon.get("avisos_minutos", ()))
+
+    def _arm(self, key: TimerKey, offset: int, desde: datetime.datetime):
+        """Programa la primera ocurrencia cuya alerta (spawn - offset) sea posterior a `desde`"""
+        digimon, horario = self.timers[key]
+        temp_digimon = digimon.copy()
+        temp_digimon["horarios"] = [horario]
+
+        ocurrencia = obtener_proximo_spawn(temp_digimon, desde + datetime.timedelta(minutes=offset))
+        if ocurrencia is None:
+            return
+        self.wheel.schedule(minuto_a_tick(ocurrencia) - offset, (key, offset, ocurrencia))
+        self.armed.add((key, offset))
+
+    def advance(self, ahora: datetime.datetime) -> List[Dict[str, Any]]:
+        """
+        Avanza hasta `ahora` y devuelve las alertas vencidas
+
+        Returns:
+            Lista de eventos {digimon, horario, occurrence, offset, fire_time}
+            ordenados por momento de disparo
+        """
+        if self.version != self.digimon_manager.version:
+            self.rebuild()
+
+        eventos = []
+        for key, offset, ocurrencia in self.wheel.advance(minuto_a_tick(ahora)):
+            timer = self.timers.get(key)
+            if timer is None:
+                self.armed.discard((key, offset))
+                continue
+            digimon, horario = timer
+
+            eventos.append({
+                'digimon': digimon,
+                'horario': horario,
+                'occurrence': ocurrencia,
+                'offset': offset,
+                'fire_time': ocurrencia - datetime.timedelta(minutes=offset)
+            })
+
+            # Reprogramar la siguiente ocurrencia de esta cadena (si el offset sigue en uso)
+            if offset in self.offsets_for(digimon):
+                siguiente = ocurrencia + datetime.timedelta(days=digimon["recurrencia_dias"])
+                self.wheel.schedule(minuto_a_tick(siguiente) - offset, (key, offset, siguiente))
+            else:
+                # La cadena termina aquí; si el offset vuelve, sync_offsets la arma de nuevo
+                self.armed.discard((key, offset))
+
+        self.fired += len(eventos)
+        eventos.sort(key=lambda evento: (evento['fire_time'], -evento['offset']))
+        return eventos
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Estadísticas del planificador"""
+        return {
+            'timers': len(self.timers),
+            'offsets': sorted(self.offsets, reverse=True),
+            'scheduled': len(self.wheel),
+            'fired': self.fired,
+            'current_time': self.current_time.isoformat()
+        }
@@ -1,22 +1,52 @@
 import discord
 import datetime
+import time
 import asyncio
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Iterable, Callable, Union
 from utils import (
     obtener_tiempo_kst,
-    obtener_proximo_spawn,
     crear_embed_dsrworld,
-    obtener_todos_los_proximos_spawns
+    obtener_todos_los_proximos_spawns,
+    formato_fecha_spawn,
+    crear_embed_resumen_diario
 )
-from data.default_data import ALERT_SETTINGS
+from data.default_data import ALERT_SETTINGS, LEDGER_SETTINGS
+from rate_limit import TokenBucket
+from scheduler import RaidScheduler
+from metrics import ALERT_LATENCY, FANOUT_DURATION, GUILD_SENDS, GUILD_SEND_FAILURES
+from log_setup import asignar_contexto_log
+from tracing import TRAZADOR
+from raid_calendar import obtener_calendario
 
 logger = logging.getLogger(__name__)
 
+# Limita las ediciones de avisos a spawn (modo ciclo de vida de alertas)
+edit_limiter = TokenBucket(ALERT_SETTINGS["edit_rate_per_second"])
+
 def setup_raid_tasks(bot):
     """Configura las tareas de monitoreo de raids"""
     logger.info("🔧 Configurando tareas de raid monitoring...")
 
+def crear_scheduler(bot, ahora: datetime.datetime) -> RaidScheduler:
+    """
+    Crea el planificador de alertas posicionado para recuperar lo perdido
+    
+    La rueda arranca en el último minuto procesado según el ledger (limitado a la
+    ventana de frescura), así que el primer check_raids dispara también las
+    alertas que vencieron mientras el bot estaba caído o sin lease. Las entregas
+    ya registradas en el ledger se omiten, por lo que la recuperación es idempotente.
+    """
+    desde = ahora - datetime.timedelta(minutes=LEDGER_SETTINGS["catchup_freshness_minutes"])
+    last_tick = bot.alert_ledger.last_tick
+    if last_tick and last_tick > desde:
+        desde = min(last_tick, ahora)
+    
+    if desde < ahora:
+        logger.info(f"🔄 Recuperando alertas pendientes desde {desde.strftime('%H:%M KST')}")
+    
+    return RaidScheduler(bot.digimon_manager, bot.guild_settings, desde)
+
 async def check_raids(bot):
     """
     Función principal que verifica raids y envía alertas
@@ -26,108 +56,322 @@ async def check_raids(bot):
         ahora = obtener_tiempo_kst().replace(second=0, microsecond=0)
         logger.debug(f"🔍 Verificando raids a las {ahora.strftime('%H:%M:%S KST')}")
         
-        digimons = bot.digimon_manager.get_all_digimon()
-        for digimon in digimons:
-            await check_single_digimon(bot, digimon, ahora)
+        # Solo se procesan los temporizadores vencidos, no todo el roster
+        with TRAZADOR.span("scheduler_advance") as span:
+            eventos = bot.raid_scheduler.advance(ahora)
+            span.set(events=len(eventos))
+        for evento in eventos:
+            await dispatch_alert(bot, evento, ahora)
+        
+        # Resúmenes diarios de los servidores en modo digest
+        await send_daily_digests(bot, ahora)
+        
+        # Registrar el minuto como procesado para la recuperación tras reinicios
+        bot.alert_ledger.mark_tick(ahora)
         
         # Log de estado cada 10 minutos
         if ahora.minute % 10 == 0:
+            bot.alert_ledger.prune(ahora)
             await log_status_update(bot, ahora)
+        
+        # Una sola escritura por tick, fuera del event loop
+        await bot.alert_ledger.flush_async()
             
     except Exception as e:
         logger.error(f"❌ Error en check_raids: {e}")
 
-async def check_single_digimon(bot, digimon: Dict[str, Any], ahora: datetime.datetime):
-    """Verifica un Digimon específico para alertas"""
+async def dispatch_alert(bot, evento: Dict[str, Any], ahora: datetime.datetime) -> int:
+    """
+    Envía una alerta disparada por el planificador a los servidores interesados
+    
+    Returns:
+        Número de canales a los que se envió
+    """
+    digimon = evento['digimon']
+    # Cada alerta es la raíz de su propia traza (muestreada)
+    span = TRAZADOR.iniciar("alert", digimon=digimon['nombre'], offset=evento['offset'])
+    token = TRAZADOR.activar(span)
+    
     try:
-        # Verificar cada horario del Digimon
-        for horario in digimon["horarios"]:
-            # Crear una copia temporal con solo este horario
-            temp_digimon = digimon.copy()
-            temp_digimon["horarios"] = [horario]
-            
-            proximo_spawn = obtener_proximo_spawn(temp_digimon, ahora)
-            if proximo_spawn is None:
-                continue
-            
-            # Calcular tiempo de aviso temprano
-            aviso_temprano = proximo_spawn - datetime.timedelta(
-                minutes=ALERT_SETTINGS["early_warning_minutes"]
-            )
-            
-            # Verificar si es momento de alerta de aparición exacta
-            if ahora == proximo_spawn and ALERT_SETTINGS["spawn_alert"]:
-                await send_spawn_alert(bot, digimon, horario)
-            
-            # Verificar si es momento de aviso temprano
-            elif ahora == aviso_temprano:
-                await send_warning_alert(bot, digimon, horario, proximo_spawn)
-                
+        # Alertas demasiado antiguas (p. ej. tras una caída larga) ya no son útiles
+        retraso = ahora - evento['fire_time']
+        if retraso > datetime.timedelta(minutes=LEDGER_SETTINGS["catchup_freshness_minutes"]):
+            logger.info(f"⏭️ Alerta caducada omitida: {digimon['nombre']} ({evento['offset']} min, {retraso} tarde)")
+            return 0
+        
+        # Los DMs se encolan primero: el pipeline los envía mientras se recorren los canales
+        with TRAZADOR.span("dm_enqueue") as dm_span:
+            dm_span.set(users=enqueue_dm_alerts(bot, evento))
+        
+        # Destinatarios precalculados: solo se recorren los servidores interesados
+        with TRAZADOR.span("resolve_recipients") as recipients_span:
+            settings = bot.guild_settings
+            guild_ids = [
+                guild_id for guild_id in settings.recipients_for(digimon, evento['offset'])
+                if not settings.in_quiet_hours(guild_id, ahora)
+            ]
+            recipients_span.set(guilds=len(guild_ids))
+        if not guild_ids:
+            return 0
+        
+        if evento['offset'] == 0:
+            return await send_spawn_alert(bot, digimon, evento['horario'], evento['occurrence'], guild_ids)
+        return await send_warning_alert(bot, digimon, evento['horario'], evento['occurrence'], evento['offset'], guild_ids)
+        
     except Exception as e:
-        logger.error(f"❌ Error verificando {digimon.get('nombre', 'Unknown')}: {e}")
+        logger.error(f"❌ Error despachando alerta de {digimon.get('nombre', 'Unknown')}: {e}")
+        span.set(error=type(e).__name__)
+        return 0
+    finally:
+        TRAZADOR.restaurar(token)
+        TRAZADOR.terminar(span)
+
+# Spawns de las próximas 24 horas por (inicio del resumen, versión de datos)
+_resumen_cache: Dict[Any, List[Dict[str, Any]]] = {}
 
-async def send_spawn_alert(bot, digimon: Dict[str, Any], horario: Dict[str, int]):
-    """Envía alerta cuando aparece un raid"""
+async def send_daily_digests(bot, ahora: datetime.datetime) -> int:
+    """
+    Envía el resumen diario a los servidores en modo digest cuya hora ha llegado
+    
+    Se reintenta durante la ventana de frescura por si el bot estaba caído a la
+    hora en punto; el ledger evita enviar dos veces el resumen del mismo día.
+    
+    Returns:
+        Número de canales a los que se envió
+    """
+    inicio = ahora.replace(minute=0)
+    if ahora - inicio > datetime.timedelta(minutes=LEDGER_SETTINGS["catchup_freshness_minutes"]):
+        return 0
+    
+    settings = bot.guild_settings
+    guild_ids = settings.digest_guilds(inicio.hour)
+    if not guild_ids:
+        return 0
+    
     try:
-        embed = crear_embed_dsrworld(digimon, None, "spawn")
+        # El calendario se calcula una vez por día y hora de resumen, no por servidor
+        clave = (inicio, bot.digimon_manager.version)
+        spawns = _resumen_cache.get(clave)
+        if spawns is None:
+            _resumen_cache.clear()
+            spawns = _resumen_cache[clave] = obtener_calendario(bot.digimon_manager).spawns(
+                inicio, inicio + datetime.timedelta(days=1)
+            )
+        
+        # Un embed por combinación de filtros; normalmente todos comparten el mismo
+        grupos: Dict[tuple, List[int]] = {}
+        for guild_id in guild_ids:
+            grupos.setdefault(tuple(settings.get(guild_id)['filters']), []).append(guild_id)
+        
+        alert = {"digimon": "resumen", "horario": {"hora": inicio.hour, "minuto": 0}, "occurrence": inicio, "tipo": "digest"}
+        sent_count = 0
+        for grupo in grupos.values():
+            filtrados = [spawn for spawn in spawns if settings.passes_filters(grupo[0], spawn['digimon'])]
+            embed = crear_embed_resumen_diario(filtrados, inicio, inicio + datetime.timedelta(days=1))
+            sent_count += await send_to_raid_channels(bot, embed, alert=alert, guild_ids=grupo)
+        
+        if sent_count:
+            logger.info(f"📅 Enviado resumen diario ({len(spawns)} spawns) a {sent_count} canal(es)")
+        return sent_count
         
-        # Agregar información específica del horario
+    except Exception as e:
+        logger.error(f"❌ Error enviando resúmenes diarios: {e}")
+        return 0
+
+def enqueue_dm_alerts(bot, evento: Dict[str, Any]) -> int:
+    """
+    Encola DMs para los usuarios suscritos al Digimon, su tipo o su recompensa
+    
+    Los DMs siguen los avisos por defecto y los propios del Digimon, no la
+    configuración de cada servidor.
+    
+    Returns:
+        Número de DMs encolados
+    """
+    digimon, offset = evento['digimon'], evento['offset']
+    if offset not in bot.guild_settings.alert_offsets() and offset not in digimon.get('avisos_minutos', ()):
+        return 0
+    
+    user_ids = bot.subscriptions.subscribers_for(digimon)
+    if not user_ids:
+        return 0
+    
+    embed = crear_embed_alerta(digimon, evento['horario'], evento['occurrence'], offset)
+    tipo = "spawn" if offset == 0 else tipo_aviso(offset)
+    alert = {"digimon": digimon['nombre'], "horario": evento['horario'], "occurrence": evento['occurrence'], "tipo": tipo}
+    
+    encolados = bot.dm_pipeline.enqueue(user_ids, embed, alert)
+    logger.info(f"📬 Encolados {encolados} DM(s): {digimon['nombre']} ({offset} min)")
+    return encolados
+
+def crear_embed_alerta(digimon: Dict[str, Any], horario: Dict[str, int],
+                       spawn_time: datetime.datetime, offset: int) -> discord.Embed:
+    """Embed de una alerta de spawn (offset 0) o de aviso previo, igual para canales y DMs"""
+    if offset == 0:
+        embed = crear_embed_dsrworld(digimon, None, "spawn")
         embed.add_field(
             name="⏰ Horario",
             value=f"{horario['hora']:02d}:{horario['minuto']:02d} KST",
             inline=True
         )
+        return embed
+    
+    embed = crear_embed_dsrworld(digimon, datetime.timedelta(minutes=offset), "warning", spawn_time)
+    
+    embed.add_field(
+        name="⏰ Horario exacto",
+        value=f"{horario['hora']:02d}:{horario['minuto']:02d} KST",
+        inline=True
+    )
+    
+    embed.add_field(
+        name="📅 Fecha y hora",
+        value=formato_fecha_spawn(spawn_time),
+        inline=True
+    )
+    return embed
+
+async def send_spawn_alert(bot, digimon: Dict[str, Any], horario: Dict[str, int],
+                           spawn_time: Optional[datetime.datetime] = None,
+                           guild_ids: Optional[Iterable[int]] = None):
+    """
+    Envía alerta cuando aparece un raid
+    
+    Returns:
+        Número de canales a los que se envió
+    """
+    try:
+        with TRAZADOR.span("render_embed"):
+            embed = crear_embed_alerta(digimon, horario, spawn_time, 0)
+        
+        # La mención (rol o @everyone/@here) depende de la configuración de cada servidor
+        content = lambda guild: bot.guild_settings.mention_for(guild.id, digimon)
+        
+        alert = None
+        if spawn_time is not None:
+            alert = {"digimon": digimon['nombre'], "horario": horario, "occurrence": spawn_time, "tipo": "spawn"}
         
-        content = ""
-        if ALERT_SETTINGS["mention_everyone"]:
-            content = "@everyone"
+        # En modo ciclo de vida el aviso previo más cercano se edita y la mención va en un ping corto
+        edit_from = None
+        ping_content = None
+        if ALERT_SETTINGS["edit_warning_on_spawn"]:
+            edit_from = [
+                tipo_aviso(offset)
+                for offset in sorted(bot.guild_settings.all_offsets().union(digimon.get('avisos_minutos', ())))
+                if offset > 0
+            ]
+            ping_content = lambda guild: f"{content(guild)} 🔥 **{digimon['nombre']}** ha aparecido" if content(guild) else ""
         
         # Enviar a todos los canales configurados
-        sent_count = await send_to_raid_channels(bot, embed, content)
+        sent_count = await send_to_raid_channels(bot, embed, content, alert, edit_from, ping_content, guild_ids)
         
         logger.info(f"🔥 Enviada alerta de spawn: {digimon['nombre']} ({horario['hora']:02d}:{horario['minuto']:02d}) a {sent_count} canal(es)")
+        return sent_count
         
     except Exception as e:
         logger.error(f"❌ Error enviando alerta de spawn para {digimon.get('nombre', 'Unknown')}: {e}")
+        return 0
 
-async def send_warning_alert(bot, digimon: Dict[str, Any], horario: Dict[str, int], spawn_time: datetime.datetime):
-    """Envía aviso temprano de raid"""
+def tipo_aviso(offset: int) -> str:
+    """Tipo de alerta en el ledger para un aviso previo a `offset` minutos del spawn"""
+    return f"warning_{offset}"
+
+def categoria_alerta(tipo: str) -> str:
+    """Tipo de alerta sin el offset (spawn, warning, digest), para etiquetar métricas"""
+    return "warning" if tipo.startswith("warning_") else tipo
+
+def id_alerta(alert: Dict[str, Any]) -> str:
+    """Identificador legible de una alerta para los logs (Digimon@ocurrencia:tipo)"""
+    return f"{alert['digimon']}@{alert['occurrence'].strftime('%Y%m%dT%H%M')}:{alert['tipo']}"
+
+def momento_programado(alert: Dict[str, Any]) -> datetime.datetime:
+    """Momento en que la alerta debía salir: el spawn menos el offset del aviso"""
+    if alert['tipo'].startswith("warning_"):
+        return alert['occurrence'] - datetime.timedelta(minutes=int(alert['tipo'][len("warning_"):]))
+    return alert['occurrence']
+
+async def send_warning_alert(bot, digimon: Dict[str, Any], horario: Dict[str, int], spawn_time: datetime.datetime,
+                             offset: Optional[int] = None, guild_ids: Optional[Iterable[int]] = None):
+    """
+    Envía aviso temprano de raid
+    
+    Args:
+        offset: Minutos antes del spawn (por defecto ALERT_SETTINGS["early_warning_minutes"])
+        guild_ids: Servidores destinatarios (por defecto todos)
+    
+    Returns:
+        Número de canales a los que se envió
+    """
     try:
-        tiempo_restante = datetime.timedelta(minutes=ALERT_SETTINGS["early_warning_minutes"])
-        embed = crear_embed_dsrworld(digimon, tiempo_restante, "warning")
+        if offset is None:
+            offset = ALERT_SETTINGS["early_warning_minutes"]
+        with TRAZADOR.span("render_embed"):
+            embed = crear_embed_alerta(digimon, horario, spawn_time, offset)
         
-        # Agregar información específica
-        embed.add_field(
-            name="⏰ Horario exacto",
-            value=f"{horario['hora']:02d}:{horario['minuto']:02d} KST",
-            inline=True
-        )
-        
-        embed.add_field(
-            name="📅 Fecha y hora",
-            value=spawn_time.strftime("%Y-%m-%d %H:%M KST"),
-            inline=True
-        )
+        alert = {"digimon": digimon['nombre'], "horario": horario, "occurrence": spawn_time, "tipo": tipo_aviso(offset)}
         
         # Enviar a todos los canales configurados
-        sent_count = await send_to_raid_channels(bot, embed)
+        sent_count = await send_to_raid_channels(bot, embed, alert=alert, guild_ids=guild_ids)
         
-        logger.info(f"⏰ Enviado aviso de 20min: {digimon['nombre']} ({horario['hora']:02d}:{horario['minuto']:02d}) a {sent_count} canal(es)")
+        logger.info(f"⏰ Enviado aviso de {offset}min: {digimon['nombre']} ({horario['hora']:02d}:{horario['minuto']:02d}) a {sent_count} canal(es)")
+        return sent_count
         
     except Exception as e:
         logger.error(f"❌ Error enviando aviso temprano para {digimon.get('nombre', 'Unknown')}: {e}")
+        return 0
+
+Contenido = Union[str, Callable[[discord.Guild], str], None]
 
-async def send_to_raid_channels(bot, embed: discord.Embed, content: str = "") -> int:
+async def send_to_raid_channels(bot, embed: discord.Embed, content: Contenido = "",
+                                alert: Optional[Dict[str, Any]] = None,
+                                edit_from: Optional[List[str]] = None,
+                                ping_content: Contenido = None,
+                                guild_ids: Optional[Iterable[int]] = None) -> int:
     """
     Envía un mensaje a todos los canales de raid configurados
     
+    Args:
+        content: Texto del mensaje, o función que lo calcula por servidor
+        alert: Identidad de la alerta (digimon, horario, occurrence, tipo). Si se
+            indica, las entregas se registran en el ledger y los servidores que
+            ya la recibieron se omiten.
+        edit_from: Tipos de alerta previa de la misma ocurrencia, por orden de
+            preferencia, cuyo mensaje se edita en lugar de enviar uno nuevo
+        ping_content: Mensaje corto que se envía aparte cuando se edita y hace
+            falta mencionar (por defecto `content`)
+        guild_ids: Limitar el envío a estos servidores (por defecto todos)
+    
     Returns:
         Número de canales a los que se envió exitosamente
     """
     sent_count = 0
+    ledger = bot.alert_ledger if alert else None
+    categoria = categoria_alerta(alert['tipo']) if alert else "manual"
+    programado = momento_programado(alert) if alert else None
+    inicio = time.perf_counter()
+    if alert:
+        asignar_contexto_log(alert_id=id_alerta(alert))
+    
+    if guild_ids is None:
+        guilds = bot.guilds
+    else:
+        guilds = [guild for guild in map(bot.get_guild, guild_ids) if guild is not None]
     
-    for guild in bot.guilds:
+    fanout = TRAZADOR.iniciar("fanout", tipo=categoria, guilds=len(guilds))
+    token = TRAZADOR.activar(fanout)
+    
+    for guild in guilds:
+        asignar_contexto_log(guild_id=guild.id)
+        guild_span = TRAZADOR.iniciar("guild_send", guild_id=guild.id)
+        resultado = "error"
         try:
+            key = None
+            if ledger:
+                key = ledger.make_key(guild.id, alert['digimon'], alert['horario'], alert['occurrence'], alert['tipo'])
+                if ledger.was_delivered(key):
+                    resultado = "duplicate"
+                    continue
+            
             channel_id = bot.raid_channels.get(guild.id)
             
             if not channel_id:
@@ -137,25 +381,103 @@ async def send_to_raid_channels(bot, embed: discord.Embed, content: str = "") ->
                     bot.raid_channels[guild.id] = channel_id
             
             if channel_id:
-                channel = bot.get_channel(channel_id)
+                channel = guild.get_channel(channel_id)
                 if channel and channel.permissions_for(guild.me).send_messages:
-                    await channel.send(content, embed=embed)
+                    guild_content = content(guild) if callable(content) else content
+                    
+                    message = None
+                    if ledger and edit_from:
+                        message = await edit_previous_alert(ledger, channel, guild.id, alert, edit_from, embed)
+                        if message is not None:
+                            # La edición ya es la entrega: se registra antes de mencionar para
+                            # que un fallo de la mención no provoque otra edición y otra mención
+                            ledger.record_delivery(key, alert['occurrence'], channel.id, message.id)
+                            if guild_content:
+                                ping = ping_content(guild) if callable(ping_content) else ping_content
+                                try:
+                                    await channel.send(ping or guild_content)
+                                except discord.HTTPException as e:
+                                    logger.warning(f"⚠️ Alerta editada en {guild.name} pero falló la mención: {e}")
+                    
+                    if message is None:
+                        message = await channel.send(guild_content, embed=embed)
+                        resultado = "sent"
+                        if ledger:
+                            ledger.record_delivery(key, alert['occurrence'], channel.id, message.id)
+                    else:
+                        resultado = "edited"
                     sent_count += 1
+                    if programado is not None:
+                        ALERT_LATENCY.labels(categoria).observe(max(0.0, (obtener_tiempo_kst() - programado).total_seconds()))
                 else:
                     # Canal no válido, limpiarlo
                     if guild.id in bot.raid_channels:
                         del bot.raid_channels[guild.id]
                     logger.warning(f"⚠️ Canal no válido para {guild.name}, removido de configuración")
+                    resultado = "invalid_channel"
+            else:
+                resultado = "no_channel"
                     
         except discord.Forbidden:
             logger.warning(f"⚠️ Sin permisos para enviar mensaje en {guild.name}")
+            resultado = "forbidden"
+            GUILD_SEND_FAILURES.labels(guild.id, resultado).inc()
         except discord.HTTPException as e:
             logger.warning(f"⚠️ Error HTTP enviando mensaje a {guild.name}: {e}")
+            resultado = "http_error"
+            GUILD_SEND_FAILURES.labels(guild.id, resultado).inc()
         except Exception as e:
             logger.error(f"❌ Error enviando a {guild.name}: {e}")
+            GUILD_SEND_FAILURES.labels(guild.id, resultado).inc()
+        finally:
+            GUILD_SENDS.labels(resultado).inc()
+            TRAZADOR.terminar(guild_span, outcome=resultado)
+        
+        # Las entregas se escriben en el journal sobre la marcha: si el proceso muere a
+        # mitad del fan-out, la recuperación no vuelve a enviar a quien ya la recibió
+        if ledger and ledger.pending_records >= LEDGER_SETTINGS["journal_batch_records"]:
+            await ledger.flush_async(compactar=False)
     
+    TRAZADOR.restaurar(token)
+    TRAZADOR.terminar(fanout, sent=sent_count)
+    asignar_contexto_log(alert_id=None, guild_id=None)
+    if ledger:
+        await ledger.flush_async(compactar=False)
+    
+    FANOUT_DURATION.labels(categoria).observe(time.perf_counter() - inicio)
     return sent_count
 
+async def edit_previous_alert(ledger, channel, guild_id: int, alert: Dict[str, Any],
+                              edit_from: List[str], embed: discord.Embed) -> Optional[discord.PartialMessage]:
+    """
+    Edita el mensaje de una alerta previa de la misma ocurrencia (p. ej. el aviso
+    temprano más cercano al spawn) para convertirlo en la alerta actual
+    
+    Returns:
+        El mensaje editado, o None si no existe y hay que enviar uno nuevo
+    """
+    previous = None
+    for tipo in edit_from:
+        previous_key = ledger.make_key(guild_id, alert['digimon'], alert['horario'], alert['occurrence'], tipo)
+        previous = ledger.get_entry(previous_key)
+        if previous and previous.get('message_id'):
+            break
+    
+    if not previous or not previous.get('message_id') or previous.get('channel_id') != channel.id:
+        return None
+    
+    try:
+        await edit_limiter.acquire()
+        message = channel.get_partial_message(previous['message_id'])
+        await message.edit(content=None, embed=embed)
+        return message
+    except discord.NotFound:
+        logger.info(f"ℹ️ Aviso previo borrado en {channel.name}, se envía mensaje nuevo")
+    except discord.HTTPException as e:
+        logger.warning(f"⚠️ No se pudo editar el aviso previo en {channel.name}: {e}")
+    
+    return None
+
 async def find_suitable_channel(guild: discord.Guild) -> Optional[int]:
     """
     Busca un canal adecuado para alertas de raid en un servidor
@@ -190,7 +512,7 @@ async def find_suitable_channel(guild: discord.Guild) -> Optional[int]:
 async def log_status_update(bot, ahora: datetime.datetime):
     """Log de estado cada 10 minutos para debugging"""
     try:
-        spawns_info = obtener_todos_los_proximos_spawns()
+        spawns_info = obtener_todos_los_proximos_spawns(bot.digimon_manager)
         
         logger.info("📊 === Estado del sistema ===")
         logger.info(f"🕐 Hora actual KST: {ahora.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -198,6 +520,38 @@ async def log_status_update(bot, ahora: datetime.datetime):
         logger.info(f"🌐 Servidores: {len(bot.guilds)}")
         logger.info(f"📺 Canales configurados: {len(bot.raid_channels)}")
         
+        ha_stats = bot.alert_lease.get_statistics()
+        logger.info(
+            f"🔐 HA: {ha_stats['role']} ({ha_stats['instance_id']}) • "
+            f"failovers: {ha_stats['takeovers']} • "
+            f"último failover: {ha_stats['last_failover_seconds'] or 0:.1f}s • "
+            f"posibles dobles envíos: {ha_stats['double_send_suspected']}"
+        )
+        
+        dm_stats = bot.dm_pipeline.get_statistics()
+        if dm_stats['enqueued']:
+            logger.info(
+                f"📬 DMs: {dm_stats['delivered']}/{dm_stats['enqueued']} entregados • "
+                f"en cola: {dm_stats['queued']} • DMs cerrados: {dm_stats['dm_closed']} • "
+                f"reintentos: {dm_stats['retried']} • fallidos: {dm_stats['failed']} • "
+                f"latencia p50/p95: {dm_stats['latency_p50'] or 0:.1f}s/{dm_stats['latency_p95'] or 0:.1f}s"
+            )
+        
+        loop_stats = bot.loop_monitor.get_statistics()
+        if loop_stats['lag_p50'] is not None:
+            logger.info(
+                f"🩺 Event loop: lag p50/p95 {loop_stats['lag_p50'] * 1000:.1f}/{loop_stats['lag_p95'] * 1000:.1f} ms • "
+                f"máximo: {loop_stats['lag_max'] * 1000:.0f} ms • bloqueos lentos: {loop_stats['slow_callbacks']}"
+            )
+        
+        if bot.raid_scheduler is not None:
+            scheduler_stats = bot.raid_scheduler.get_statistics()
+            logger.info(
+                f"🗓️ Scheduler: {scheduler_stats['scheduled']} temporizadores • "
+                f"offsets: {scheduler_stats['offsets']} • "
+                f"disparados: {scheduler_stats['fired']}"
+            )
+        
         if spawns_info:
             proximo = spawns_info[0]
             tiempo_restante = proximo['tiempo_restante'].total_seconds()
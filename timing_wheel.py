@@ -0,0 +1,139 @@
+import logging
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class TimerHandle:
+    """Referencia a un temporizador programado (permite cancelarlo en O(1))"""
+
+    __slots__ = ('deadline', 'payload', 'cancelled')
+
+    def __init__(self, deadline: int, payload: Any):
+        self.deadline = deadline
+        self.payload = payload
+        self.cancelled = False
+
+    def cancel(self):
+        """Cancela el temporizador; se descarta al llegar a su ranura"""
+        self.cancelled = True
+
+class HierarchicalTimingWheel:
+    """
+    Rueda de temporización jerárquica con resolución de un tick (un minuto)
+
+    Cada nivel tiene 64 ranuras y cubre 64 veces el rango del anterior
+    (64 minutos, ~3 días, ~182 días, ~32 años con 4 niveles). Insertar y
+    disparar cuestan O(1) amortizado por temporizador, sin importar cuántos
+    haya programados: los temporizadores lejanos bajan de nivel ("cascada")
+    solo cuando su ranura superior se alcanza.
+    """
+
+    SLOT_BITS = 6
+    SLOTS = 1 << SLOT_BITS
+    SLOT_MASK = SLOTS - 1
+
+    def __init__(self, current_tick: int, levels: int = 4):
+        self.current_tick = current_tick
+        self.levels = levels
+        self.wheels: List[List[List[TimerHandle]]] = [
+            [[] for _ in range(self.SLOTS)] for _ in range(levels)
+        ]
+        self.overflow: List[TimerHandle] = []
+        self.expired: List[TimerHandle] = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def schedule(self, deadline: int, payload: Any) -> TimerHandle:
+        """
+        Programa `payload` para el tick `deadline`
+
+        Los plazos ya vencidos se disparan en el próximo advance().
+        """
+        handle = TimerHandle(deadline, payload)
+        self._place(handle)
+        self.count += 1
+        return handle
+
+    def _place(self, handle: TimerHandle):
+        delta = handle.deadline - self.current_tick
+        if delta <= 0:
+            self.expired.append(handle)
+            return
+
+        for level in range(self.levels):
+            if delta < 1 << (self.SLOT_BITS * (level + 1)):
+                slot = (handle.deadline >> (self.SLOT_BITS * level)) & self.SLOT_MASK
+                self.wheels[level][slot].append(handle)
+                return
+
+        self.overflow.append(handle)
+
+    def _cascade(self, level: int):
+        """Redistribuye la ranura actual de `level` en los niveles inferiores"""
+        slot = (self.current_tick >> (self.SLOT_BITS * level)) & self.SLOT_MASK
+        handles = self.wheels[level][slot]
+        self.wheels[level][slot] = []
+        for handle in handles:
+            if not handle.cancelled:
+                self._place(handle)
+            else:
+                self.count -= 1
+
+    def advance(self, target_tick: int) -> List[Any]:
+        """
+        Avanza la rueda hasta `target_tick` (incluido)
+
+        Returns:
+            Payloads vencidos, en orden de plazo
+        """
+        due: List[TimerHandle] = []
+
+        if self.expired:
+            due.extend(self.expired)
+            self.expired = []
+
+        while self.current_tick < target_tick:
+            self.current_tick += 1
+
+            # Cascada: al completar una vuelta de un nivel se baja la ranura del
+            # nivel superior. Se procesa de arriba abajo para que lo que baja de
+            # un nivel alto llegue a tiempo a la ranura actual del nivel inferior.
+            top = 0
+            while top + 1 < self.levels and (self.current_tick & ((1 << (self.SLOT_BITS * (top + 1))) - 1)) == 0:
+                top += 1
+
+            if top == self.levels - 1 and (self.current_tick & ((1 << (self.SLOT_BITS * self.levels)) - 1)) == 0:
+                overflow, self.overflow = self.overflow, []
+                for handle in overflow:
+                    self._place(handle)
+
+            for level in range(top, 0, -1):
+                self._cascade(level)
+
+            slot = self.current_tick & self.SLOT_MASK
+            if self.wheels[0][slot]:
+                due.extend(self.wheels[0][slot])
+                self.wheels[0][slot] = []
+
+            # Los vencidos que produjo la cascada pertenecen a este tick
+            if self.expired:
+                due.extend(self.expired)
+                self.expired = []
+
+        fired = []
+        for handle in due:
+            self.count -= 1
+            if not handle.cancelled:
+                fired.append(handle.payload)
+        return fired
+
+    def clear(self, current_tick: Optional[int] = None):
+        """Vacía la rueda (opcionalmente reposicionándola en otro tick)"""
+        if current_tick is not None:
+            self.current_tick = current_tick
+        self.wheels = [[[] for _ in range(self.SLOTS)] for _ in range(self.levels)]
+        self.overflow = []
+        self.expired = []
+        self.count = 0
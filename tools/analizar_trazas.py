@@ -0,0 +1,103 @@
+"""
+Analizador de trazas
+
+Lee el archivo JSON-lines que genera tracing.TRAZADOR y resume dónde se va
+el tiempo: duración por etapa (render_embed, fanout, guild_send...), las
+trazas más lentas y los servidores con envíos más lentos o con más fallos.
+
+Uso:
+    python tools/analizar_trazas.py [--archivo data/traces.jsonl] [--top 10] [--raiz alert]
+"""
+import os
+import sys
+import json
+import argparse
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.default_data import TRACING_SETTINGS
+
+def percentil(muestras, fraccion: float) -> float:
+    ordenadas = sorted(muestras)
+    return ordenadas[min(len(ordenadas) - 1, int(fraccion * len(ordenadas)))] if ordenadas else 0.0
+
+def leer_trazas(archivo: str, raiz=None):
+    with open(archivo, encoding="utf-8") as f:
+        for numero, linea in enumerate(f, 1):
+            try:
+                traza = json.loads(linea)
+            except json.JSONDecodeError:
+                print(f"⚠️ Línea {numero} ilegible, omitida", file=sys.stderr)
+                continue
+            if raiz is None or traza["root"] == raiz:
+                yield traza
+
+def main():
+    parser = argparse.ArgumentParser(description="Analiza las trazas de alertas y comandos")
+    parser.add_argument("--archivo", default=TRACING_SETTINGS["file"])
+    parser.add_argument("--top", type=int, default=10, help="Filas de cada ranking")
+    parser.add_argument("--raiz", default=None, help="Solo trazas con esta raíz (alert, command, fanout...)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.archivo):
+        print(f"❌ No existe {args.archivo} (¿TRACE_SAMPLE_RATE > 0?)")
+        sys.exit(1)
+
+    etapas = defaultdict(list)
+    servidores = defaultdict(list)
+    fallos = defaultdict(lambda: defaultdict(int))
+    lentas = []
+    total = 0
+
+    for traza in leer_trazas(args.archivo, args.raiz):
+        total += 1
+        raiz = next((span for span in traza["spans"] if span["parent"] is None), None)
+        etiqueta = traza["root"]
+        if raiz:
+            atributos = raiz["attrs"]
+            etiqueta += f" {atributos.get('digimon') or atributos.get('command') or atributos.get('tipo') or ''}".rstrip()
+            if "offset" in atributos:
+                etiqueta += f" ({atributos['offset']} min)"
+        lentas.append((traza["ms"], etiqueta, traza["trace_id"]))
+
+        for span in traza["spans"]:
+            etapas[span["name"]].append(span["ms"])
+            if span["name"] == "guild_send":
+                guild_id = span["attrs"].get("guild_id")
+                servidores[guild_id].append(span["ms"])
+                resultado = span["attrs"].get("outcome")
+                if resultado not in ("sent", "edited", "duplicate"):
+                    fallos[guild_id][resultado] += 1
+
+    if not total:
+        print("Sin trazas que analizar.")
+        return
+
+    print(f"📊 {total} trazas en {args.archivo}\n")
+
+    print("Etapas (ms):")
+    print(f"  {'etapa':<20} {'n':>8} {'p50':>9} {'p95':>9} {'máx':>9} {'total':>11}")
+    for nombre, duraciones in sorted(etapas.items(), key=lambda item: -sum(item[1])):
+        print(f"  {nombre:<20} {len(duraciones):>8} {percentil(duraciones, 0.5):>9.2f} "
+              f"{percentil(duraciones, 0.95):>9.2f} {max(duraciones):>9.2f} {sum(duraciones):>11.1f}")
+
+    print("\nTrazas más lentas:")
+    for ms, etiqueta, trace_id in sorted(lentas, reverse=True)[:args.top]:
+        print(f"  {ms:>10.1f} ms  {etiqueta}  [{trace_id}]")
+
+    if servidores:
+        print("\nServidores más lentos (guild_send p95):")
+        ranking = sorted(servidores.items(), key=lambda item: -percentil(item[1], 0.95))
+        for guild_id, duraciones in ranking[:args.top]:
+            print(f"  {guild_id}: p95 {percentil(duraciones, 0.95):.1f} ms • máx {max(duraciones):.1f} ms • {len(duraciones)} envíos")
+
+    if fallos:
+        print("\nServidores con más fallos:")
+        ranking = sorted(fallos.items(), key=lambda item: -sum(item[1].values()))
+        for guild_id, resultados in ranking[:args.top]:
+            detalle = ", ".join(f"{resultado}: {cuenta}" for resultado, cuenta in sorted(resultados.items()))
+            print(f"  {guild_id}: {detalle}")
+
+if __name__ == "__main__":
+    main()
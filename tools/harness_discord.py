@@ -0,0 +1,405 @@
+"""
+Banco de pruebas de carga contra un Discord falso
+
+Levanta en local un servidor aiohttp que imita los endpoints REST de
+mensajes de Discord (enviar, editar y ejecutar webhooks), con sus cabeceras
+X-RateLimit y respuestas 429 (límite global, límite por canal y 429
+aleatorios), y apunta discord.http.Route.BASE a él. Después crea miles de
+servidores, canales y permisos falsos con los mismos payloads que entrega el
+gateway y ejecuta el camino real de entrega del bot (send_warning_alert y
+send_spawn_alert -> send_to_raid_channels) para un spawn simulado.
+
+Al terminar informa de la distribución del tiempo de entrega de extremo a
+extremo (desde que empieza el fan-out hasta que el servidor falso recibe el
+mensaje de cada canal), los 429 servidos y los resultados por servidor.
+
+Uso:
+    python tools/harness_discord.py [--servidores 1000] [--limite-global 50] [--latencia-ms 40]
+                                    [--fraccion-429 0.0] [--sin-permiso 0.01] [--prohibidos 0.005]
+                                    [--sin-canal 0.01] [--editar] [--webhooks]
+"""
+import os
+import sys
+import time
+import json
+import random
+import asyncio
+import logging
+import argparse
+import datetime
+import tempfile
+from collections import Counter, defaultdict
+from typing import Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+import discord.http
+import discord.webhook.async_
+from aiohttp import web
+
+from data.default_data import DEFAULT_DIGIMONS, ALERT_SETTINGS, KST
+from data.alert_ledger import AlertLedger
+from data.guild_settings import GuildSettingsManager
+from tasks import send_warning_alert, send_spawn_alert
+from dm_delivery import percentil
+from metrics import GUILD_SENDS
+
+# Resultados de send_to_raid_channels que cuentan como entrega fallida
+RESULTADOS_FALLIDOS = ("forbidden", "http_error", "error")
+
+ID_BOT = 900000000000000001
+# discord.py trata un 429 sin cabecera Via como un baneo de Cloudflare y no reintenta;
+# los 429 reales de la API la llevan
+VIA_DISCORD = "1.1 google"
+PERMISO_ENVIAR = discord.Permissions(send_messages=True).value
+PERMISOS_BOT = discord.Permissions(view_channel=True, send_messages=True, embed_links=True,
+                                   mention_everyone=True, read_message_history=True).value
+
+def respuesta_json(datos, status: int = 200, headers=None) -> web.Response:
+    """Respuesta JSON con Content-Type exacto (discord.py no acepta "; charset=utf-8")"""
+    return web.Response(body=json.dumps(datos).encode("utf-8"), status=status,
+                        headers={**(headers or {}), "Content-Type": "application/json"})
+
+class ServidorDiscordFalso:
+    """
+    Imitación local de la API REST de mensajes de Discord
+
+    Límites emulados:
+      - Global: `limite_global` peticiones por segundo para todo el bot (0 = sin
+        límite). Al superarlo responde 429 con "global": true.
+      - Por canal: `limite_canal` mensajes cada `ventana_canal` segundos, con
+        las cabeceras X-RateLimit-* que usa discord.py para esperar antes de
+        que llegue el 429.
+      - Aleatorio: una fracción de peticiones recibe 429 para forzar reintentos.
+    Los canales en `prohibidos` responden 403 (permisos cambiados sin que la
+    caché del bot se entere).
+    """
+
+    def __init__(self, latencia_ms: float = 40.0, limite_global: int = 50, limite_canal: int = 5,
+                 ventana_canal: float = 5.0, fraccion_429: float = 0.0, semilla: int = 0):
+        self.latencia = latencia_ms / 1000
+        self.limite_global = limite_global
+        self.limite_canal = limite_canal
+        self.ventana_canal = ventana_canal
+        self.fraccion_429 = fraccion_429
+        self.rng = random.Random(semilla)
+        self.prohibidos = set()
+        self.webhooks = {}
+        self.mensajes = {}
+        # (momento perf_counter, canal, tipo) de cada petición aceptada
+        self.entregas = []
+        self.contadores = Counter()
+        self._segundo_global = 0
+        self._peticiones_segundo = 0
+        self._buckets_canal = defaultdict(list)
+        self._runner = None
+        self.puerto = None
+
+    def crear_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/v10/users/@me", self._usuario)
+        app.router.add_get("/api/v10/oauth2/applications/@me", self._aplicacion)
+        app.router.add_post("/api/v10/channels/{canal}/messages", self._enviar)
+        app.router.add_patch("/api/v10/channels/{canal}/messages/{mensaje}", self._editar)
+        app.router.add_post("/api/v10/webhooks/{webhook}/{token}", self._webhook)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        self._runner = web.AppRunner(self.crear_app(), access_log=None)
+        await self._runner.setup()
+        sitio = web.TCPSite(self._runner, host, port)
+        await sitio.start()
+        self.puerto = sitio._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{self.puerto}/api/v10"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def usuario_bot(self):
+        return {"id": str(ID_BOT), "username": "Alerta Boss DSR", "discriminator": "0",
+                "global_name": None, "avatar": None, "bot": True}
+
+    async def _usuario(self, request):
+        return respuesta_json(self.usuario_bot())
+
+    async def _aplicacion(self, request):
+        return respuesta_json({
+            "id": str(ID_BOT), "name": "Alerta Boss DSR", "icon": None, "description": "",
+            "rpc_origins": [], "bot_public": True, "bot_require_code_grant": False,
+            "owner": {**self.usuario_bot(), "id": str(ID_BOT + 1), "username": "owner", "bot": False},
+            "verify_key": "0" * 64, "flags": 0
+        })
+
+    def _limitar(self, canal: int):
+        """Devuelve la respuesta 429 si la petición supera algún límite, o las cabeceras de éxito"""
+        ahora = time.monotonic()
+        segundo = int(ahora)
+        if segundo != self._segundo_global:
+            self._segundo_global, self._peticiones_segundo = segundo, 0
+        self._peticiones_segundo += 1
+
+        if self.limite_global and self._peticiones_segundo > self.limite_global:
+            self.contadores["429_global"] += 1
+            espera = round(segundo + 1 - ahora, 3)
+            return respuesta_json(
+                {"message": "You are being rate limited.", "retry_after": espera, "global": True},
+                status=429, headers={"X-RateLimit-Global": "true", "X-RateLimit-Scope": "global",
+                                     "Retry-After": str(espera), "Via": VIA_DISCORD}
+            ), None
+
+        bucket = [t for t in self._buckets_canal[canal] if ahora - t < self.ventana_canal]
+        self._buckets_canal[canal] = bucket
+        reinicio = round(self.ventana_canal - (ahora - bucket[0]), 3) if bucket else self.ventana_canal
+        if len(bucket) >= self.limite_canal or self.rng.random() < self.fraccion_429:
+            self.contadores["429_canal" if len(bucket) >= self.limite_canal else "429_aleatorio"] += 1
+            espera = reinicio if len(bucket) >= self.limite_canal else round(self.rng.uniform(0.05, 0.5), 3)
+            return respuesta_json(
+                {"message": "You are being rate limited.", "retry_after": espera, "global": False},
+                status=429, headers={"X-RateLimit-Limit": str(self.limite_canal), "X-RateLimit-Remaining": "0",
+                                     "X-RateLimit-Reset-After": str(espera), "X-RateLimit-Bucket": "mensajes",
+                                     "X-RateLimit-Scope": "user", "Retry-After": str(espera), "Via": VIA_DISCORD}
+            ), None
+
+        bucket.append(ahora)
+        return None, {
+            "X-RateLimit-Limit": str(self.limite_canal),
+            "X-RateLimit-Remaining": str(self.limite_canal - len(bucket)),
+            "X-RateLimit-Reset": f"{time.time() + reinicio:.3f}",
+            "X-RateLimit-Reset-After": str(reinicio),
+            "X-RateLimit-Bucket": "mensajes"
+        }
+
+    def _mensaje(self, canal: int, cuerpo, autor=None):
+        mensaje_id = discord.utils.time_snowflake(discord.utils.utcnow()) + self.rng.randrange(1 << 22)
+        datos = {
+            "id": str(mensaje_id), "channel_id": str(canal), "type": 0,
+            "author": autor or self.usuario_bot(),
+            "content": cuerpo.get("content") or "", "embeds": cuerpo.get("embeds") or [],
+            "timestamp": discord.utils.utcnow().isoformat(), "edited_timestamp": None,
+            "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [],
+            "attachments": [], "pinned": False, "flags": 0
+        }
+        self.mensajes[mensaje_id] = datos
+        return datos
+
+    async def _atender(self, request, canal: int, tipo: str):
+        self.contadores["peticiones"] += 1
+        if self.latencia:
+            await asyncio.sleep(self.rng.lognormvariate(0, 0.5) * self.latencia)
+        if canal in self.prohibidos:
+            self.contadores["403"] += 1
+            return respuesta_json({"message": "Missing Permissions", "code": 50013}, status=403), None
+        return self._limitar(canal)
+
+    async def _enviar(self, request):
+        canal = int(request.match_info["canal"])
+        error, cabeceras = await self._atender(request, canal, "send")
+        if error is not None:
+            return error
+        datos = self._mensaje(canal, await request.json())
+        self.entregas.append((time.perf_counter(), canal, "send"))
+        self.contadores["enviados"] += 1
+        return respuesta_json(datos, headers=cabeceras)
+
+    async def _editar(self, request):
+        canal = int(request.match_info["canal"])
+        error, cabeceras = await self._atender(request, canal, "edit")
+        if error is not None:
+            return error
+        datos = self.mensajes.get(int(request.match_info["mensaje"]))
+        if datos is None or datos["channel_id"] != str(canal):
+            return respuesta_json({"message": "Unknown Message", "code": 10008}, status=404)
+        cuerpo = await request.json()
+        datos.update(content=cuerpo.get("content") or "", embeds=cuerpo.get("embeds") or [],
+                     edited_timestamp=discord.utils.utcnow().isoformat())
+        self.entregas.append((time.perf_counter(), canal, "edit"))
+        self.contadores["editados"] += 1
+        return respuesta_json(datos, headers=cabeceras)
+
+    async def _webhook(self, request):
+        webhook_id = int(request.match_info["webhook"])
+        canal = self.webhooks.get((webhook_id, request.match_info["token"]))
+        if canal is None:
+            return respuesta_json({"message": "Unknown Webhook", "code": 10015}, status=404)
+        error, cabeceras = await self._atender(request, canal, "webhook")
+        if error is not None:
+            return error
+        cuerpo = await request.json()
+        datos = self._mensaje(canal, cuerpo, autor={"id": str(webhook_id), "username": "DSR Alertas",
+                                                     "discriminator": "0000", "avatar": None, "bot": True})
+        self.entregas.append((time.perf_counter(), canal, "webhook"))
+        self.contadores["webhooks"] += 1
+        if request.query.get("wait") in ("true", "1"):
+            return respuesta_json(datos, headers=cabeceras)
+        return web.Response(status=204, headers=cabeceras)
+
+class BotFalso(discord.Client):
+    """Cliente de discord.py con los atributos que usa send_to_raid_channels"""
+
+    def __init__(self, directorio: str):
+        super().__init__(intents=discord.Intents(guilds=True))
+        self.raid_channels = {}
+        self.alert_ledger = AlertLedger(os.path.join(directorio, "alert_ledger.json"))
+        self.guild_settings = GuildSettingsManager(os.path.join(directorio, "guild_settings.json"))
+
+def datos_servidor(guild_id: int, canal_id: int, nombre_canal: str, puede_enviar: bool):
+    """Payload GUILD_CREATE con @everyone, el miembro del bot y un canal de texto"""
+    return {
+        "id": str(guild_id), "name": f"Servidor {guild_id % 100000}", "owner_id": str(ID_BOT + 2),
+        "roles": [{"id": str(guild_id), "name": "@everyone", "permissions": str(PERMISOS_BOT),
+                   "position": 0, "color": 0, "hoist": False, "managed": False, "mentionable": False}],
+        "members": [{"user": {"id": str(ID_BOT), "username": "Alerta Boss DSR", "discriminator": "0",
+                              "avatar": None, "bot": True},
+                     "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}],
+        "channels": [{
+            "id": str(canal_id), "type": 0, "name": nombre_canal, "position": 0, "nsfw": False,
+            "permission_overwrites": [] if puede_enviar else [
+                {"id": str(guild_id), "type": 0, "allow": "0", "deny": str(PERMISO_ENVIAR)}
+            ]
+        }],
+        "emojis": [], "stickers": [], "features": [], "member_count": 1, "large": False,
+        "verification_level": 0, "default_message_notifications": 0, "explicit_content_filter": 0,
+        "mfa_level": 0, "nsfw_level": 0, "premium_tier": 0, "preferred_locale": "es-ES"
+    }
+
+def poblar_servidores(bot: BotFalso, servidor: ServidorDiscordFalso, total: int, sin_permiso: float,
+                      prohibidos: float, sin_canal: float, rng: random.Random):
+    """
+    Crea `total` servidores con un canal cada uno
+
+    Se cargan con _add_guild_from_data, la misma ruta que sigue un GUILD_CREATE
+    del gateway. Una fracción tiene el envío denegado por permisos, otra
+    responde 403 desde el servidor falso y otra no tiene canal configurado (el
+    bot lo busca con find_suitable_channel).
+    """
+    base = 800000000000000000
+    for i in range(total):
+        guild_id, canal_id = base + 2 * i, base + 2 * i + 1
+        puede_enviar = rng.random() >= sin_permiso
+        bot._connection._add_guild_from_data(datos_servidor(guild_id, canal_id, "dsr-raids", puede_enviar))
+        if rng.random() < prohibidos:
+            servidor.prohibidos.add(canal_id)
+        if rng.random() >= sin_canal:
+            bot.raid_channels[guild_id] = canal_id
+        servidor.webhooks[(canal_id, f"token{i}")] = canal_id
+
+def resultados_envio() -> Counter:
+    """Valores actuales de dsr_guild_sends_total por resultado"""
+    return Counter({clave[0]: serie.valor for clave, serie in GUILD_SENDS._series.items()})
+
+def resumen_entregas(etiqueta: str, inicio: float, fin: float, entregas, enviados: int, total: int,
+                     resultados: Counter):
+    latencias = [(momento - inicio) * 1000 for momento, _, _ in entregas]
+    duracion = fin - inicio
+    fallidos = sum(resultados[resultado] for resultado in RESULTADOS_FALLIDOS)
+    print(f"\n{etiqueta}: {enviados}/{total} canales en {duracion:.2f}s ({enviados / duracion:.0f}/s) • "
+          f"{fallidos:.0f} fallidos")
+    print(f"  resultados: {', '.join(f'{clave}: {valor:.0f}' for clave, valor in sorted(resultados.items()) if valor)}")
+    if latencias:
+        print(f"  entrega (ms desde el inicio del fan-out): p50 {percentil(latencias, 0.50):.0f} • "
+              f"p90 {percentil(latencias, 0.90):.0f} • p99 {percentil(latencias, 0.99):.0f} • máx {max(latencias):.0f}")
+    return {"seconds": duracion, "delivered": enviados, "failed": fallidos,
+            "outcomes": {clave: valor for clave, valor in resultados.items() if valor}, "p50_ms": percentil(latencias, 0.50),
+            "p90_ms": percentil(latencias, 0.90), "p99_ms": percentil(latencias, 0.99),
+            "max_ms": max(latencias) if latencias else None}
+
+async def fanout_webhooks(bot: BotFalso, servidor: ServidorDiscordFalso, embed: discord.Embed) -> Tuple[int, Counter]:
+    """
+    Entrega de referencia por webhooks (un Webhook.send por canal, en serie como el bot)
+
+    Returns:
+        (enviados, resultados por tipo como los de dsr_guild_sends_total)
+    """
+    enviados = 0
+    resultados = Counter()
+    for (webhook_id, token), canal in servidor.webhooks.items():
+        if canal in servidor.prohibidos:
+            resultados["skipped"] += 1
+            continue
+        try:
+            await discord.Webhook.partial(webhook_id, token, client=bot).send(embed=embed, wait=True)
+            enviados += 1
+            resultados["sent"] += 1
+        except discord.HTTPException as e:
+            resultados["forbidden" if isinstance(e, discord.Forbidden) else "http_error"] += 1
+    return enviados, resultados
+
+async def ejecutar(args):
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    # Cada servidor sin canal o sin permisos registra un aviso; a esta escala solo molestan
+    logging.getLogger("tasks").setLevel(logging.ERROR)
+    logging.getLogger("discord").setLevel(logging.ERROR)
+
+    rng = random.Random(args.semilla)
+    servidor = ServidorDiscordFalso(args.latencia_ms, args.limite_global, args.limite_canal,
+                                    fraccion_429=args.fraccion_429, semilla=args.semilla)
+    base = await servidor.start()
+    discord.http.Route.BASE = base
+    discord.webhook.async_.Route.BASE = base
+    ALERT_SETTINGS["edit_warning_on_spawn"] = args.editar
+
+    with tempfile.TemporaryDirectory() as directorio:
+        bot = BotFalso(directorio)
+        await bot.login("token.falso")
+        t0 = time.perf_counter()
+        poblar_servidores(bot, servidor, args.servidores, args.sin_permiso, args.prohibidos, args.sin_canal, rng)
+        print(f"🏗️ {args.servidores} servidores falsos creados en {time.perf_counter() - t0:.2f}s "
+              f"({len(servidor.prohibidos)} con 403, {args.servidores - len(bot.raid_channels)} sin canal)")
+
+        digimon = DEFAULT_DIGIMONS[0]
+        horario = digimon["horarios"][0]
+        spawn = datetime.datetime.now(KST).replace(second=0, microsecond=0) + datetime.timedelta(minutes=20)
+        resultados = {"guilds": args.servidores}
+
+        try:
+            fases = [("Aviso 20 min", lambda: send_warning_alert(bot, digimon, horario, spawn, 20)),
+                     ("Spawn" + (" (editando el aviso)" if args.editar else ""),
+                      lambda: send_spawn_alert(bot, digimon, horario, spawn))]
+            for etiqueta, fase in fases:
+                marca = len(servidor.entregas)
+                antes = resultados_envio()
+                inicio = time.perf_counter()
+                enviados = await fase()
+                fin = time.perf_counter()
+                resultados[etiqueta] = resumen_entregas(etiqueta, inicio, fin, servidor.entregas[marca:],
+                                                        enviados, args.servidores, resultados_envio() - antes)
+
+            if args.webhooks:
+                marca = len(servidor.entregas)
+                inicio = time.perf_counter()
+                embed = discord.Embed(title=f"{digimon['nombre']} ha aparecido")
+                enviados, por_resultado = await fanout_webhooks(bot, servidor, embed)
+                resultados["Webhooks"] = resumen_entregas("Webhooks", inicio, time.perf_counter(),
+                                                          servidor.entregas[marca:], enviados, args.servidores,
+                                                          por_resultado)
+        finally:
+            await bot.close()
+            await servidor.stop()
+
+    print(f"\nServidor falso: {dict(sorted(servidor.contadores.items()))}")
+    resultados["server"] = dict(servidor.contadores)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados guardados en {args.json}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del fan-out de alertas contra un Discord falso")
+    parser.add_argument("--servidores", type=int, default=1000, help="Servidores (guilds) simulados")
+    parser.add_argument("--latencia-ms", type=float, default=40.0, help="Latencia media de cada respuesta")
+    parser.add_argument("--limite-global", type=int, default=50, help="Peticiones por segundo antes del 429 global (0 = sin límite)")
+    parser.add_argument("--limite-canal", type=int, default=5, help="Mensajes por canal cada 5 s")
+    parser.add_argument("--fraccion-429", type=float, default=0.0, help="Fracción de peticiones con 429 aleatorio")
+    parser.add_argument("--sin-permiso", type=float, default=0.01, help="Fracción de canales sin permiso de envío")
+    parser.add_argument("--prohibidos", type=float, default=0.005, help="Fracción de canales que responden 403")
+    parser.add_argument("--sin-canal", type=float, default=0.01, help="Fracción de servidores sin canal configurado")
+    parser.add_argument("--editar", action="store_true", help="Editar el aviso en la alerta de spawn (PATCH)")
+    parser.add_argument("--webhooks", action="store_true", help="Medir también la entrega por webhooks")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--json", default=None, help="Guardar los resultados en este archivo JSON")
+    asyncio.run(ejecutar(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+Repetición acelerada del horario de raids con reloj virtual
+
+Sustituye la fuente de tiempo del bot (utils.establecer_reloj) por un
+RelojVirtual y ejecuta check_raids minuto a minuto sobre un periodo simulado
+(por defecto 30 días) con servidores falsos que registran cada entrega. Así
+un ciclo de 13 días de Megidramon se comprueba en segundos.
+
+La línea de tiempo obtenida se compara con una referencia calculada aparte,
+con aritmética directa sobre fecha_inicio y recurrencia_dias (sin
+obtener_proximo_spawn ni la rueda del scheduler), y con la configuración de
+cada servidor falso escrita en este archivo. Se comprueba que no falte
+ninguna alerta, que ninguna se repita y que cada una salga exactamente en
+su minuto. El tiempo real empleado sirve además de benchmark de rendimiento
+del scheduler.
+
+Uso:
+    python tools/replay_horario.py [--dias 30] [--inicio 2025-09-01] [--roster data/digimon_data.json] [--sinteticos 0]
+                                   [--ledger-en-memoria] [--linea-tiempo] [--digimon Megidramon] [--json salida.json]
+
+Sale con código 1 si hay alertas perdidas, duplicadas o desplazadas.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import datetime
+import shutil
+import tempfile
+from collections import Counter
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+
+from data.default_data import KST, DEFAULT_GUILD_SETTINGS
+from data.digimon_manager import DigimonManager
+from data.guild_settings import GuildSettingsManager
+from data.subscriptions import SubscriptionManager
+from data.alert_ledger import AlertLedger
+from leader import AlertLease
+from dm_delivery import DMDeliveryPipeline
+from loop_monitor import MonitorEventLoop
+from utils import RelojVirtual, establecer_reloj
+from tasks import check_raids, crear_scheduler
+
+# Servidores simulados: id -> ajustes (los que no aparecen usan DEFAULT_GUILD_SETTINGS)
+SERVIDORES = {
+    1: {},
+    2: {"warning_offsets": [60, 10]},
+    3: {"warning_offsets": [1440], "spawn_alert": False, "filters": ["tipo:virus"]},
+    4: {"quiet_hours": [2, 8]},
+    5: {"digest": True, "digest_hour": 9}
+}
+
+PERMISOS = discord.Permissions(send_messages=True, embed_links=True)
+
+class MensajeReplay:
+    def __init__(self, mensaje_id: int):
+        self.id = mensaje_id
+
+    async def edit(self, **kwargs):
+        pass
+
+class CanalReplay:
+    """Canal falso: cuenta los mensajes enviados"""
+
+    def __init__(self, canal_id: int):
+        self.id = canal_id
+        self.name = "dsr-raids"
+        self.enviados = 0
+
+    def permissions_for(self, miembro):
+        return PERMISOS
+
+    async def send(self, content=None, embed=None):
+        self.enviados += 1
+        return MensajeReplay(self.id * 1000000 + self.enviados)
+
+    def get_partial_message(self, mensaje_id: int):
+        return MensajeReplay(mensaje_id)
+
+class ServidorReplay:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.name = f"Servidor {guild_id}"
+        self.me = None
+        self.canal = CanalReplay(guild_id * 100)
+        self.text_channels = [self.canal]
+
+    def get_channel(self, canal_id: int):
+        return self.canal if canal_id == self.canal.id else None
+
+class LedgerReplay(AlertLedger):
+    """Ledger que además anota en la línea de tiempo cada entrega con la hora virtual"""
+
+    def __init__(self, archivo: str, reloj: RelojVirtual, en_memoria: bool = False):
+        super().__init__(archivo)
+        self.reloj = reloj
+        self.en_memoria = en_memoria
+        self.linea_tiempo = []
+
+    def _write(self, lines, snapshot) -> bool:
+        # En memoria se omite la escritura del journal y de las compactaciones
+        if self.en_memoria:
+            return True
+        return super()._write(lines, snapshot)
+
+    def record_delivery(self, key, occurrence, channel_id, message_id=None):
+        guild_id, digimon, horario, ocurrencia, tipo = key.split("|")
+        self.linea_tiempo.append({
+            "at": self.reloj(), "guild": int(guild_id), "digimon": digimon, "horario": horario,
+            "occurrence": datetime.datetime.fromisoformat(ocurrencia).astimezone(KST), "tipo": tipo
+        })
+        super().record_delivery(key, occurrence, channel_id, message_id)
+
+class BotReplay:
+    """Bot mínimo con los componentes reales que usan check_raids y sus alertas"""
+
+    def __init__(self, directorio: str, reloj: RelojVirtual, ledger_en_memoria: bool = False,
+                 roster: Optional[str] = None):
+        if roster:
+            shutil.copy(roster, os.path.join(directorio, "digimon_data.json"))
+        self.digimon_manager = DigimonManager(os.path.join(directorio, "digimon_data.json"))
+        self.guild_settings = GuildSettingsManager(os.path.join(directorio, "guild_settings.json"))
+        self.subscriptions = SubscriptionManager(os.path.join(directorio, "subscriptions.json"))
+        self.alert_ledger = LedgerReplay(os.path.join(directorio, "alert_ledger.json"), reloj, ledger_en_memoria)
+        self.alert_lease = AlertLease(os.path.join(directorio, "alert_lease.json"))
+        self.dm_pipeline = DMDeliveryPipeline(self, rate_per_second=50)
+        self.loop_monitor = MonitorEventLoop()
+        self.raid_scheduler = None
+        self.servidores = {guild_id: ServidorReplay(guild_id) for guild_id in SERVIDORES}
+        self.raid_channels = {guild_id: servidor.canal.id for guild_id, servidor in self.servidores.items()}
+
+        for guild_id, ajustes in SERVIDORES.items():
+            if ajustes:
+                self.guild_settings.update(guild_id, dict(ajustes))
+        self.guild_settings.set_guilds(SERVIDORES)
+
+    @property
+    def guilds(self):
+        return list(self.servidores.values())
+
+    def get_guild(self, guild_id: int):
+        return self.servidores.get(guild_id)
+
+    def is_ready(self) -> bool:
+        return True
+
+def anadir_sinteticos(manager: DigimonManager, cantidad: int, inicio: datetime.datetime):
+    """Amplía el roster con horarios sintéticos para medir el rendimiento del scheduler"""
+    rng = random.Random(cantidad)
+    for i in range(cantidad):
+        manager.digimons.append({
+            "nombre": f"Sintetico{i}",
+            "tipo": rng.choice(("Vacuna", "Data", "Virus")),
+            "mapa": "Mapa",
+            "recompensa": "Recompensa",
+            "horarios": [{"hora": rng.randrange(24), "minuto": rng.randrange(60)}],
+            "recurrencia_dias": rng.choice((1, 1, 2, 6, 13)),
+            "fecha_inicio": inicio - datetime.timedelta(days=rng.randrange(14))
+        })
+
+def ajuste(guild_id: int, clave: str):
+    return SERVIDORES[guild_id].get(clave, DEFAULT_GUILD_SETTINGS[clave])
+
+def referencia(digimons, inicio: datetime.datetime, fin: datetime.datetime) -> Counter:
+    """
+    Alertas esperadas en (inicio, fin] calculadas sin el código del bot
+
+    Returns:
+        Counter de (guild, digimon, "HH:MM", ocurrencia, tipo, minuto de envío)
+    """
+    esperadas = Counter()
+    ini_ts, fin_ts = inicio.timestamp(), fin.timestamp()
+
+    for digimon in digimons:
+        paso = digimon["recurrencia_dias"] * 86400
+        propios = set(digimon.get("avisos_minutos", ()))
+        for horario in digimon["horarios"]:
+            # Los horarios son hora local de Corea (UTC+9) a partir del día de fecha_inicio
+            dia = digimon["fecha_inicio"].date()
+            ancla = KST.localize(datetime.datetime(dia.year, dia.month, dia.day, horario["hora"], horario["minuto"])).timestamp()
+            etiqueta = f"{horario['hora']:02d}:{horario['minuto']:02d}"
+
+            for guild_id in SERVIDORES:
+                if ajuste(guild_id, "digest"):
+                    continue
+                filtros = ajuste(guild_id, "filters")
+                if filtros and f"tipo:{digimon['tipo'].lower()}" not in filtros \
+                        and f"digimon:{digimon['nombre'].lower()}" not in filtros \
+                        and f"recompensa:{digimon['recompensa'].lower()}" not in filtros:
+                    continue
+                avisos = set(ajuste(guild_id, "warning_offsets"))
+                offsets = avisos | (propios if avisos or ajuste(guild_id, "spawn_alert") else set())
+                if ajuste(guild_id, "spawn_alert"):
+                    offsets.add(0)
+                silencio = ajuste(guild_id, "quiet_hours")
+
+                for offset in offsets:
+                    # Primera ocurrencia cuyo aviso cae dentro de la ventana
+                    k = max(0, -(-(ini_ts + offset * 60 - ancla) // paso))
+                    ocurrencia_ts = ancla + k * paso
+                    while ocurrencia_ts - offset * 60 <= ini_ts:
+                        ocurrencia_ts += paso
+                    while ocurrencia_ts - offset * 60 <= fin_ts:
+                        envio = datetime.datetime.fromtimestamp(ocurrencia_ts - offset * 60, KST)
+                        if silencio:
+                            desde, hasta = silencio
+                            callado = desde <= envio.hour < hasta if desde < hasta else envio.hour >= desde or envio.hour < hasta
+                        else:
+                            callado = False
+                        if not callado:
+                            ocurrencia = datetime.datetime.fromtimestamp(ocurrencia_ts, KST)
+                            tipo = "spawn" if offset == 0 else f"warning_{offset}"
+                            esperadas[(guild_id, digimon["nombre"], etiqueta, ocurrencia, tipo, envio)] += 1
+                        ocurrencia_ts += paso
+
+    # Resumen diario de los servidores en modo digest, a su hora en punto
+    for guild_id in SERVIDORES:
+        if not ajuste(guild_id, "digest"):
+            continue
+        hora = ajuste(guild_id, "digest_hour")
+        dia = inicio.replace(hour=hora, minute=0, second=0, microsecond=0)
+        while dia <= fin:
+            if dia > inicio:
+                esperadas[(guild_id, "resumen", f"{hora:02d}:00", dia, "digest", dia)] += 1
+            dia += datetime.timedelta(days=1)
+    return esperadas
+
+def emparejar_desplazadas(perdidas: Counter, sobrantes: Counter):
+    """
+    Separa las alertas que salieron en otro minuto de las realmente perdidas o inesperadas
+
+    Una alerta perdida y una inesperada del mismo servidor, horario y tipo con
+    menos de 12 horas de diferencia se cuentan como una sola alerta desplazada.
+
+    Returns:
+        (desplazadas [(esperada, obtenida)], perdidas, inesperadas)
+    """
+    pendientes = sorted(sobrantes.elements(), key=lambda clave: clave[5])
+    desplazadas, solo_perdidas = [], []
+    for esperada in sorted(perdidas.elements(), key=lambda clave: clave[5]):
+        pareja = next((obtenida for obtenida in pendientes
+                       if obtenida[:3] == esperada[:3] and obtenida[4] == esperada[4]
+                       and abs(obtenida[5] - esperada[5]) < datetime.timedelta(hours=12)), None)
+        if pareja is None:
+            solo_perdidas.append(esperada)
+        else:
+            pendientes.remove(pareja)
+            desplazadas.append((esperada, pareja))
+    return desplazadas, solo_perdidas, pendientes
+
+async def ejecutar(args) -> int:
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+
+    inicio = KST.localize(datetime.datetime.fromisoformat(args.inicio)) if args.inicio else \
+        datetime.datetime.now(KST).replace(hour=0, minute=0, second=0, microsecond=0)
+    minutos = args.dias * 24 * 60
+    fin = inicio + datetime.timedelta(minutes=minutos)
+    reloj = RelojVirtual(inicio)
+    anterior = establecer_reloj(reloj)
+
+    try:
+        with tempfile.TemporaryDirectory() as directorio:
+            bot = BotReplay(directorio, reloj, args.ledger_en_memoria, args.roster)
+            anadir_sinteticos(bot.digimon_manager, args.sinteticos, inicio)
+            esperadas = referencia(bot.digimon_manager.get_all_digimon(), inicio, fin)
+
+            # Sin recuperación de alertas previas: la repetición empieza justo en `inicio`
+            bot.alert_ledger.mark_tick(inicio)
+            t0 = time.perf_counter()
+            bot.raid_scheduler = crear_scheduler(bot, inicio)
+            construccion = time.perf_counter() - t0
+
+            # El scheduler se envuelve solo para contar sus eventos (duplicados antes del ledger)
+            avanzar = bot.raid_scheduler.advance
+            eventos = Counter()
+            tiempo_scheduler = [0.0]
+            def advance(ahora):
+                t = time.perf_counter()
+                disparados = avanzar(ahora)
+                tiempo_scheduler[0] += time.perf_counter() - t
+                for evento in disparados:
+                    h = evento["horario"]
+                    eventos[(evento["digimon"]["nombre"], h["hora"], h["minuto"], evento["occurrence"], evento["offset"])] += 1
+                return disparados
+            bot.raid_scheduler.advance = advance
+
+            t0 = time.perf_counter()
+            for _ in range(minutos):
+                reloj.avanzar(datetime.timedelta(minutes=1))
+                await check_raids(bot)
+            duracion = time.perf_counter() - t0
+            linea_tiempo = bot.alert_ledger.linea_tiempo
+    finally:
+        establecer_reloj(anterior)
+
+    obtenidas = Counter(
+        (e["guild"], e["digimon"], e["horario"], e["occurrence"], e["tipo"], e["at"]) for e in linea_tiempo
+    )
+    perdidas = esperadas - obtenidas
+    sobrantes = obtenidas - esperadas
+    duplicadas = {clave: n for clave, n in obtenidas.items() if n > 1}
+    eventos_duplicados = {clave: n for clave, n in eventos.items() if n > 1}
+    desplazadas, perdidas, sobrantes = emparejar_desplazadas(perdidas, sobrantes)
+
+    if args.linea_tiempo or args.digimon:
+        print("Línea de tiempo:")
+        for entrada in sorted(linea_tiempo, key=lambda e: (e["at"], e["guild"])):
+            if args.digimon and entrada["digimon"].lower() != args.digimon.lower():
+                continue
+            print(f"  {entrada['at'].strftime('%Y-%m-%d %H:%M')}  servidor {entrada['guild']}  "
+                  f"{entrada['digimon']} {entrada['horario']}  {entrada['tipo']:<13} "
+                  f"(spawn {entrada['occurrence'].strftime('%m-%d %H:%M')})")
+        print()
+
+    megidramon = sorted({e["occurrence"] for e in linea_tiempo if e["digimon"] == "Megidramon" and e["tipo"] == "spawn"})
+    temporizadores = len(bot.raid_scheduler.wheel)
+    print(f"🗓️ {args.dias} días simulados ({minutos} ticks) desde {inicio.strftime('%Y-%m-%d %H:%M KST')}")
+    print(f"   {len(bot.digimon_manager.get_all_digimon())} Digimon • {temporizadores} temporizadores • "
+          f"{sum(eventos.values())} eventos del scheduler • {len(linea_tiempo)} entregas")
+    if megidramon:
+        print(f"   Spawns de Megidramon: {', '.join(m.strftime('%Y-%m-%d %H:%M') for m in megidramon)}")
+    print(f"⏱️ Construcción {construccion * 1000:.1f} ms • repetición {duracion:.2f}s • "
+          f"{duracion / minutos * 1e6:.0f} µs/tick • ×{minutos * 60 / duracion:,.0f} tiempo real")
+    print(f"   Scheduler (advance): {tiempo_scheduler[0]:.3f}s • {tiempo_scheduler[0] / minutos * 1e6:.1f} µs/tick • "
+          f"{sum(eventos.values()) / max(tiempo_scheduler[0], 1e-9):,.0f} eventos/s")
+    print(f"{'✅' if not (perdidas or sobrantes or desplazadas or duplicadas or eventos_duplicados) else '❌'} "
+          f"Esperadas {sum(esperadas.values())} • perdidas {len(perdidas)} • desplazadas {len(desplazadas)} • "
+          f"duplicadas {len(duplicadas) + len(eventos_duplicados)} • inesperadas {len(sobrantes)}")
+
+    for esperada, obtenida in desplazadas[:args.max_errores]:
+        guild_id, digimon, horario, _, tipo, envio = esperada
+        deriva = (obtenida[5] - envio).total_seconds() / 60
+        print(f"   ❌ Desplazada: servidor {guild_id} {digimon} {horario} {tipo} "
+              f"esperada {envio:%m-%d %H:%M}, enviada {obtenida[5]:%m-%d %H:%M} ({deriva:+.0f} min)")
+    for titulo, claves in (("Perdida", perdidas), ("Inesperada", sobrantes), ("Duplicada", list(duplicadas))):
+        for clave in claves[:args.max_errores]:
+            guild_id, digimon, horario, ocurrencia, tipo, envio = clave
+            print(f"   ❌ {titulo}: servidor {guild_id} {digimon} {horario} {tipo} "
+                  f"(spawn {ocurrencia:%m-%d %H:%M}, envío {envio:%m-%d %H:%M})")
+    for (digimon, hora, minuto, ocurrencia, offset), veces in list(eventos_duplicados.items())[:args.max_errores]:
+        print(f"   ❌ Evento repetido {veces} veces en el scheduler: {digimon} {hora:02d}:{minuto:02d} "
+              f"offset {offset} (spawn {ocurrencia:%m-%d %H:%M})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "days": args.dias, "start": inicio.isoformat(), "timers": temporizadores,
+                "scheduler_events": sum(eventos.values()), "deliveries": len(linea_tiempo),
+                "build_seconds": construccion, "replay_seconds": duracion,
+                "us_per_tick": duracion / minutos * 1e6,
+                "scheduler_us_per_tick": tiempo_scheduler[0] / minutos * 1e6,
+                "missed": len(perdidas), "drifted": len(desplazadas), "unexpected": len(sobrantes),
+                "duplicates": len(duplicadas) + len(eventos_duplicados),
+                "timeline": [
+                    {**entrada, "at": entrada["at"].isoformat(), "occurrence": entrada["occurrence"].isoformat()}
+                    for entrada in sorted(linea_tiempo, key=lambda e: (e["at"], e["guild"]))
+                ]
+            }, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados guardados en {args.json}")
+
+    return 1 if perdidas or sobrantes or desplazadas or duplicadas or eventos_duplicados else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Repite el horario de raids con un reloj virtual y verifica las alertas")
+    parser.add_argument("--dias", type=int, default=30, help="Días simulados")
+    parser.add_argument("--inicio", default=None, help="Inicio en KST (ISO, por defecto hoy a las 00:00)")
+    parser.add_argument("--roster", default=None, help="Archivo de datos (p. ej. data/digimon_data.json); por defecto DEFAULT_DIGIMONS")
+    parser.add_argument("--sinteticos", type=int, default=0, help="Horarios sintéticos añadidos al roster")
+    parser.add_argument("--ledger-en-memoria", action="store_true",
+                        help="No escribir el ledger en disco (mide solo el scheduler y las alertas)")
+    parser.add_argument("--linea-tiempo", action="store_true", help="Imprimir todas las entregas")
+    parser.add_argument("--digimon", default=None, help="Imprimir solo la línea de tiempo de este Digimon")
+    parser.add_argument("--max-errores", type=int, default=20, help="Errores listados por categoría")
+    parser.add_argument("--json", default=None, help="Guardar resultados y línea de tiempo en JSON")
+    sys.exit(asyncio.run(ejecutar(parser.parse_args())))
+
+if __name__ == "__main__":
+    main()
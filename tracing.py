@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import queue
+import random
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class Span:
+    """Tramo cronometrado de una traza (alerta o comando) con sus atributos"""
+
+    __slots__ = ("nombre", "traza", "span_id", "padre_id", "inicio", "inicio_epoch", "duracion", "atributos")
+
+    def __init__(self, nombre: str, traza: "Traza", padre_id: Optional[int], atributos: Dict[str, Any]):
+        self.nombre = nombre
+        self.traza = traza
+        self.span_id = traza.siguiente_id()
+        self.padre_id = padre_id
+        self.inicio = time.perf_counter()
+        self.inicio_epoch = time.time()
+        self.duracion: Optional[float] = None
+        self.atributos = atributos
+
+    def set(self, **atributos: Any):
+        """Añade atributos al span (p. ej. el resultado de un envío)"""
+        self.atributos.update(atributos)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.span_id,
+            "parent": self.padre_id,
+            "name": self.nombre,
+            "start": round(self.inicio_epoch, 6),
+            "ms": round((self.duracion or 0.0) * 1000, 3),
+            "attrs": self.atributos
+        }
+
+class Traza:
+    """Árbol de spans de una misma alerta o comando"""
+
+    __slots__ = ("trace_id", "spans", "_ids")
+
+    def __init__(self):
+        self.trace_id = f"{random.getrandbits(64):016x}"
+        self.spans: List[Span] = []
+        self._ids = 0
+
+    def siguiente_id(self) -> int:
+        self._ids += 1
+        return self._ids
+
+class _SpanInactivo:
+    """Span de las trazas no muestreadas: no mide ni guarda nada"""
+
+    __slots__ = ()
+    traza = None
+
+    def set(self, **atributos: Any):
+        pass
+
+SPAN_INACTIVO = _SpanInactivo()
+
+_span_actual: contextvars.ContextVar[Optional[Any]] = contextvars.ContextVar("span_actual", default=None)
+
+class Trazador:
+    """
+    Trazas ligeras por alerta y por comando basadas en contextvars
+
+    El span activo vive en una ContextVar, así que cada tarea de asyncio
+    mantiene su propio árbol sin pasar objetos por parámetro. La decisión de
+    muestreo se toma en el span raíz y la heredan todos sus hijos: una traza
+    no muestreada solo cuesta una consulta a la ContextVar por span. Cuando el
+    span raíz termina, la traza completa se encola y un hilo en segundo plano
+    la escribe como una línea JSON.
+    """
+
+    def __init__(self, archivo: Optional[str] = None, tasa_muestreo: float = 0.0):
+        self.archivo = archivo
+        self.tasa_muestreo = tasa_muestreo
+        self._cola: "queue.SimpleQueue[Span]" = queue.SimpleQueue()
+        self._hilo: Optional[threading.Thread] = None
+        self.exportadas = 0
+        self.descartadas = 0
+
+    def configurar(self, archivo: Optional[str], tasa_muestreo: float):
+        """Activa el muestreo (tasa entre 0 y 1) y el archivo JSON-lines de salida"""
+        self.archivo = archivo
+        self.tasa_muestreo = max(0.0, min(1.0, tasa_muestreo))
+        if self.archivo and self.tasa_muestreo > 0 and self._hilo is None:
+            self._hilo = threading.Thread(target=self._exportar, name="trace-exporter", daemon=True)
+            self._hilo.start()
+            logger.info(f"🧵 Trazas muestreadas al {self.tasa_muestreo:.0%} en {self.archivo}")
+
+    def iniciar(self, nombre: str, activar: bool = False, **atributos: Any):
+        """
+        Abre un span hijo del span activo (o la raíz de una traza nueva)
+
+        Con activar=True pasa a ser el span activo de la tarea actual (para
+        spans que terminan en otra tarea, como los comandos).
+        """
+        padre = _span_actual.get()
+        if padre is SPAN_INACTIVO:
+            return SPAN_INACTIVO
+        if padre is None:
+            if not self._hilo or random.random() >= self.tasa_muestreo:
+                if activar:
+                    _span_actual.set(SPAN_INACTIVO)
+                return SPAN_INACTIVO
+            traza, padre_id = Traza(), None
+        else:
+            traza, padre_id = padre.traza, padre.span_id
+
+        span = Span(nombre, traza, padre_id, atributos)
+        if activar:
+            _span_actual.set(span)
+        return span
+
+    def terminar(self, span, **atributos: Any):
+        """Cierra un span; al cerrar la raíz se exporta la traza entera"""
+        if span is None or span is SPAN_INACTIVO or span.duracion is not None:
+            return
+        span.duracion = time.perf_counter() - span.inicio
+        span.atributos.update(atributos)
+        span.traza.spans.append(span)
+        if span.padre_id is None:
+            # La serialización se hace en el hilo exportador, no en el event loop
+            self._cola.put(span)
+
+    def activar(self, span) -> contextvars.Token:
+        """Hace de `span` el span activo de la tarea (restaurar con el token devuelto)"""
+        return _span_actual.set(span)
+
+    def restaurar(self, token: contextvars.Token):
+        """Deshace un activar()"""
+        _span_actual.reset(token)
+
+    @contextmanager
+    def span(self, nombre: str, **atributos: Any) -> Iterator[Any]:
+        """Context manager: span activo durante el bloque"""
+        span = self.iniciar(nombre, **atributos)
+        token = _span_actual.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if span is not SPAN_INACTIVO:
+                span.set(error=type(e).__name__)
+            raise
+        finally:
+            _span_actual.reset(token)
+            self.terminar(span)
+
+    @staticmethod
+    def serializar(raiz: Span) -> str:
+        """Línea JSON de una traza a partir de su span raíz"""
+        return json.dumps({
+            "trace_id": raiz.traza.trace_id,
+            "root": raiz.nombre,
+            "ms": round(raiz.duracion * 1000, 3),
+            "spans": [span.to_dict() for span in raiz.traza.spans]
+        }, ensure_ascii=False, default=str)
+
+    def _exportar(self):
+        while True:
+            pendientes = [self._cola.get()]
+            # Agrupar lo acumulado para abrir el archivo una vez por lote
+            while True:
+                try:
+                    pendientes.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                os.makedirs(os.path.dirname(self.archivo) or '.', exist_ok=True)
+                with open(self.archivo, "a", encoding="utf-8") as f:
+                    for raiz in pendientes:
+                        f.write(self.serializar(raiz) + "\n")
+                self.exportadas += len(pendientes)
+            except Exception as e:
+                self.descartadas += len(pendientes)
+                logger.error(f"❌ Error exportando trazas: {e}")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Trazas exportadas y configuración de muestreo"""
+        return {
+            'sample_rate': self.tasa_muestreo,
+            'exported': self.exportadas,
+            'dropped': self.descartadas
+        }
+
+# Trazador global del bot (inactivo hasta configurar())
+TRAZADOR = Trazador()
@@ -2,15 +2,52 @@ import datetime
 import pytz
 import discord
 import logging
-from typing import Optional, List, Dict, Any
-from data.default_data import KST, EMBED_COLORS, TYPE_EMOJIS, REWARD_EMOJIS
+from typing import Optional, List, Dict, Any, Tuple, Callable
+from data.default_data import KST, EMBED_COLORS, TYPE_EMOJIS, REWARD_EMOJIS, DISPLAY_SETTINGS
 
 logger = logging.getLogger(__name__)
 
-def obtener_tiempo_kst() -> datetime.datetime:
-    """Obtiene la hora actual en zona horaria KST"""
+def reloj_real() -> datetime.datetime:
+    """Hora real del sistema en KST"""
     return datetime.datetime.now(KST)
 
+class RelojVirtual:
+    """
+    Reloj controlable para simulaciones y repeticiones del horario
+
+    Devuelve siempre el momento fijado; el tiempo solo avanza cuando se llama
+    a avanzar(), así que un mes de alertas se recorre en segundos.
+    """
+
+    def __init__(self, inicio: datetime.datetime):
+        self.ahora = inicio
+
+    def __call__(self) -> datetime.datetime:
+        return self.ahora
+
+    def avanzar(self, delta: datetime.timedelta) -> datetime.datetime:
+        self.ahora += delta
+        return self.ahora
+
+# Fuente de tiempo de todo el bot (obtener_tiempo_kst y, a través de él, el scheduler)
+_reloj: Callable[[], datetime.datetime] = reloj_real
+
+def establecer_reloj(reloj: Optional[Callable[[], datetime.datetime]] = None) -> Callable[[], datetime.datetime]:
+    """
+    Sustituye la fuente de tiempo (None vuelve al reloj real)
+    
+    Returns:
+        La fuente de tiempo anterior, para restaurarla después
+    """
+    global _reloj
+    anterior = _reloj
+    _reloj = reloj or reloj_real
+    return anterior
+
+def obtener_tiempo_kst() -> datetime.datetime:
+    """Obtiene la hora actual en zona horaria KST (del reloj configurado)"""
+    return _reloj()
+
 def obtener_proximo_spawn(digimon: Dict[str, Any], now: Optional[datetime.datetime] = None) -> Optional[datetime.datetime]:
     """
     Calcula la próxima aparición más cercana de un Digimon en zona horaria KST.
@@ -84,62 +121,183 @@ def formato_tiempo_dsrworld(tiempo_restante: datetime.timedelta) -> str:
     else:
         return f"{horas}h {minutos}m {segundos}s (KST)"
 
-def crear_embed_dsrworld(digimon: Dict[str, Any], tiempo_restante: Optional[datetime.timedelta] = None, tipo_alerta: str = "info") -> discord.Embed:
+def formato_antelacion(antelacion: datetime.timedelta) -> str:
+    """
+    Formatea la antelación de un aviso en texto legible ("24 horas", "1 hora y 30 minutos")
+    
+    Args:
+        antelacion: Tiempo entre el aviso y el spawn
+    
+    Returns:
+        String con días, horas y minutos en español
+    """
+    total_minutos = int(antelacion.total_seconds()) // 60
+    dias, resto = divmod(total_minutos, 24 * 60)
+    horas, minutos = divmod(resto, 60)
+    
+    # Un aviso de días exactos se lee mejor en horas si no pasa de un día (24 horas)
+    if dias == 1 and not horas and not minutos:
+        dias, horas = 0, 24
+    
+    partes = []
+    for cantidad, singular, plural in ((dias, "día", "días"), (horas, "hora", "horas"), (minutos, "minuto", "minutos")):
+        if cantidad:
+            partes.append(f"{cantidad} {singular if cantidad == 1 else plural}")
+    
+    if not partes:
+        return "menos de un minuto"
+    if len(partes) == 1:
+        return partes[0]
+    return f"{', '.join(partes[:-1])} y {partes[-1]}"
+
+def formato_timestamp_discord(momento: datetime.datetime, estilo: str = "R") -> str:
+    """
+    Genera un timestamp nativo de Discord que cada cliente renderiza en su zona horaria
+    
+    Args:
+        momento: Instante a mostrar (con zona horaria)
+        estilo: "R" (relativo, cuenta atrás en vivo), "F" (fecha completa), "t" (hora corta)
+    
+    Returns:
+        Markup del tipo <t:epoch:estilo>
+    """
+    return f"<t:{int(momento.timestamp())}:{estilo}>"
+
+def formato_respawn(spawn_time: Optional[datetime.datetime], tiempo_restante: datetime.timedelta) -> str:
+    """
+    Formatea el tiempo hasta el spawn según el modo de visualización configurado
+    
+    Con timestamps de Discord la cuenta atrás se actualiza sola en el cliente y la
+    respuesta no queda obsoleta; si no, se usa el texto estático de dsrworldwiki.com
+    """
+    if DISPLAY_SETTINGS["discord_timestamps"] and spawn_time is not None and tiempo_restante.total_seconds() > 0:
+        return formato_timestamp_discord(spawn_time, "R")
+    return formato_tiempo_dsrworld(tiempo_restante)
+
+def formato_fecha_spawn(spawn_time: datetime.datetime) -> str:
+    """Formatea la fecha y hora de un spawn según el modo de visualización configurado"""
+    if DISPLAY_SETTINGS["discord_timestamps"]:
+        return formato_timestamp_discord(spawn_time, "F")
+    return spawn_time.strftime("%Y-%m-%d %H:%M KST")
+
+# Plantillas de embed ya serializadas: (nombre, tipo_alerta) -> dict del embed
+# Se invalidan cuando DigimonManager modifica los datos (ver invalidar_plantillas_embed)
+_plantillas_embed: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_estadisticas_plantillas = {"version": 0, "hits": 0, "misses": 0}
+
+def invalidar_plantillas_embed(version: Optional[int] = None):
+    """
+    Descarta las plantillas de embed cacheadas
+    
+    Se registra como listener de DigimonManager para que cualquier alta, baja o
+    modificación de un Digimon regenere sus plantillas.
+    
+    Args:
+        version: Nueva versión de los datos de DigimonManager (opcional)
+    """
+    _plantillas_embed.clear()
+    if version is not None:
+        _estadisticas_plantillas["version"] = version
+    else:
+        _estadisticas_plantillas["version"] += 1
+
+def obtener_estadisticas_plantillas() -> Dict[str, Any]:
+    """Estadísticas del cache de plantillas de embed"""
+    total = _estadisticas_plantillas["hits"] + _estadisticas_plantillas["misses"]
+    return {
+        **_estadisticas_plantillas,
+        "templates": len(_plantillas_embed),
+        "hit_ratio": _estadisticas_plantillas["hits"] / total if total else 0.0
+    }
+
+def _construir_plantilla_embed(digimon: Dict[str, Any], tipo_alerta: str) -> Dict[str, Any]:
+    """Construye la parte estática del embed (título, colores, campos fijos, imagen) como dict"""
+    # Seleccionar color según tipo de alerta o tipo de Digimon
+    color = EMBED_COLORS.get(tipo_alerta, digimon.get("color", 0x00FFFF))
+    
+    embed = discord.Embed(color=color)
+    
+    # Título según tipo de alerta
+    if tipo_alerta == "spawn":
+        embed.title = f"🔥 ¡{digimon['nombre']} Raid ha aparecido! ⚔️"
+        embed.description = "**El Digimon ha aparecido en el juego.**\n"
+    elif tipo_alerta == "warning":
+        embed.title = f"⏰ ¡{digimon['nombre']} aparecerá pronto!"
+        embed.description = "**El Digimon aparecerá pronto.**\n"
+    else:
+        embed.title = f"📊 {digimon['nombre']} - Información de Raid"
+        embed.description = ""
+    
+    # Información detallada
+    tipo_emoji = TYPE_EMOJIS.get(digimon['tipo'], digimon.get('tipo_icon', '❓'))
+    recompensa_emoji = REWARD_EMOJIS.get(digimon['recompensa'], digimon.get('recompensa_icon', '❓'))
+    
+    info_fields = [
+        ("**Tipo:**", f"{tipo_emoji} {digimon['tipo']}"),
+        ("**Mapa:**", digimon['mapa']),
+        ("**Recompensa:**", f"{recompensa_emoji} {digimon['recompensa']}")
+    ]
+    
+    # Agregar campos al embed
+    for name, value in info_fields:
+        embed.add_field(name=name, value=value, inline=True)
+    
+    # Agregar imagen si está disponible
+    if "imagen" in digimon and digimon["imagen"]:
+        embed.set_thumbnail(url=digimon["imagen"])
+    
+    return embed.to_dict()
+
+def crear_embed_dsrworld(digimon: Dict[str, Any], tiempo_restante: Optional[datetime.timedelta] = None, tipo_alerta: str = "info",
+                         spawn_time: Optional[datetime.datetime] = None) -> discord.Embed:
     """
     Crea un embed con el formato visual de dsrworldwiki.com
     
+    La parte estática sale de una plantilla cacheada por Digimon y tipo de alerta;
+    aquí solo se añaden el tiempo de respawn y el footer.
+    
     Args:
         digimon: Diccionario con información del Digimon
         tiempo_restante: Tiempo restante hasta el spawn (opcional)
         tipo_alerta: Tipo de alerta ("spawn", "warning", "info")
+        spawn_time: Momento del spawn (opcional, habilita timestamps de Discord)
     
     Returns:
         Discord embed formateado
     """
     try:
-        # Seleccionar color según tipo de alerta o tipo de Digimon
-        color = EMBED_COLORS.get(tipo_alerta, digimon.get("color", 0x00FFFF))
-        
-        embed = discord.Embed(color=color)
-        
-        # Título según tipo de alerta
-        if tipo_alerta == "spawn":
-            embed.title = f"🔥 ¡{digimon['nombre']} Raid ha aparecido! ⚔️"
-            embed.description = "**El Digimon ha aparecido en el juego.**\n"
-        elif tipo_alerta == "warning":
-            embed.title = f"⏰ ¡{digimon['nombre']} aparecerá pronto!"
-            embed.description = "**El Digimon aparecerá en 20 minutos.**\n"
+        clave = (digimon['nombre'], tipo_alerta)
+        plantilla = _plantillas_embed.get(clave)
+        if plantilla is None:
+            plantilla = _construir_plantilla_embed(digimon, tipo_alerta)
+            _plantillas_embed[clave] = plantilla
+            _estadisticas_plantillas["misses"] += 1
         else:
-            embed.title = f"📊 {digimon['nombre']} - Información de Raid"
-            embed.description = ""
+            _estadisticas_plantillas["hits"] += 1
         
-        # Información detallada
-        tipo_emoji = TYPE_EMOJIS.get(digimon['tipo'], digimon.get('tipo_icon', '❓'))
-        recompensa_emoji = REWARD_EMOJIS.get(digimon['recompensa'], digimon.get('recompensa_icon', '❓'))
+        # Copiar la lista de campos: add_field la modifica en el embed resultante
+        data = dict(plantilla)
+        data['fields'] = [dict(field) for field in plantilla.get('fields', [])]
+        embed = discord.Embed.from_dict(data)
         
-        info_fields = [
-            ("**Tipo:**", f"{tipo_emoji} {digimon['tipo']}"),
-            ("**Mapa:**", digimon['mapa']),
-            ("**Recompensa:**", f"{recompensa_emoji} {digimon['recompensa']}")
-        ]
+        if tipo_alerta == "warning" and tiempo_restante:
+            # La antelación real del aviso (no forma parte de la plantilla)
+            embed.description = f"**El Digimon aparecerá en {formato_antelacion(tiempo_restante)}.**\n"
         
         if tiempo_restante:
-            tiempo_formateado = formato_tiempo_dsrworld(tiempo_restante)
-            info_fields.append(("**Respawn:**", tiempo_formateado))
-        
-        # Agregar campos al embed
-        for name, value in info_fields:
-            embed.add_field(name=name, value=value, inline=True)
-        
-        # Agregar imagen si está disponible
-        if "imagen" in digimon and digimon["imagen"]:
-            embed.set_thumbnail(url=digimon["imagen"])
+            tiempo_formateado = formato_respawn(spawn_time, tiempo_restante)
+            embed.add_field(name="**Respawn:**", value=tiempo_formateado, inline=True)
         
         # Footer con información adicional
         ahora_kst = obtener_tiempo_kst()
-        embed.set_footer(
-            text=f"Actualizado: {ahora_kst.strftime('%Y-%m-%d %H:%M:%S KST')} • dsrworldwiki.com format"
-        )
+        if DISPLAY_SETTINGS["discord_timestamps"]:
+            # El cliente muestra la hora de actualización en la zona horaria del usuario
+            embed.timestamp = ahora_kst
+            embed.set_footer(text="Actualizado • dsrworldwiki.com format")
+        else:
+            embed.set_footer(
+                text=f"Actualizado: {ahora_kst.strftime('%Y-%m-%d %H:%M:%S KST')} • dsrworldwiki.com format"
+            )
         
         return embed
         
@@ -154,6 +312,213 @@ def crear_embed_dsrworld(digimon: Dict[str, Any], tiempo_restante: Optional[date
         )
         return error_embed
 
+def crear_spawn_info(digimon: Dict[str, Any], horario: Dict[str, int], ahora: datetime.datetime) -> Optional[Dict[str, Any]]:
+    """Calcula el próximo spawn de un horario concreto de un Digimon"""
+    temp_digimon = digimon.copy()
+    temp_digimon["horarios"] = [horario]  # Solo este horario específico
+    
+    proximo_spawn = obtener_proximo_spawn(temp_digimon, ahora)
+    if proximo_spawn is None:
+        return None
+    
+    tiempo_restante = proximo_spawn - ahora
+    
+    return {
+        'digimon': digimon,
+        'horario': horario,
+        'spawn_time': proximo_spawn,
+        'tiempo_restante': tiempo_restante,
+        'formato_tiempo': formato_respawn(proximo_spawn, tiempo_restante),
+        # Identificador único para múltiples horarios del mismo Digimon
+        'digimon_key': f"{digimon['nombre']}_{horario['hora']}_{horario['minuto']}"
+    }
+
+def buscar_spawn_por_clave(digimon_key: str, digimon_manager=None) -> Optional[Dict[str, Any]]:
+    """
+    Resuelve una clave del dropdown ("Nombre_H_M") al próximo spawn de ese horario
+    
+    Solo calcula el horario seleccionado, sin recorrer todo el roster.
+    
+    Args:
+        digimon_key: Clave generada en obtener_todos_los_proximos_spawns
+        digimon_manager: DigimonManager instance (optional)
+    
+    Returns:
+        Diccionario con información del spawn o None si ya no existe
+    """
+    if digimon_manager is None:
+        from data.digimon_manager import DigimonManager
+        digimon_manager = DigimonManager()
+    
+    try:
+        nombre, hora, minuto = digimon_key.rsplit('_', 2)
+        hora, minuto = int(hora), int(minuto)
+    except ValueError:
+        return None
+    
+    digimon = digimon_manager.find_digimon(nombre)
+    if digimon is None or digimon['nombre'] != nombre:
+        return None
+    
+    for horario in digimon['horarios']:
+        if horario['hora'] == hora and horario['minuto'] == minuto:
+            return crear_spawn_info(digimon, horario, obtener_tiempo_kst())
+    
+    return None
+
+def crear_embed_detalle_spawn(spawn_info: Dict[str, Any]) -> discord.Embed:
+    """
+    Crea el embed detallado de un horario concreto (menú de /raids y navegador de roster)
+    
+    Args:
+        spawn_info: Información del spawn (ver crear_spawn_info)
+    
+    Returns:
+        Discord embed con horario, recurrencia y próximo spawn
+    """
+    digimon = spawn_info['digimon']
+    horario = spawn_info['horario']
+    
+    embed = crear_embed_dsrworld(digimon, spawn_info['tiempo_restante'], "info", spawn_info['spawn_time'])
+    
+    # Agregar información adicional
+    embed.add_field(
+        name="⏰ Horario específico",
+        value=f"{horario['hora']:02d}:{horario['minuto']:02d} KST",
+        inline=True
+    )
+    
+    embed.add_field(
+        name="🔄 Recurrencia",
+        value=f"Cada {digimon['recurrencia_dias']} día{'s' if digimon['recurrencia_dias'] > 1 else ''}",
+        inline=True
+    )
+    
+    embed.add_field(
+        name="📅 Próximo Spawn",
+        value=formato_fecha_spawn(spawn_info['spawn_time']),
+        inline=True
+    )
+    
+    # Mostrar todos los horarios si hay múltiples
+    if len(digimon['horarios']) > 1:
+        horarios_text = " • ".join([
+            f"{h['hora']:02d}:{h['minuto']:02d}" for h in digimon['horarios']
+        ])
+        embed.add_field(
+            name="⏲️ Todos los horarios",
+            value=f"{horarios_text} (KST)",
+            inline=False
+        )
+    
+    return embed
+
+def crear_embed_resumen_diario(spawns: List[Dict[str, Any]], desde: datetime.datetime,
+                               hasta: datetime.datetime) -> discord.Embed:
+    """
+    Crea el embed del resumen diario con todos los spawns de las próximas 24 horas
+    
+    Usa siempre timestamps de Discord: cada miembro ve las horas en su zona
+    horaria y la cuenta atrás se mantiene al día sin editar el mensaje.
+    
+    Args:
+        spawns: Spawns del intervalo ({digimon, horario, spawn_time}) ordenados por momento
+        desde: Inicio del intervalo
+        hasta: Fin del intervalo
+    
+    Returns:
+        Discord embed con una línea por spawn
+    """
+    embed = discord.Embed(
+        title=f"📅 Raids del día • {desde.strftime('%d/%m/%Y')}",
+        color=EMBED_COLORS["info"]
+    )
+    
+    lineas = [
+        f"{formato_timestamp_discord(spawn['spawn_time'], 't')} ({formato_timestamp_discord(spawn['spawn_time'], 'R')}) "
+        f"{TYPE_EMOJIS.get(spawn['digimon']['tipo'], '❓')} **{spawn['digimon']['nombre']}** • {spawn['digimon']['mapa']}"
+        for spawn in spawns
+    ]
+    
+    # La descripción admite hasta 4096 caracteres
+    descripcion = ""
+    for posicion, linea in enumerate(lineas):
+        restantes = f"\n… y {len(lineas) - posicion} más"
+        if len(descripcion) + len(linea) + 1 + len(restantes) > 4096:
+            descripcion += restantes
+            break
+        descripcion += f"{linea}\n"
+    
+    embed.description = descripcion or "No hay raids en las próximas 24 horas."
+    embed.add_field(
+        name="🕐 Periodo",
+        value=f"{formato_timestamp_discord(desde, 'f')} → {formato_timestamp_discord(hasta, 'f')}",
+        inline=False
+    )
+    embed.set_footer(text=f"{len(spawns)} spawns • DSR Spain • Resumen diario")
+    
+    return embed
+
+DIAS_SEMANA = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
+
+def crear_embeds_calendario(spawns: List[Dict[str, Any]], desde: datetime.datetime, dias: int) -> List[discord.Embed]:
+    """
+    Crea la cuadrícula semanal del calendario: un embed por semana y un campo por día KST
+    
+    Discord limita a 6000 caracteres el total de embeds de un mensaje, así que
+    cada día se recorta a una parte proporcional del espacio disponible.
+    
+    Args:
+        spawns: Spawns del intervalo ({digimon, horario, spawn_time}) ordenados por momento
+        desde: Medianoche KST del primer día
+        dias: Número de días a mostrar
+    
+    Returns:
+        Lista de embeds (máximo 10 por mensaje)
+    """
+    por_dia: Dict[datetime.date, List[Dict[str, Any]]] = {}
+    for spawn in spawns:
+        por_dia.setdefault(spawn['spawn_time'].astimezone(KST).date(), []).append(spawn)
+    
+    semanas = -(-dias // 7)
+    presupuesto = min(1024, (5400 - 120 * semanas) // dias - 20)
+    
+    embeds = []
+    for semana in range(semanas):
+        primer_dia = desde + datetime.timedelta(days=semana * 7)
+        embed = discord.Embed(
+            title=f"🗓️ Calendario de Raids • Semana del {primer_dia.strftime('%d/%m')}" if semana == 0
+            else f"Semana del {primer_dia.strftime('%d/%m')}",
+            color=EMBED_COLORS["info"]
+        )
+        
+        for dia in range(semana * 7, min(dias, semana * 7 + 7)):
+            fecha = (desde + datetime.timedelta(days=dia)).date()
+            lineas = [
+                f"`{spawn['spawn_time'].astimezone(KST).strftime('%H:%M')}` "
+                f"{TYPE_EMOJIS.get(spawn['digimon']['tipo'], '❓')} {spawn['digimon']['nombre']}"
+                for spawn in por_dia.get(fecha, [])
+            ]
+            
+            valor = ""
+            for posicion, linea in enumerate(lineas):
+                restantes = f"… y {len(lineas) - posicion} más"
+                if len(valor) + len(linea) + 1 + len(restantes) > presupuesto:
+                    valor += restantes
+                    break
+                valor += f"{linea}\n"
+            
+            embed.add_field(
+                name=f"{DIAS_SEMANA[fecha.weekday()]} {fecha.strftime('%d/%m')}",
+                value=valor or "—",
+                inline=True
+            )
+        
+        embeds.append(embed)
+    
+    embeds[-1].set_footer(text=f"{len(spawns)} spawns en {dias} días • Horas en KST • DSR Spain")
+    return embeds
+
 def obtener_todos_los_proximos_spawns(digimon_manager=None) -> List[Dict[str, Any]]:
     """
     Obtiene información de todos los próximos spawns ordenados por tiempo
@@ -177,28 +542,9 @@ def obtener_todos_los_proximos_spawns(digimon_manager=None) -> List[Dict[str, An
         try:
             # Calcular todos los spawns para este Digimon
             for horario in digimon["horarios"]:
-                temp_digimon = digimon.copy()
-                temp_digimon["horarios"] = [horario]  # Solo este horario específico
-                
-                proximo_spawn = obtener_proximo_spawn(temp_digimon, ahora)
-                if proximo_spawn is None:
-                    continue
-                    
-                tiempo_restante = proximo_spawn - ahora
-                
-                # Crear identificador único para múltiples horarios del mismo Digimon
-                digimon_key = f"{digimon['nombre']}_{horario['hora']}_{horario['minuto']}"
-                
-                spawn_info = {
-                    'digimon': digimon,
-                    'horario': horario,
-                    'spawn_time': proximo_spawn,
-                    'tiempo_restante': tiempo_restante,
-                    'formato_tiempo': formato_tiempo_dsrworld(tiempo_restante),
-                    'digimon_key': digimon_key
-                }
-                
-                spawns_info.append(spawn_info)
+                spawn_info = crear_spawn_info(digimon, horario, ahora)
+                if spawn_info is not None:
+                    spawns_info.append(spawn_info)
                 
         except Exception as e:
             logger.error(f"Error procesando spawns para {digimon.get('nombre', 'Unknown')}: {e}")
@@ -244,13 +590,15 @@ def obtener_estadisticas_raids(digimon_manager=None) -> Dict[str, Any]:
     stats['current_time_kst'] = obtener_tiempo_kst()
     return stats
 
-def crear_dropdown_digimons(spawns_info: List[Dict[str, Any]], max_options: int = 25) -> discord.ui.Select:
+def crear_dropdown_digimons(spawns_info: List[Dict[str, Any]], max_options: int = 25,
+                            custom_id: Optional[str] = None) -> discord.ui.Select:
     """
     Crea un dropdown con los Digimon disponibles
     
     Args:
         spawns_info: Lista de información de spawns
         max_options: Máximo número de opciones (Discord límite: 25)
+        custom_id: custom_id estable para vistas persistentes (opcional)
     
     Returns:
         Componente Select de Discord
@@ -268,8 +616,11 @@ def crear_dropdown_digimons(spawns_info: List[Dict[str, Any]], max_options: int
             continue
         seen_digimons.add(digimon_key)
         
-        # Crear etiqueta con tiempo
-        tiempo_formateado = spawn_info['formato_tiempo']
+        # Crear etiqueta con tiempo (las opciones del menú no renderizan timestamps de Discord)
+        if DISPLAY_SETTINGS["discord_timestamps"]:
+            tiempo_formateado = spawn_info['spawn_time'].strftime("%d/%m %H:%M KST")
+        else:
+            tiempo_formateado = spawn_info['formato_tiempo']
         label = f"{digimon['nombre']} ({horario['hora']:02d}:{horario['minuto']:02d})"
         
         # Truncar si es muy largo
@@ -295,5 +646,7 @@ def crear_dropdown_digimons(spawns_info: List[Dict[str, Any]], max_options: int
         min_values=1,
         max_values=1
     )
+    if custom_id:
+        select.custom_id = custom_id
     
     return select